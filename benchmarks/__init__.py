@@ -0,0 +1,5 @@
+"""
+Бенчмарки FPGA Pipeline Generator на синтетическом дереве сабмодулей.
+
+Использование: python -m benchmarks.run --help
+"""
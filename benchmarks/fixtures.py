@@ -0,0 +1,89 @@
+"""
+Построение синтетического дерева fpga/ для бенчмарков.
+"""
+
+import json
+import os
+import shutil
+from typing import Any, Dict, List
+
+from fpga_pipeline_generator.utils import yaml_io
+
+# Файл с параметрами построенного дерева; по нему дерево переиспользуется
+MARKER_FILE = ".fixture.json"
+
+
+def make_target(
+    submodule: str, stage: str, index: int, variable_count: int
+) -> Dict[str, Any]:
+    """
+    Строит описание одной цели. Формат переменных чередуется, чтобы покрыть
+    все варианты, которые понимает парсер: variables-словарь, variables-список
+    и vars-список.
+    """
+    values = {f"FPGA_VAR_{n}": f"{submodule}_{stage}_{index}_{n}" for n in range(variable_count)}
+    target: Dict[str, Any] = {"target": f"{submodule}_{stage}_{index}"}
+
+    variant = index % 3
+    if variant == 0:
+        target["variables"] = values
+    elif variant == 1:
+        target["variables"] = [f"{name}={value}" for name, value in values.items()]
+    else:
+        target["vars"] = [f"{name}={value}" for name, value in values.items()]
+
+    if index % 2:
+        target["options"] = ["--optimize"]
+    return target
+
+
+def build_tree(
+    root: str,
+    submodules: int,
+    targets_per_stage: int = 2,
+    variable_count: int = 4,
+    stages: List[str] = ("elab", "synth", "bitstream"),
+) -> str:
+    """
+    Создает root/fpga с заданным числом сабмодулей и возвращает путь к fpga.
+
+    Если дерево с теми же параметрами уже построено, оно переиспользуется.
+    """
+    params = {
+        "submodules": submodules,
+        "targets_per_stage": targets_per_stage,
+        "variable_count": variable_count,
+        "stages": list(stages),
+    }
+    fpga_dir = os.path.join(root, "fpga")
+    marker = os.path.join(root, MARKER_FILE)
+
+    if os.path.isfile(marker):
+        with open(marker, "r", encoding="utf-8") as f:
+            if json.load(f) == params:
+                return fpga_dir
+
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(fpga_dir)
+
+    width = len(str(submodules))
+    for number in range(submodules):
+        submodule = f"ip_{number:0{width}d}"
+        submodule_dir = os.path.join(fpga_dir, submodule)
+        os.makedirs(submodule_dir)
+
+        cfg = {
+            stage: [
+                make_target(submodule, stage, index, variable_count)
+                for index in range(targets_per_stage)
+            ]
+            for stage in stages
+        }
+        with open(os.path.join(submodule_dir, "cfg.yaml"), "w", encoding="utf-8") as f:
+            f.write(yaml_io.dump(cfg))
+        with open(os.path.join(submodule_dir, "Makefile"), "w", encoding="utf-8") as f:
+            f.write("all:\n")
+
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump(params, f)
+    return fpga_dir
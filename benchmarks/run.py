@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк фаз генерации пайплайна на лестнице размеров дерева.
+
+Для каждого размера замеряются время (минимум из нескольких повторов) и
+пиковая память (tracemalloc, отдельный проход) фаз: загрузка конфигурации,
+парсинг cfg.yaml, подготовка контекстов задач, рендеринг и сохранение.
+Результат сохраняется в JSON и может сравниваться с сохраненным baseline.
+
+Примеры:
+  python -m benchmarks.run --sizes 10,100,1000 --output bench.json
+  python -m benchmarks.run --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from fpga_pipeline_generator import __version__
+from fpga_pipeline_generator.core.config_loader import ConfigLoader
+from fpga_pipeline_generator.core.generator import FPGAPipelineGenerator
+
+from .fixtures import build_tree
+
+DEFAULT_SIZES = "10,100,1000,10000"
+PHASES = ("config", "parse", "contexts", "render", "save")
+STAGES = ["elab", "synth", "bitstream"]
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> Tuple[Any, float]:
+    """Возвращает результат последнего вызова и минимальное время."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Пиковая память, выделенная во время вызова, в КиБ."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_size(
+    workdir: str, submodules: int, args: argparse.Namespace
+) -> Dict[str, Dict[str, float]]:
+    """Замеряет все фазы на дереве из submodules сабмодулей."""
+    root = os.path.join(workdir, f"tree_{submodules}")
+    fpga_dir = build_tree(root, submodules, args.targets, args.variables, STAGES)
+    output_file = os.path.join(root, "generated_pipeline.yml")
+    overrides = {
+        "file_search": {"fpga_dir": fpga_dir},
+        "output": {"format": args.format},
+    }
+
+    generator = FPGAPipelineGenerator(None, overrides)
+    state: Dict[str, Any] = {}
+
+    def config() -> Any:
+        return ConfigLoader().get_config(None, overrides)
+
+    def parse() -> Any:
+        state["parsed"] = generator.parser.parse_all_submodules(STAGES)
+        return state["parsed"]
+
+    def contexts() -> Any:
+        state["contexts"] = list(generator.iter_job_contexts(state["parsed"], STAGES))
+        return state["contexts"]
+
+    def render() -> Any:
+        state["content"] = "".join(
+            generator.iter_pipeline_chunks(STAGES, state["contexts"])
+        )
+        return state["content"]
+
+    def save() -> Any:
+        return generator.save_pipeline(state["content"], output_file)
+
+    phases = dict(zip(PHASES, (config, parse, contexts, render, save)))
+    results: Dict[str, Dict[str, float]] = {}
+    # Генератор сообщает о каждом сабмодуле - в замеры это не должно попадать
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, func in phases.items():
+            _, seconds = time_call(func, args.repeat)
+            results[name] = {"seconds": round(seconds, 6)}
+            if not args.no_memory:
+                results[name]["peak_kib"] = peak_memory(func)
+
+    results["total"] = {"seconds": round(sum(r["seconds"] for r in results.values()), 6)}
+    results["total"]["jobs"] = len(state["contexts"])
+    return results
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_seconds: float,
+) -> List[str]:
+    """
+    Сравнивает результаты с baseline и возвращает описания регрессий.
+
+    Регрессией считается рост времени или памяти фазы больше чем на threshold
+    (доля); изменения времени меньше min_seconds считаются шумом.
+    """
+    regressions = []
+    for size, phases in results["sizes"].items():
+        base_phases = baseline.get("sizes", {}).get(size)
+        if base_phases is None:
+            continue
+        for phase, metrics in phases.items():
+            base_metrics = base_phases.get(phase, {})
+            for metric in ("seconds", "peak_kib"):
+                if metric not in metrics or not base_metrics.get(metric):
+                    continue
+                current, base = metrics[metric], base_metrics[metric]
+                if metric == "seconds" and current - base < min_seconds:
+                    continue
+                change = (current - base) / base
+                if change > threshold:
+                    regressions.append(
+                        f"{size} сабмодулей, {phase}.{metric}: {base} -> {current} "
+                        f"(+{change:.0%})"
+                    )
+    return regressions
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"Число сабмодулей через запятую (по умолчанию: {DEFAULT_SIZES})",
+    )
+    parser.add_argument(
+        "--targets", type=int, default=2, help="Целей на стадию в сабмодуле (по умолчанию: 2)"
+    )
+    parser.add_argument(
+        "--variables", type=int, default=4, help="Переменных у цели (по умолчанию: 4)"
+    )
+    parser.add_argument(
+        "--format",
+        default="jinja",
+        choices=("jinja", "yaml", "json"),
+        help="Формат вывода генератора (по умолчанию: jinja)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Повторов замера времени (по умолчанию: 3)"
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Не замерять пиковую память"
+    )
+    parser.add_argument(
+        "--workdir",
+        help="Каталог для синтетических деревьев (по умолчанию: временный каталог); "
+             "построенные деревья переиспользуются",
+    )
+    parser.add_argument("--output", help="Сохранить результаты в JSON файл")
+    parser.add_argument("--baseline", help="JSON с результатами для сравнения")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Допустимый рост метрики относительно baseline (по умолчанию: 0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.005,
+        help="Изменения времени меньше этого значения не считаются регрессией",
+    )
+    return parser
+
+
+def main() -> int:
+    """Основная функция."""
+    args = create_parser().parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "generator_version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "format": args.format,
+            "targets_per_stage": args.targets,
+            "variables": args.variables,
+            "repeat": args.repeat,
+        },
+        "sizes": {},
+    }
+
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(
+            tempfile.TemporaryDirectory(prefix="fpga_bench_")
+        )
+        for size in sizes:
+            size_results = run_size(workdir, size, args)
+            results["sizes"][str(size)] = size_results
+            print(f"{size} сабмодулей ({size_results['total']['jobs']} задач):")
+            for phase in (*PHASES, "total"):
+                metrics = size_results[phase]
+                memory = f", {metrics['peak_kib']} КиБ" if "peak_kib" in metrics else ""
+                print(f"  {phase:<10} {metrics['seconds'] * 1000:10.1f} мс{memory}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"Регрессии относительно {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"Регрессий относительно {args.baseline} нет")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Проверка времени запуска CLI.
+
+Замеряет время импорта точки входа (python -X importtime, минимум из
+нескольких запусков) и сравнивает его с бюджетом, проверяет, что --help и
+--version не загружают тяжелые зависимости, и что config/defaults.py
+соответствует default.yaml. При нарушении любой проверки код возврата 1.
+
+Примеры:
+  python -m benchmarks.startup
+  python -m benchmarks.startup --budget-ms 30 --repeat 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from fpga_pipeline_generator.config import compile_defaults
+
+ENTRY_MODULE = "fpga_pipeline_generator.main"
+# Модули, которые не должны загружаться при --help и --version
+HEAVY_MODULES = ("jinja2", "yaml", "fpga_pipeline_generator.core.generator")
+DEFAULT_BUDGET_MS = 40.0
+
+# Корень репозитория - чтобы пакет импортировался из дерева исходников
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_importtime(argv: List[str]) -> Dict[str, int]:
+    """
+    Запускает python -X importtime с аргументами argv и возвращает
+    накопленное время импорта каждого модуля верхнего уровня в микросекундах.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+    modules: Dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = int(fields[1])
+    return modules
+
+
+def entry_import_ms(repeat: int) -> float:
+    """Минимальное время импорта точки входа в миллисекундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        modules = run_importtime(["-c", f"import {ENTRY_MODULE}"])
+        best = min(best, modules.get(ENTRY_MODULE, 0) / 1000)
+    return best
+
+
+def heavy_imports(cli_args: List[str]) -> List[str]:
+    """Тяжелые модули, загруженные при запуске CLI с cli_args."""
+    modules = run_importtime(["-m", "fpga_pipeline_generator", *cli_args])
+    return [name for name in HEAVY_MODULES if name in modules]
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help=f"Бюджет времени импорта {ENTRY_MODULE} в мс (по умолчанию: {DEFAULT_BUDGET_MS})",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Число запусков для замера (по умолчанию: 5)"
+    )
+    return parser
+
+
+def main() -> int:
+    """Основная функция."""
+    args = create_parser().parse_args()
+    failures = []
+
+    import_ms = entry_import_ms(args.repeat)
+    print(f"Импорт {ENTRY_MODULE}: {import_ms:.1f} мс (бюджет {args.budget_ms:.1f} мс)")
+    if import_ms > args.budget_ms:
+        failures.append(f"импорт {ENTRY_MODULE} превышает бюджет: {import_ms:.1f} мс")
+
+    for cli_args in (["--version"], ["--help"]):
+        loaded = heavy_imports(cli_args)
+        command = " ".join(cli_args)
+        print(f"{command}: тяжелые модули {loaded or 'не загружаются'}")
+        if loaded:
+            failures.append(f"{command} загружает {', '.join(loaded)}")
+
+    with open(compile_defaults.TARGET_FILE, "r", encoding="utf-8") as f:
+        if f.read() != compile_defaults.render_defaults():
+            failures.append(
+                "config/defaults.py устарел: "
+                "python -m fpga_pipeline_generator.config.compile_defaults"
+            )
+
+    if failures:
+        print("Проверка времени запуска не пройдена:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("Проверка времени запуска пройдена")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
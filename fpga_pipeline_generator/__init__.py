@@ -5,15 +5,38 @@ FPGA Pipeline Generator
 на основе конфигурационных файлов cfg.yaml из сабмодулей FPGA.
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "FPGA Pipeline Generator Team"
 
-from .core.generator import FPGAPipelineGenerator
-from .core.parser import ConfigParser
-from .core.config_loader import ConfigLoader
-
 __all__ = [
     "FPGAPipelineGenerator",
     "ConfigParser", 
-    "ConfigLoader"
-]
\ No newline at end of file
+    "ConfigLoader",
+    "generate",
+    "PipelineResult",
+]
+
+# Классы импортируются при первом обращении (PEP 562): запуск CLI с --help
+# или --version не загружает jinja2 и PyYAML
+_LAZY_EXPORTS = {
+    "FPGAPipelineGenerator": ".core.generator",
+    "ConfigParser": ".core.parser",
+    "ConfigLoader": ".core.config_loader",
+    "generate": ".api",
+    "PipelineResult": ".api",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,97 @@
+"""
+Программный интерфейс генератора для вызова из других процессов Python.
+
+generate() не меняет глобального состояния процесса (os.environ, текущий
+каталог, настройки logging) и не пишет файлов, кроме кэшей, включенных в
+конфигурации: стадии передаются аргументом, сообщения идут через модуль
+logging, а результат возвращается структурой. Каждый вызов создает свой
+генератор, поэтому вызовы можно выполнять параллельно из нескольких потоков;
+общим между ними может быть только кэш парсинга (ParseCache потокобезопасен).
+
+Пример:
+
+    from fpga_pipeline_generator.api import generate
+    from fpga_pipeline_generator.core.parse_cache import ParseCache
+
+    cache = ParseCache(".fpga_pipeline_cache")
+    result = generate(["synth", "bitstream"], fpga_dir="fpga", parse_cache=cache)
+    for job in result.jobs:
+        print(job.name, job.stage)
+    print(result.content)
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from .core.generator import FPGAPipelineGenerator
+from .core.model import Job
+from .core.parse_cache import ParseCache
+from .core.profiler import Profiler
+
+
+class PipelineResult(NamedTuple):
+    """Результат генерации пайплайна."""
+
+    # Стадии после проверки и упорядочивания
+    stages: List[str]
+    # Структурированные задачи в порядке вывода
+    jobs: List[Job]
+    # Текст пайплайна в формате output.format; None - задач нет
+    content: Optional[str]
+    # Отпечатки задач при включенном build_avoidance (имя задачи -> отпечаток)
+    fingerprints: Dict[str, str]
+
+
+def generate(
+    stages: Sequence[str],
+    fpga_dir: Optional[str] = None,
+    config: Optional[str] = None,
+    overrides: Optional[Dict[str, Any]] = None,
+    parse_cache: Optional[ParseCache] = None,
+    profiler: Optional[Profiler] = None,
+) -> PipelineResult:
+    """
+    Генерирует пайплайн для стадий stages.
+
+    fpga_dir - папка с сабмодулями (по умолчанию file_search.fpga_dir), config -
+    путь к пользовательскому конфигу, overrides - переопределения конфигурации
+    с наивысшим приоритетом (как у аргументов командной строки). Относительные
+    пути считаются от текущего каталога процесса, как в CLI.
+
+    Кэш готовых пайплайнов (cache.outputs) не используется: он хранит только
+    текст, а результат содержит и задачи. Если ни одна стадия не
+    поддерживается, выбрасывается ValueError; если задач нет, возвращается
+    результат с пустым jobs и content = None.
+    """
+    if fpga_dir is not None:
+        file_search = {**(overrides or {}).get("file_search", {}), "fpga_dir": fpga_dir}
+        overrides = {**(overrides or {}), "file_search": file_search}
+
+    generator = FPGAPipelineGenerator(config, overrides, profiler, list(stages), parse_cache)
+    resolved = generator.resolve_stages(list(stages))
+    if not resolved:
+        raise ValueError(
+            f"Нет поддерживаемых стадий среди {list(stages)}. "
+            f"Поддерживаемые: {generator.config_loader.get_supported_stages(generator.config)}"
+        )
+
+    parsed_data = generator.parse_targets(resolved, generator.find_submodules())
+    job_contexts = []
+    if parsed_data is not None:
+        with generator.profiler.phase("contexts"):
+            job_contexts = list(generator.iter_job_contexts(parsed_data, resolved))
+
+    fingerprints = {}
+    if generator.build_avoidance is not None:
+        fingerprints = dict(generator.build_avoidance.fingerprints)
+    if not job_contexts:
+        return PipelineResult(resolved, [], None, fingerprints)
+
+    generator.profiler.count("jobs", len(job_contexts))
+    with generator.profiler.phase("render"):
+        content = "".join(generator.iter_pipeline_chunks(resolved, job_contexts))
+    return PipelineResult(
+        resolved,
+        [Job.from_context(job_context) for job_context in job_contexts],
+        content,
+        fingerprints,
+    )
@@ -0,0 +1,6 @@
+"""
+Конфигурация по умолчанию FPGA Pipeline Generator.
+
+default.yaml - исходник и документация настроек; defaults.py - его
+скомпилированная копия, которую ConfigLoader загружает без разбора YAML.
+"""
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Компилирует default.yaml в Python модуль defaults.py.
+
+Запускается после каждого изменения default.yaml:
+  python -m fpga_pipeline_generator.config.compile_defaults
+  python -m fpga_pipeline_generator.config.compile_defaults --check
+"""
+
+import argparse
+import os
+import sys
+from typing import Any
+
+from ..utils import yaml_io
+
+CONFIG_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FILE = os.path.join(CONFIG_DIR, "default.yaml")
+TARGET_FILE = os.path.join(CONFIG_DIR, "defaults.py")
+# Списки длиннее строки разбиваются по элементу на строку
+MAX_LINE = 88
+
+HEADER = '''"""
+Конфигурация по умолчанию, скомпилированная из default.yaml.
+
+Файл генерируется, не редактируйте его вручную:
+  python -m fpga_pipeline_generator.config.compile_defaults
+"""
+
+'''
+
+
+def format_literal(value: Any, indent: str = "") -> str:
+    """
+    Форматирует значение как Python литерал: словари - по ключу на строку
+    в порядке default.yaml, короткие списки - в одну строку.
+    """
+    inner = indent + "    "
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        items = "".join(
+            f"{inner}{key!r}: {format_literal(item, inner)},\n" for key, item in value.items()
+        )
+        return f"{{\n{items}{indent}}}"
+    if isinstance(value, list):
+        flat = repr(value)
+        if len(inner) + len(flat) <= MAX_LINE and not any(
+            isinstance(item, (dict, list)) for item in value
+        ):
+            return flat
+        items = "".join(f"{inner}{format_literal(item, inner)},\n" for item in value)
+        return f"[\n{items}{indent}]"
+    return repr(value)
+
+
+def render_defaults(source_file: str = SOURCE_FILE) -> str:
+    """Возвращает текст модуля defaults.py для default.yaml."""
+    config = yaml_io.load_file(source_file) or {}
+    return f"{HEADER}DEFAULT_CONFIG = {format_literal(config)}\n"
+
+
+def main() -> int:
+    """Основная функция."""
+    parser = argparse.ArgumentParser(description="Компилирует default.yaml в defaults.py")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Только проверить, что defaults.py соответствует default.yaml",
+    )
+    args = parser.parse_args()
+
+    content = render_defaults()
+    try:
+        with open(TARGET_FILE, "r", encoding="utf-8") as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+
+    if args.check:
+        if current != content:
+            print(f"{TARGET_FILE} устарел, пересоберите его из default.yaml")
+            return 1
+        print(f"{TARGET_FILE} соответствует default.yaml")
+        return 0
+
+    if current != content:
+        with open(TARGET_FILE, "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"{TARGET_FILE} обновлен")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Конфигурация по умолчанию, скомпилированная из default.yaml.
+
+Файл генерируется, не редактируйте его вручную:
+  python -m fpga_pipeline_generator.config.compile_defaults
+"""
+
+DEFAULT_CONFIG = {
+    'stages': {
+        'elab': {
+            'tags': ['soc-fpga-elab'],
+            'make_target': 'elab',
+            'description': 'FPGA Elaboration',
+        },
+        'synth': {
+            'tags': ['soc-fpga-synth'],
+            'make_target': 'synth',
+            'deliver_target': 'deliver-synth',
+            'description': 'FPGA Synthesis',
+        },
+        'bitstream': {
+            'tags': ['soc-fpga-synth'],
+            'make_target': 'bitstream',
+            'deliver_target': 'deliver-bitstream',
+            'description': 'FPGA Bitstream Generation',
+        },
+    },
+    'dag': {
+        'enabled': False,
+        'stage_dependencies': {
+            'elab': [],
+            'synth': ['elab'],
+            'bitstream': ['synth'],
+        },
+        'max_needs': 50,
+    },
+    'job_defaults': {
+        'variables': {
+            'UV_INDEX_URL': 'https://artifactory-eda.ysemi.yadro.com/artifactory/api/pypi/soc-devops-pypi/simple',
+            'UV_NATIVE_TLS': 'true',
+            'UV_PYTHON': 'python3.11',
+            'GIT_STRATEGY': 'clone',
+            'GIT_SUBMODULE_STRATEGY': 'none',
+        },
+        'script_prefix': ['module load AGE'],
+        'artifacts': {
+            'paths': [
+                'bsv2/**/*.rpt',
+                'bsv2/**/*_invalid.xdc',
+                'bsv2/**/vivado.tcl',
+                'bsv2/**/vivado.log',
+                'bsv2/bs.log',
+            ],
+        },
+    },
+    'default_rules': [
+        {
+            'when': 'always',
+        },
+    ],
+    'default_variables': {
+        'FPGA_WORKSPACE': '/workspace',
+        'MAKEFILE_PATH': 'Makefile',
+    },
+    'templates': {
+        'pipeline': 'pipeline.j2',
+        'job': 'job.j2',
+        'bytecode_cache_dir': None,
+    },
+    'output': {
+        'indent': 2,
+        'default_filename': 'generated_pipeline.yml',
+        'streaming': False,
+        'format': 'jinja',
+        'extends': False,
+        'matrix': False,
+        'timestamp': True,
+    },
+    'watch': {
+        'backend': 'auto',
+        'interval': 1.0,
+        'socket': None,
+    },
+    'sharding': {
+        'enabled': False,
+        'by': 'count',
+        'shards': 4,
+        'max_jobs': 500,
+        'generator_job': 'generate-dynamic-targets',
+        'fetch_job': 'fetch-pipeline-shards',
+        'fetch_tags': [],
+    },
+    'cost_model': {
+        'enabled': False,
+        'history': '.fpga_job_history.json',
+        'window': 10,
+        'order': True,
+        'classes': [],
+    },
+    'build_avoidance': {
+        'mode': 'off',
+        'registry': '.fpga_build_registry.json',
+        'max_age_days': 7,
+        'max_entries': 10000,
+        'reuse_tags': [],
+    },
+    'supported_stages': ['elab', 'synth', 'bitstream'],
+    'profiles': {},
+    'selection': {
+        'only': [],
+        'skip': [],
+    },
+    'file_search': {
+        'fpga_dir': 'fpga',
+        'config_filename': 'cfg.yaml',
+        'parallel': 'serial',
+        'workers': 0,
+        'max_depth': 1,
+        'exclude': [],
+    },
+    'cache': {
+        'enabled': False,
+        'dir': '.fpga_pipeline_cache',
+        'outputs': False,
+        'fingerprint': 'content',
+        'max_outputs': 16,
+    },
+    'incremental': {
+        'changed_since': None,
+        'dependents': {},
+    },
+}
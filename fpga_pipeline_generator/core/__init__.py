@@ -2,12 +2,30 @@
 Ядро FPGA Pipeline Generator
 """
 
-from .config_loader import ConfigLoader
-from .parser import ConfigParser
-from .generator import FPGAPipelineGenerator
+import importlib
 
 __all__ = [
     "ConfigLoader",
     "ConfigParser", 
     "FPGAPipelineGenerator"
-]
\ No newline at end of file
+]
+
+# Классы импортируются при первом обращении (PEP 562)
+_LAZY_EXPORTS = {
+    "ConfigLoader": ".config_loader",
+    "ConfigParser": ".parser",
+    "FPGAPipelineGenerator": ".generator",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,330 @@
+"""
+Модуль пропуска уже собранных целей.
+
+Отпечаток задачи - хэш исходников сабмодуля (git tree hash каталога, а также
+сабмодулей, от которых он зависит по incremental.dependents), цели, ее
+переменных и опций, make-цели и общих настроек задачи. Реестр хранит отпечатки
+успешно собранных задач вместе с id задачи GitLab: задачу с известным
+отпечатком можно не выводить (omit) или заменить задачей, которая скачивает
+артефакты прошлой сборки (reuse).
+
+Реестр пополняется по выгрузке задач GitLab (--record-builds) и манифесту
+отпечатков, который пишется рядом с пайплайном.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .changes import match_paths
+from .constants import BUILD_AVOIDANCE_MODES
+from .dag import group_by_stage, linear_dependencies, predecessor_jobs, restrict_needs
+from .model import JobSpec
+from ..utils.discovery import SubmoduleEntry
+from ..utils.file_utils import FileUtils
+
+logger = logging.getLogger(__name__)
+
+
+def _run_git(args: List[str], cwd: str = ".") -> Optional[str]:
+    """Запускает git и возвращает stdout; None - git недоступен или ошибка."""
+    # subprocess нужен только при включенном пропуске сборок
+    import subprocess
+
+    try:
+        completed = subprocess.run(
+            ["git", *args], cwd=cwd, capture_output=True, text=True, check=False
+        )
+    except OSError as e:
+        logger.warning(f"Не удалось запустить git: {e}")
+        return None
+    if completed.returncode != 0:
+        logger.warning(f"git {args[0]} завершился с ошибкой: {completed.stderr.strip()}")
+        return None
+    return completed.stdout
+
+
+def git_tree_hashes(submodules: List[SubmoduleEntry], cwd: str = ".") -> Dict[str, str]:
+    """
+    Хэши деревьев git (для git-сабмодуля - SHA коммита) каталогов сабмодулей в
+    HEAD по пути сабмодуля. Сабмодули с незакоммиченными или неотслеживаемыми
+    изменениями и каталоги вне git в результат не попадают: их задачи
+    собираются всегда.
+    """
+    base = os.path.abspath(cwd)
+    rel_paths = [
+        os.path.relpath(os.path.abspath(entry.path), base).replace(os.sep, "/")
+        for entry in submodules
+    ]
+    if not rel_paths:
+        return {}
+
+    # ls-tree --full-name и status --porcelain выводят пути от корня репозитория,
+    # а пути сабмодулей заданы от cwd, который может быть подкаталогом
+    prefix = _run_git(["rev-parse", "--show-prefix"], cwd)
+    listing = _run_git(["ls-tree", "-z", "--full-name", "HEAD", "--", *rel_paths], cwd)
+    status = _run_git(
+        ["status", "--porcelain", "-z", "--no-renames", "--untracked-files=all", "--", *rel_paths],
+        cwd,
+    )
+    if prefix is None or listing is None or status is None:
+        return {}
+
+    full_paths = {
+        posixpath.normpath(prefix.strip() + rel_path): entry
+        for rel_path, entry in zip(rel_paths, submodules)
+    }
+    hashes = {}
+    for record in listing.split("\0"):
+        info, _, path = record.partition("\t")
+        if path in full_paths:
+            hashes[path] = info.split()[2]
+
+    dirty = match_paths(full_paths, [record[3:] for record in status.split("\0") if record])
+    return {
+        entry.path: hashes[path]
+        for path, entry in full_paths.items()
+        if path in hashes and path not in dirty
+    }
+
+
+def _upstream(name: str, dependents: Dict[str, List[str]]) -> Set[str]:
+    """Сабмодули, от которых зависит name (транзитивно)."""
+    result: Set[str] = set()
+    queue = [name]
+    while queue:
+        current = queue.pop()
+        for upstream, downstream in dependents.items():
+            if current in (downstream or []) and upstream not in result:
+                result.add(upstream)
+                queue.append(upstream)
+    result.discard(name)
+    return result
+
+
+def source_hashes(
+    hashes_by_name: Dict[str, Optional[str]], dependents: Dict[str, List[str]]
+) -> Dict[str, str]:
+    """
+    Хэш исходников сабмодуля вместе с сабмодулями, от которых он зависит.
+    Если хоть один хэш неизвестен, сабмодуль в результат не попадает.
+    """
+    result = {}
+    for name in hashes_by_name:
+        names = [name, *sorted(_upstream(name, dependents))]
+        tree_hashes = [hashes_by_name.get(item) for item in names]
+        if all(tree_hashes):
+            result[name] = hashlib.sha256(
+                "\0".join(f"{item}={tree_hash}" for item, tree_hash in zip(names, tree_hashes))
+                .encode("utf-8")
+            ).hexdigest()
+    return result
+
+
+def job_fingerprint(job: JobSpec, source_hash: str) -> str:
+    """Отпечаток входных данных задачи."""
+    h = hashlib.sha256()
+    for part in (
+        BuildRegistry.VERSION,
+        source_hash,
+        job.stage,
+        job.make_target,
+        job.deliver_target,
+        job.makefile_path,
+        job.target.name,
+        job.target.variables,
+        job.target.options,
+        job.artifact_paths,
+        sorted(job.ci_variables.items()),
+        job.script_prefix,
+        sorted(job.default_variables.items()),
+    ):
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def manifest_path(output_file: str) -> str:
+    """Манифест отпечатков рядом с выходным файлом: <имя>.fingerprints.json."""
+    root, _ = os.path.splitext(output_file)
+    return f"{root}.fingerprints.json"
+
+
+class BuildRegistry:
+    """
+    Реестр собранных отпечатков: отпечаток -> id и имя задачи GitLab и время
+    записи. Хранятся max_entries последних записей.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> "BuildRegistry":
+        """Загружает реестр; отсутствующий или поврежденный файл - пустой реестр."""
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Реестр сборок {self.path} не прочитан и не используется: {e}")
+            return self
+        if isinstance(data, dict) and data.get("version") == self.VERSION:
+            self.entries = data.get("entries", {})
+        return self
+
+    def save(self) -> None:
+        """Атомарно сохраняет реестр, оставляя самые новые записи."""
+        if len(self.entries) > self.max_entries:
+            newest = sorted(
+                self.entries.items(), key=lambda item: item[1].get("recorded", 0), reverse=True
+            )
+            self.entries = dict(newest[:self.max_entries])
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with FileUtils.atomic_write(self.path) as f:
+            json.dump({"version": self.VERSION, "entries": self.entries}, f, sort_keys=True)
+            f.write("\n")
+
+    def record(self, fingerprint: str, job_id: Any, job_name: str) -> None:
+        """Записывает успешную сборку."""
+        self.entries[fingerprint] = {"job_id": job_id, "job": job_name, "recorded": int(time.time())}
+
+    def lookup(self, fingerprint: str, max_age_days: float) -> Optional[Dict[str, Any]]:
+        """Запись о сборке или None, если ее нет или артефакты могли истечь."""
+        entry = self.entries.get(fingerprint)
+        if entry is None or entry.get("job_id") is None:
+            return None
+        if max_age_days and time.time() - entry.get("recorded", 0) > max_age_days * 86400:
+            return None
+        return entry
+
+    def record_export(self, manifest: Dict[str, str], records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Записывает успешные задачи выгрузки GitLab, отпечатки которых есть в
+        манифесте. Возвращает число записанных сборок.
+        """
+        recorded = 0
+        for record in records:
+            fingerprint = manifest.get(record.get("name", ""))
+            if fingerprint and record.get("status") == "success" and record.get("id"):
+                self.record(fingerprint, record["id"], record["name"])
+                recorded += 1
+        return recorded
+
+
+class BuildAvoidance:
+    """Пропуск или переиспользование задач с уже собранными отпечатками."""
+
+    def __init__(
+        self,
+        mode: str,
+        registry: BuildRegistry,
+        max_age_days: float = 7,
+        reuse_tags: Optional[List[str]] = None,
+    ):
+        if mode not in BUILD_AVOIDANCE_MODES or mode == "off":
+            raise ValueError(
+                f"Неизвестный режим пропуска сборок '{mode}'. "
+                f"Допустимые: {list(BUILD_AVOIDANCE_MODES)}"
+            )
+        self.mode = mode
+        self.registry = registry
+        self.max_age_days = max_age_days
+        self.reuse_tags = reuse_tags or None
+        # Отпечатки задач последней генерации (для манифеста)
+        self.fingerprints: Dict[str, str] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["BuildAvoidance"]:
+        """Режим по секции build_avoidance; None - выключен."""
+        avoidance_config = config.get("build_avoidance", {})
+        mode = avoidance_config.get("mode", "off")
+        if mode == "off":
+            return None
+        registry = BuildRegistry(
+            avoidance_config.get("registry", ".fpga_build_registry.json"),
+            avoidance_config.get("max_entries", 10000),
+        ).load()
+        return cls(
+            mode,
+            registry,
+            avoidance_config.get("max_age_days", 7),
+            avoidance_config.get("reuse_tags"),
+        )
+
+    def apply(
+        self,
+        job_contexts: List[JobSpec],
+        stages: List[str],
+        source_hash: Optional[str],
+        dependencies: Optional[Dict[str, List[str]]] = None,
+    ) -> List[JobSpec]:
+        """
+        Обрабатывает задачи одного сабмодуля. В режиме omit собранная задача
+        остается, если от нее зависит оставшаяся задача следующей стадии: той
+        нужны ее артефакты. Зависимости определяются как needs графа
+        (dag.predecessor_jobs); dependencies - зависимости стадий графа, None -
+        каждая стадия зависит от предыдущей.
+        """
+        if source_hash is None:
+            return job_contexts
+
+        built: Dict[str, Optional[Dict[str, Any]]] = {}
+        for job in job_contexts:
+            fingerprint = job_fingerprint(job, source_hash)
+            self.fingerprints[job.job_name] = fingerprint
+            built[job.job_name] = self.registry.lookup(fingerprint, self.max_age_days)
+
+        if self.mode == "reuse":
+            return [
+                job if built[job.job_name] is None else job._replace(
+                    reuse_job_id=built[job.job_name]["job_id"],
+                    tags=self.reuse_tags or job.tags,
+                    # Исходники не нужны: задача только скачивает артефакты
+                    ci_variables={**job.ci_variables, "GIT_STRATEGY": "none"},
+                    deliver_target=None,
+                )
+                for job in job_contexts
+            ]
+
+        by_stage = group_by_stage(job_contexts)
+        present = [stage for stage in stages if stage in by_stage]
+        if dependencies is None:
+            dependencies = linear_dependencies(present)
+
+        # Стадии обходятся от последней: к задаче стадии уже известно, нужна ли
+        # она оставшимся задачам следующих стадий
+        required: Set[str] = set()
+        kept_names: Set[str] = set()
+        for stage in reversed(present):
+            for job in by_stage[stage]:
+                if built[job.job_name] is None or job.job_name in required:
+                    kept_names.add(job.job_name)
+                    required.update(predecessor_jobs(job, by_stage, present, dependencies))
+
+        if len(kept_names) == len(job_contexts):
+            return job_contexts
+        return restrict_needs([job for job in job_contexts if job.job_name in kept_names])
+
+    def rename_fingerprints(self, names: Iterable[Tuple[str, str]]) -> None:
+        """Переносит отпечатки на другие имена задач: пары (старое имя, новое имя)."""
+        for old_name, new_name in names:
+            fingerprint = self.fingerprints.pop(old_name, None)
+            if fingerprint is not None:
+                self.fingerprints[new_name] = fingerprint
+
+    def save_manifest(self, output_file: str) -> str:
+        """Сохраняет манифест отпечатков последней генерации."""
+        path = manifest_path(output_file)
+        with FileUtils.atomic_write(path) as f:
+            json.dump(self.fingerprints, f, indent=1, sort_keys=True)
+            f.write("\n")
+        return path
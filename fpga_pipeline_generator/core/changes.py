@@ -0,0 +1,104 @@
+"""
+Модуль определения измененных сабмодулей по истории git.
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..utils.discovery import SubmoduleEntry
+
+logger = logging.getLogger(__name__)
+
+
+def _git_lines(command: List[str], cwd: str) -> Optional[List[str]]:
+    """Запускает git и возвращает непустые строки вывода; None - ошибка."""
+    # subprocess нужен только в инкрементальном режиме
+    import subprocess
+
+    try:
+        completed = subprocess.run(
+            command, cwd=cwd, capture_output=True, text=True, check=False
+        )
+    except OSError as e:
+        logger.warning(f"Не удалось запустить git: {e}")
+        return None
+
+    if completed.returncode != 0:
+        logger.warning(
+            f"{' '.join(command[:2])} завершился с ошибкой: {completed.stderr.strip()}"
+        )
+        return None
+
+    return [line for line in completed.stdout.splitlines() if line]
+
+
+def git_changed_paths(ref: str, cwd: str = ".") -> Optional[List[str]]:
+    """
+    Возвращает пути (относительно cwd), измененные с момента ref.
+
+    Коммиты сравниваются с merge-base ref и HEAD (ref...HEAD, как в merge
+    request): коммиты, попавшие только в ref, изменениями не считаются. К ним
+    добавляются незакоммиченные правки относительно HEAD и неотслеживаемые
+    файлы (git diff их не показывает, а новый cfg.yaml может быть еще не
+    добавлен в индекс). Сдвиг SHA git-сабмодуля в суперпроекте попадает в
+    список как путь самого сабмодуля. Возвращает None, если git недоступен,
+    ref не найден или у ref и HEAD нет общего предка в клоне.
+    """
+    diff = ["git", "diff", "--name-only", "--no-renames", "--relative", "--ignore-submodules=dirty"]
+    changed: List[str] = []
+    for command in (
+        [*diff, f"{ref}...HEAD", "--"],
+        [*diff, "HEAD", "--"],
+        ["git", "ls-files", "--others", "--exclude-standard", "--"],
+    ):
+        lines = _git_lines(command, cwd)
+        if lines is None:
+            return None
+        changed.extend(lines)
+    return list(dict.fromkeys(changed))
+
+
+def find_changed_submodules(
+    submodules: Iterable[SubmoduleEntry], changed_paths: Iterable[str], cwd: str = "."
+) -> List[SubmoduleEntry]:
+    """Отбирает сабмодули, внутри которых есть измененные пути."""
+    base = os.path.abspath(cwd)
+    by_path = {}
+    for entry in submodules:
+        rel_path = os.path.relpath(os.path.abspath(entry.path), base).replace(os.sep, "/")
+        by_path[rel_path] = entry
+
+    changed = match_paths(by_path, changed_paths)
+    return [entry for path, entry in by_path.items() if path in changed]
+
+
+def match_paths(directories: Iterable[str], changed_paths: Iterable[str]) -> Set[str]:
+    """
+    Каталоги из directories, внутри которых есть измененные пути. Пути
+    каталогов и измененные пути должны быть заданы относительно одной базы.
+    """
+    known = set(directories)
+    changed = set()
+    for path in changed_paths:
+        # Поднимаемся по родительским каталогам, пока не встретим сабмодуль
+        candidate = path.rstrip("/")
+        while candidate:
+            if candidate in known:
+                changed.add(candidate)
+                break
+            candidate = candidate.rpartition("/")[0]
+    return changed
+
+
+def expand_dependents(changed: Set[str], dependents: Dict[str, List[str]]) -> Set[str]:
+    """Добавляет к измененным сабмодулям их зависимые (транзитивно)."""
+    result = set(changed)
+    queue = list(changed)
+    while queue:
+        name = queue.pop()
+        for dependent in dependents.get(name) or []:
+            if dependent not in result:
+                result.add(dependent)
+                queue.append(dependent)
+    return result
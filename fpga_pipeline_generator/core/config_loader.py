@@ -2,11 +2,17 @@
 Модуль для загрузки и обработки конфигурационных файлов.
 """
 
+import copy
+import logging
 import os
-import yaml
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from ..config.defaults import DEFAULT_CONFIG
+from ..utils import yaml_io
+
+logger = logging.getLogger(__name__)
+
 
 class ConfigLoader:
     """Класс для загрузки конфигурационных файлов."""
@@ -16,18 +22,12 @@ class ConfigLoader:
         self._load_default_config()
     
     def _load_default_config(self) -> None:
-        """Загружает конфигурацию по умолчанию."""
-        config_path = Path(__file__).parent.parent / "config" / "default.yaml"
-        
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self.default_config = yaml.safe_load(f)
-        except FileNotFoundError:
-            print(f"Файл конфигурации {config_path} не найден")
-            self.default_config = {}
-        except yaml.YAMLError as e:
-            print(f"Ошибка парсинга конфигурации: {e}")
-            self.default_config = {}
+        """
+        Загружает конфигурацию по умолчанию, скомпилированную из default.yaml
+        (config/defaults.py): разбирать YAML при каждом запуске не нужно.
+        """
+        # Копия: объединение конфигураций не должно менять общий словарь
+        self.default_config = copy.deepcopy(DEFAULT_CONFIG)
     
     def load_user_config(self, config_path: Optional[str] = None) -> Dict[str, Any]:
         """Загружает пользовательскую конфигурацию."""
@@ -35,41 +35,49 @@ class ConfigLoader:
             return {}
         
         if not os.path.exists(config_path):
-            print(f"Пользовательский конфиг {config_path} не найден")
+            logger.warning(f"Пользовательский конфиг {config_path} не найден")
             return {}
         
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
-        except yaml.YAMLError as e:
-            print(f"Ошибка парсинга пользовательского конфига: {e}")
+            return yaml_io.load_file(config_path)
+        except yaml_io.YAMLError as e:
+            logger.warning(f"Ошибка парсинга пользовательского конфига: {e}")
             return {}
     
+    @staticmethod
+    def deep_merge(default: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, Any]:
+        """Рекурсивно объединяет словари."""
+        result = default.copy()
+
+        for key, value in user.items():
+            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
+                result[key] = ConfigLoader.deep_merge(result[key], value)
+            else:
+                result[key] = value
+
+        return result
+
     def merge_configs(self, user_config: Dict[str, Any]) -> Dict[str, Any]:
         """Объединяет конфигурацию по умолчанию с пользовательской."""
         if not self.default_config:
             return user_config
         
-        merged = self.default_config.copy()
-        
-        def deep_merge(default: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, Any]:
-            """Рекурсивно объединяет словари."""
-            result = default.copy()
-            
-            for key, value in user.items():
-                if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                    result[key] = deep_merge(result[key], value)
-                else:
-                    result[key] = value
-            
-            return result
-        
-        return deep_merge(merged, user_config)
+        return self.deep_merge(self.default_config, user_config)
     
-    def get_config(self, user_config_path: Optional[str] = None) -> Dict[str, Any]:
-        """Получает итоговую конфигурацию."""
+    def get_config(
+        self,
+        user_config_path: Optional[str] = None,
+        overrides: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Получает итоговую конфигурацию.
+        overrides (например, аргументы командной строки) имеют наивысший приоритет.
+        """
         user_config = self.load_user_config(user_config_path)
-        return self.merge_configs(user_config)
+        config = self.merge_configs(user_config)
+        if overrides:
+            config = self.deep_merge(config, overrides)
+        return config
     
     def get_stage_config(self, stage: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Получает конфигурацию для конкретной стадии."""
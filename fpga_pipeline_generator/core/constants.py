@@ -0,0 +1,27 @@
+"""
+Допустимые значения параметров командной строки и конфигурации.
+
+Модуль не импортирует ничего тяжелого, поэтому разбор аргументов (--help,
+--version) не загружает генератор целиком.
+"""
+
+# Режимы парсинга сабмодулей
+PARSE_MODES = ("serial", "thread", "process")
+
+# Форматы вывода; jinja - рендеринг через шаблоны job.j2/pipeline.j2
+OUTPUT_FORMATS = ("jinja", "yaml", "json")
+
+# Способы разбиения: по сабмодулям, по стадиям или по числу задач
+SHARD_MODES = ("submodule", "stage", "count")
+
+# Способы ожидания изменений: inotify (Linux) или опрос mtime
+WATCH_BACKENDS = ("auto", "inotify", "poll")
+
+# Форматы отчета: сводка или Chrome trace-event (chrome://tracing, Perfetto)
+PROFILE_FORMATS = ("json", "chrome")
+
+# Отпечаток cfg.yaml для кэша пайплайнов: хэш содержимого или размер и mtime
+FINGERPRINT_MODES = ("content", "mtime")
+
+# Пропуск уже собранных задач: выключен, не выводить или скачивать артефакты
+BUILD_AVOIDANCE_MODES = ("off", "omit", "reuse")
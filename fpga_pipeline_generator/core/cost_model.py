@@ -0,0 +1,217 @@
+"""
+Модуль модели стоимости задач по истории длительностей.
+
+История - JSON файл с последними успешными запусками каждой задачи, который
+пополняется выгрузками задач GitLab (GET /projects/:id/pipelines/:id/jobs).
+Оценка задачи - медиана ее последних длительностей, для задачи без истории -
+медиана оценок задач той же стадии. По оценке задачи стадии упорядочиваются
+(самые долгие первыми) и относятся к классам стоимости со своими тегами
+раннеров, resource_group и interruptible.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .model import JobSpec
+from ..utils.file_utils import FileUtils
+
+logger = logging.getLogger(__name__)
+
+
+def median(values: Iterable[float]) -> float:
+    """Медиана непустой последовательности."""
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class CostClass(NamedTuple):
+    """Класс стоимости: задачи с оценкой от min_seconds."""
+
+    name: str
+    min_seconds: float
+    # Стадии, к задачам которых применяется класс (пусто - все)
+    stages: Tuple[str, ...] = ()
+    # Теги раннеров вместо тегов стадии (None - теги стадии)
+    tags: Optional[List[str]] = None
+    # Шаблон resource_group: {stage}, {target}, {submodule}
+    resource_group: Optional[str] = None
+    interruptible: Optional[bool] = None
+
+
+def load_classes(classes_config: List[Dict[str, Any]]) -> List[CostClass]:
+    """Классы стоимости из конфигурации, от самого дорогого к самому дешевому."""
+    classes = []
+    for spec in classes_config or []:
+        if not isinstance(spec, dict) or not spec.get("name"):
+            raise ValueError(f"Неверный класс стоимости {spec!r}: нужен ключ name")
+        tags = spec.get("tags")
+        classes.append(CostClass(
+            name=str(spec["name"]),
+            min_seconds=float(spec.get("min_seconds", 0)),
+            stages=tuple(spec.get("stages") or ()),
+            tags=list(tags) if tags else None,
+            resource_group=spec.get("resource_group"),
+            interruptible=spec.get("interruptible"),
+        ))
+    classes.sort(key=lambda cost_class: cost_class.min_seconds, reverse=True)
+    return classes
+
+
+def read_gitlab_export(path: str) -> List[Dict[str, Any]]:
+    """
+    Читает выгрузку задач GitLab: JSON список задач (ответ API) или объект
+    с ключом jobs.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs", [])
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: ожидается список задач GitLab")
+    return [record for record in data if isinstance(record, dict)]
+
+
+class JobHistory:
+    """
+    История длительностей задач.
+
+    Для задачи хранятся пары [id задачи GitLab, длительность] последних window
+    успешных запусков; по id повторный импорт той же выгрузки не учитывается.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, window: int = 10):
+        self.path = path
+        self.window = max(1, window)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> "JobHistory":
+        """Загружает историю с диска; отсутствующий файл - пустая история."""
+        if not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"История задач {self.path} не прочитана и не используется: {e}")
+            return self
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            logger.warning(f"Формат истории задач {self.path} не поддерживается, она не используется")
+            return self
+        self.jobs = data.get("jobs", {})
+        return self
+
+    def save(self) -> None:
+        """Атомарно сохраняет историю."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with FileUtils.atomic_write(self.path) as f:
+            json.dump(
+                {"version": self.VERSION, "jobs": self.jobs},
+                f,
+                ensure_ascii=False,
+                indent=1,
+                sort_keys=True,
+            )
+            f.write("\n")
+
+    def add(self, name: str, stage: str, job_id: Any, duration: float) -> bool:
+        """Добавляет запуск задачи; False - запуск уже есть в истории."""
+        entry = self.jobs.setdefault(name, {"stage": stage, "runs": []})
+        runs = entry["runs"]
+        if job_id is not None and any(run[0] == job_id for run in runs):
+            return False
+        entry["stage"] = stage
+        runs.append([job_id, round(float(duration), 1)])
+        del runs[:-self.window]
+        return True
+
+    def import_gitlab(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Добавляет успешные задачи из выгрузки GitLab и возвращает число
+        добавленных запусков. Запуски добавляются в порядке id, чтобы в окне
+        остались самые новые.
+        """
+        records = [
+            record for record in records
+            if record.get("status") == "success"
+            and record.get("duration")
+            and record.get("name")
+        ]
+        records.sort(key=lambda record: record.get("id") or 0)
+        return sum(
+            self.add(record["name"], record.get("stage", ""), record.get("id"), record["duration"])
+            for record in records
+        )
+
+    def job_estimates(self) -> Dict[str, Tuple[str, float]]:
+        """Оценки задач: имя -> (стадия, медиана длительностей)."""
+        return {
+            name: (entry.get("stage", ""), median(run[1] for run in entry["runs"]))
+            for name, entry in self.jobs.items()
+            if entry.get("runs")
+        }
+
+
+class CostModel:
+    """Оценка стоимости задач и назначение классов стоимости."""
+
+    def __init__(self, history: JobHistory, classes: List[CostClass], order: bool = True):
+        self.history = history
+        self.classes = classes
+        self.order = order
+        self.estimates = history.job_estimates()
+        stage_costs: Dict[str, List[float]] = {}
+        for stage, cost in self.estimates.values():
+            stage_costs.setdefault(stage, []).append(cost)
+        self.stage_estimates = {stage: median(costs) for stage, costs in stage_costs.items()}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["CostModel"]:
+        """Модель по секции cost_model; None - модель выключена."""
+        cost_config = config.get("cost_model", {})
+        if not cost_config.get("enabled", False):
+            return None
+        history = JobHistory(
+            cost_config.get("history", ".fpga_job_history.json"),
+            cost_config.get("window", 10),
+        ).load()
+        return cls(history, load_classes(cost_config.get("classes")), cost_config.get("order", True))
+
+    def estimate(self, job_name: str, stage: str) -> Optional[float]:
+        """Оценка длительности задачи в секундах; None - оценить не по чему."""
+        known = self.estimates.get(job_name)
+        if known is not None:
+            return known[1]
+        return self.stage_estimates.get(stage)
+
+    def classify(self, stage: str, cost: Optional[float]) -> Optional[CostClass]:
+        """Самый дорогой класс, порог которого не больше оценки."""
+        if cost is None:
+            return None
+        for cost_class in self.classes:
+            if cost >= cost_class.min_seconds and (
+                not cost_class.stages or stage in cost_class.stages
+            ):
+                return cost_class
+        return None
+
+    def sort(self, job_contexts: List[JobSpec], stages: List[str]) -> List[JobSpec]:
+        """
+        Упорядочивает задачи: по стадиям, внутри стадии - от самой долгой.
+        Задачи без оценки идут последними, равные сохраняют исходный порядок.
+        """
+        position = {stage: index for index, stage in enumerate(stages)}
+        return sorted(
+            job_contexts,
+            key=lambda job: (
+                position.get(job.stage, len(position)),
+                -(job.cost if job.cost is not None else -1.0),
+            ),
+        )
@@ -0,0 +1,148 @@
+"""
+Модуль построения графа зависимостей задач (needs) вместо барьеров стадий.
+"""
+
+from typing import Dict, List, Optional, Set
+
+from .model import JobSpec
+
+
+def topological_order(stages: List[str], dependencies: Dict[str, List[str]]) -> List[str]:
+    """
+    Упорядочивает стадии так, чтобы каждая шла после своих зависимостей.
+
+    Используется алгоритм Кана; при равенстве сохраняется исходный порядок
+    stages. Зависимости от стадий вне stages игнорируются. При цикле
+    выбрасывается ValueError со стадиями, образующими цикл.
+    """
+    stage_set = set(stages)
+    pending = {
+        stage: {dep for dep in dependencies.get(stage) or [] if dep in stage_set}
+        for stage in stages
+    }
+
+    order: List[str] = []
+    while pending:
+        ready = [stage for stage in stages if stage in pending and not pending[stage]]
+        if not ready:
+            raise ValueError(
+                f"Циклическая зависимость между стадиями: {sorted(_cycle_stages(pending))}"
+            )
+        for stage in ready:
+            del pending[stage]
+            order.append(stage)
+        for deps in pending.values():
+            deps.difference_update(ready)
+    return order
+
+
+def _cycle_stages(pending: Dict[str, Set[str]]) -> Set[str]:
+    """Отбрасывает стадии, которые только зависят от цикла, но в него не входят."""
+    cycle = set(pending)
+    while True:
+        required = set().union(*(pending[stage] for stage in cycle))
+        if required >= cycle:
+            return cycle
+        cycle &= required
+
+
+def nearest_predecessors(
+    stage: str, stages: List[str], dependencies: Dict[str, List[str]]
+) -> List[str]:
+    """
+    Возвращает ближайшие стадии-предшественники из stages.
+
+    Если зависимости нет в stages (она не генерируется или в ней нет задач),
+    вместо нее берутся ее собственные зависимости.
+    """
+    result: List[str] = []
+    seen = set()
+    queue = list(dependencies.get(stage) or [])
+    while queue:
+        dep = queue.pop(0)
+        if dep in seen:
+            continue
+        seen.add(dep)
+        if dep in stages:
+            result.append(dep)
+        else:
+            queue.extend(dependencies.get(dep) or [])
+    return result
+
+
+def linear_dependencies(stages: List[str]) -> Dict[str, List[str]]:
+    """Зависимости стадий без графа: каждая стадия ждет предыдущую."""
+    return {stage: [previous] for previous, stage in zip(stages, stages[1:])}
+
+
+def group_by_stage(job_contexts: List[JobSpec]) -> Dict[str, List[JobSpec]]:
+    """Задачи по стадиям с сохранением порядка."""
+    by_stage: Dict[str, List[JobSpec]] = {}
+    for job_context in job_contexts:
+        by_stage.setdefault(job_context.stage, []).append(job_context)
+    return by_stage
+
+
+def predecessor_jobs(
+    job_context: JobSpec,
+    by_stage: Dict[str, List[JobSpec]],
+    present: List[str],
+    dependencies: Dict[str, List[str]],
+) -> List[str]:
+    """
+    Имена задач сабмодуля, от которых зависит задача: в каждой ближайшей
+    стадии-предшественнике - задача с тем же именем цели, а если такой нет -
+    все задачи этой стадии.
+    """
+    needs: List[str] = []
+    for dep in nearest_predecessors(job_context.stage, present, dependencies):
+        candidates = by_stage[dep]
+        same_target = [c for c in candidates if c.target.name == job_context.target.name]
+        needs.extend(c.job_name for c in same_target or candidates)
+    return needs
+
+
+def assign_needs(
+    job_contexts: List[JobSpec],
+    stages: List[str],
+    dependencies: Dict[str, List[str]],
+    max_needs: Optional[int] = 50,
+) -> List[JobSpec]:
+    """
+    Возвращает задачи одного сабмодуля с заполненным полем needs.
+
+    Задача зависит от задачи с тем же именем цели в стадии-предшественнике, а
+    если такой нет - от всех задач этой стадии в сабмодуле. Стадии без задач
+    в сабмодуле пропускаются в пользу их предшественников. Задачи без
+    предшественников получают needs: [] и стартуют сразу. Если зависимостей
+    больше max_needs (ограничение GitLab), needs не задается и задача ждет
+    завершения предыдущих стадий.
+    """
+    by_stage = group_by_stage(job_contexts)
+    present = [stage for stage in stages if stage in by_stage]
+
+    result = []
+    for job_context in job_contexts:
+        needs = predecessor_jobs(job_context, by_stage, present, dependencies)
+        if max_needs is not None and len(needs) > max_needs:
+            result.append(job_context._replace(needs=None))
+        else:
+            result.append(job_context._replace(needs=tuple(needs)))
+    return result
+
+
+def restrict_needs(job_contexts: List[JobSpec]) -> List[JobSpec]:
+    """
+    Ограничивает needs задачами из того же списка (части дочернего пайплайна).
+
+    Ссылаться на задачи другого дочернего пайплайна нельзя, поэтому у задачи с
+    такой зависимостью needs убирается, и она ждет завершения предыдущих стадий.
+    """
+    names = {job_context.job_name for job_context in job_contexts}
+    restricted = []
+    for job_context in job_contexts:
+        needs = job_context.needs
+        if needs and not names.issuperset(needs):
+            job_context = job_context._replace(needs=None)
+        restricted.append(job_context)
+    return restricted
@@ -0,0 +1,214 @@
+"""
+Прямая сериализация пайплайна в YAML или JSON без шаблонов.
+"""
+
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
+
+from .constants import OUTPUT_FORMATS
+from .model import Job
+
+# Ключи, которые можно записать без кавычек
+_PLAIN_KEY = re.compile(r"^\.?[A-Za-z_][A-Za-z0-9_.-]*$")
+# Символы, которые нужно экранировать в строке в кавычках
+_NEEDS_ESCAPE = re.compile(r'[\x00-\x1f"\\\x7f-\x9f\u2028\u2029\ud800-\udfff\ufffe\uffff]')
+# Символы, которые json.dumps(ensure_ascii=False) оставляет как есть, а YAML не
+# допускает в потоке (DEL, C1, суррогаты) или читает как перевод строки (NEL, LS, PS)
+_JSON_UNESCAPED = re.compile(r"[\x7f-\x9f\u2028\u2029\ud800-\udfff\ufffe\uffff]")
+# Ключи задачи, общие для всех задач стадии (выносятся в .fpga_<стадия>_base)
+STAGE_BASE_KEYS = ("stage", "variables", "tags", "rules")
+# Ключи задачи, общие для всех задач сабмодуля (выносятся в .fpga_<сабмодуль>_artifacts)
+SUBMODULE_BASE_KEYS = ("artifacts",)
+# Слова, которые YAML 1.1 читает как bool/null
+_RESERVED_WORDS = {
+    "y", "n", "yes", "no", "on", "off", "true", "false", "null", "none", "~",
+    ".inf", ".nan",
+}
+
+
+def _quote(value: str) -> str:
+    """
+    Строка в двойных кавычках. Экранирование JSON корректно для YAML
+    double-quoted scalar; символы, которые JSON пропускает, пишутся как \\uXXXX.
+    """
+    quoted = json.dumps(value, ensure_ascii=False)
+    return _JSON_UNESCAPED.sub(lambda match: f"\\u{ord(match.group()):04x}", quoted)
+
+
+@lru_cache(maxsize=4096)
+def _yaml_key(key: str) -> str:
+    """Форматирует ключ отображения."""
+    if _PLAIN_KEY.match(key) and key.lower() not in _RESERVED_WORDS:
+        return key
+    return _quote(key)
+
+
+def _yaml_scalar(value: Any) -> str:
+    """
+    Форматирует скаляр или пустую коллекцию. Строки записываются в двойных
+    кавычках (см. _quote), бесконечности и NaN - в записи YAML.
+    """
+    if isinstance(value, str):
+        if _NEEDS_ESCAPE.search(value) is None:
+            return f'"{value}"'
+        return _quote(value)
+    if isinstance(value, dict):
+        return "{}"
+    if isinstance(value, list):
+        return "[]"
+    if isinstance(value, float) and not math.isfinite(value):
+        # json.dumps пишет Infinity/NaN, а в YAML это строки
+        if math.isnan(value):
+            return ".nan"
+        return ".inf" if value > 0 else "-.inf"
+    return json.dumps(value)
+
+
+def _write_yaml(value: Any, indent: str, out: List[str]) -> None:
+    """Записывает словарь или список в блочном стиле YAML."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if item and isinstance(item, (dict, list)):
+                out.append(f"{indent}{_yaml_key(str(key))}:\n")
+                _write_yaml(item, indent + "  ", out)
+            else:
+                out.append(f"{indent}{_yaml_key(str(key))}: {_yaml_scalar(item)}\n")
+        return
+
+    for item in value:
+        if item and isinstance(item, dict):
+            # Первый ключ элемента списка пишется в строке с "- "
+            start = len(out)
+            _write_yaml(item, indent + "  ", out)
+            out[start] = f"{indent}- {out[start][len(indent) + 2:]}"
+        elif item and isinstance(item, list):
+            out.append(f"{indent}-\n")
+            _write_yaml(item, indent + "  ", out)
+        else:
+            out.append(f"{indent}- {_yaml_scalar(item)}\n")
+
+
+def template_filters() -> Dict[str, Callable[[Any], str]]:
+    """
+    Фильтры Jinja2 для шаблонов задач: ключи и строки экранируются так же, как
+    в dump_yaml. Нестроковые значения выводятся строками, как прежде в кавычках.
+    """
+    return {
+        "yaml_key": lambda key: _yaml_key(str(key)),
+        "yaml_quote": lambda value: _yaml_scalar(str(value)),
+    }
+
+
+def dump_yaml(data: Dict[str, Any]) -> str:
+    """Сериализует словарь в блочный YAML."""
+    out: List[str] = []
+    _write_yaml(data, "", out)
+    return "".join(out)
+
+
+class PipelineEmitter:
+    """Сериализует список задач в документ GitLab CI."""
+
+    def __init__(self, output_format: str = "yaml", extends: bool = False):
+        if output_format not in ("yaml", "json"):
+            raise ValueError(f"Формат '{output_format}' не поддерживается эмиттером")
+        self.output_format = output_format
+        self.extends = extends
+
+    def iter_entries(self, jobs: Iterable[Job]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Возвращает пары (имя, описание) задач пайплайна.
+
+        В режиме extends общие части задач выносятся в скрытые базовые задачи,
+        которые выводятся перед первой использующей их задачей. Задача, чья
+        общая часть отличается от уже выведенной базы, остается полной, поэтому
+        после раскрытия extends результат совпадает с обычным выводом.
+        """
+        if not self.extends:
+            for job in jobs:
+                yield job.name, job.to_dict()
+            return
+
+        bases: Dict[str, Dict[str, Any]] = {}
+        for job in jobs:
+            job_dict = job.to_dict()
+            parents = []
+            for base_name, keys in (
+                (f".fpga_{job.stage}_base", STAGE_BASE_KEYS),
+                (f".fpga_{job.submodule}_artifacts", SUBMODULE_BASE_KEYS),
+            ):
+                base = {key: job_dict[key] for key in keys if key in job_dict}
+                if not base:
+                    continue
+                known = bases.get(base_name)
+                if known is None:
+                    bases[base_name] = base
+                    yield base_name, base
+                elif known != base:
+                    continue
+                parents.append(base_name)
+                for key in base:
+                    del job_dict[key]
+
+            if parents:
+                job_dict = {"extends": parents[0] if len(parents) == 1 else parents, **job_dict}
+            yield job.name, job_dict
+
+    def build_document(
+        self,
+        stages: List[str],
+        jobs: Iterable[Job],
+        variables: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Собирает пайплайн в виде словаря."""
+        document: Dict[str, Any] = {"stages": list(stages)}
+        if variables:
+            document["variables"] = variables
+        for name, job_dict in self.iter_entries(jobs):
+            document[name] = job_dict
+        return document
+
+    def emit(
+        self,
+        stages: List[str],
+        jobs: Iterable[Job],
+        variables: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Сериализует пайплайн целиком."""
+        return "".join(self.iter_chunks(stages, jobs, variables))
+
+    def iter_chunks(
+        self,
+        stages: List[str],
+        jobs: Iterable[Job],
+        variables: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Лениво сериализует пайплайн по одной задаче."""
+        yield self.header_chunk(stages, variables)
+        for name, job_dict in self.iter_entries(jobs):
+            yield self.entry_chunk(name, job_dict)
+        yield self.footer_chunk()
+
+    def header_chunk(
+        self, stages: List[str], variables: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Начало документа: стадии и глобальные переменные."""
+        header = self.build_document(stages, (), variables)
+        if self.output_format == "json":
+            # Без indent работает C-реализация json; одна задача на строку
+            return json.dumps(header, ensure_ascii=False)[:-1]
+        return dump_yaml(header)
+
+    def entry_chunk(self, name: str, job_dict: Dict[str, Any]) -> str:
+        """Одна задача (или базовая задача) документа."""
+        if self.output_format == "json":
+            body = json.dumps(job_dict, ensure_ascii=False)
+            return f",\n{json.dumps(name)}: {body}"
+        return "\n" + dump_yaml({name: job_dict})
+
+    def footer_chunk(self) -> str:
+        """Конец документа."""
+        return "\n}\n" if self.output_format == "json" else ""
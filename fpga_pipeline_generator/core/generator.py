@@ -2,170 +2,464 @@
 Основной модуль генерации пайплайнов.
 """
 
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import json
+import logging
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Any, Optional, TextIO, Tuple
+)
 
 # Отключаем Jinja2 по умолчанию для корректного YAML форматирования
 JINJA2_AVAILABLE = False
 
+from .build_avoidance import BuildAvoidance, git_tree_hashes, source_hashes
+from .changes import expand_dependents, find_changed_submodules, git_changed_paths
 from .config_loader import ConfigLoader
+from .cost_model import CostModel
+from .dag import assign_needs, restrict_needs, topological_order
+from .matrix import collapse_matrix, matrix_instance_names
+from .emitter import OUTPUT_FORMATS, PipelineEmitter, dump_yaml, template_filters
+from .model import Job, JobSpec, JobTemplateVars, Target
+from .parse_cache import ParseCache
 from .parser import ConfigParser
-from jinja2 import Environment, FileSystemLoader
+from .profiler import NullProfiler, Profiler
+from .profiles import StageProfile
+from .run_cache import RunCache
+from .selection import Selection, TargetIndex
+from .validation import Problem, find_job_collisions, validate_files
+from .sharding import Shard, build_trigger_manifest, shard_file_path, split_jobs
+from ..utils.discovery import SubmoduleEntry
+from ..utils.file_utils import FileUtils
 import os
 
+if TYPE_CHECKING:
+    from jinja2 import Environment, FileSystemBytecodeCache, Template
+
+logger = logging.getLogger(__name__)
+
+# Имя задачи-заглушки пайплайна без целей
+EMPTY_PIPELINE_JOB = "fpga_no_changes"
+
 
 class FPGAPipelineGenerator:
     """Основной класс для генерации FPGA пайплайнов."""
 
-    def __init__(self, user_config_path: Optional[str] = None):
-        self.config_loader = ConfigLoader()
-        self.config = self.config_loader.get_config(user_config_path)
+    def __init__(
+        self,
+        user_config_path: Optional[str] = None,
+        overrides: Optional[Dict[str, Any]] = None,
+        profiler: Optional[Profiler] = None,
+        stages: Optional[List[str]] = None,
+        parse_cache: Optional[ParseCache] = None,
+    ):
+        # Стадии, заданные явно (--stages); None - берутся из FPGA_TARGET_ARTIFACT
+        self.requested_stages = stages
+        # Без --profile используется заглушка, замеры ничего не стоят
+        self.profiler = profiler or NullProfiler()
+        with self.profiler.phase("config"):
+            self.config_loader = ConfigLoader()
+            self.config = self.config_loader.get_config(user_config_path, overrides)
 
         # Получаем настройки из конфигурации
         file_search_config = self.config.get("file_search", {})
         fpga_dir = file_search_config.get("fpga_dir", "fpga")
         config_filename = file_search_config.get("config_filename", "cfg.yaml")
+        parse_mode = file_search_config.get("parallel", "serial")
+        workers = file_search_config.get("workers")
+
+        cache_config = self.config.get("cache", {})
+        # Кэш парсинга может быть общим для нескольких генераторов (api.generate)
+        if parse_cache is None and cache_config.get("enabled", False):
+            parse_cache = ParseCache(cache_config.get("dir", ".fpga_pipeline_cache"))
+        # Кэш готовых пайплайнов работает независимо от кэша парсинга
+        self.run_cache = None
+        if cache_config.get("outputs", False):
+            self.run_cache = RunCache(
+                cache_config.get("dir", ".fpga_pipeline_cache"),
+                cache_config.get("fingerprint", "content"),
+                cache_config.get("max_outputs", 16),
+            )
+
+        self.parser = ConfigParser(
+            fpga_dir,
+            config_filename,
+            parse_mode,
+            workers,
+            parse_cache,
+            max_depth=file_search_config.get("max_depth", 1),
+            exclude=file_search_config.get("exclude") or (),
+        )
+
+        # Отбор целей селекторами --only/--skip; ошибки в селекторах видны сразу
+        selection_config = self.config.get("selection", {})
+        self.selection = Selection(
+            selection_config.get("only") or (), selection_config.get("skip") or ()
+        )
+
+        # Модель стоимости задач по истории длительностей; None - выключена
+        self.cost_model = CostModel.from_config(self.config)
+
+        # Пропуск задач с уже собранными отпечатками; None - выключен
+        self.build_avoidance = BuildAvoidance.from_config(self.config)
+        # Хэши исходников сабмодулей вычисляются один раз за запуск (см. submodule_source_hashes)
+        self._source_hashes: Optional[Dict[str, str]] = None
+
+        # Граф зависимостей задач (needs); None - порядок задается только стадиями
+        dag_config = self.config.get("dag", {})
+        self.stage_dependencies = None
+        self.max_needs = dag_config.get("max_needs", 50)
+        if dag_config.get("enabled", False):
+            self.stage_dependencies = dag_config.get("stage_dependencies") or {}
+            # Проверяем конфигурацию на циклы сразу, а не при генерации
+            topological_order(list(self.stage_dependencies), self.stage_dependencies)
 
-        self.parser = ConfigParser(fpga_dir, config_filename)
         # Инициализация Jinja2 с абсолютным путем к шаблонам
         template_dir = os.path.abspath(
             os.path.join(os.path.dirname(__file__), "..", "templates")
         )
-        self.jinja_env = Environment(
-            loader=FileSystemLoader(template_dir),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
+        # Пути к шаблонам берутся из секции templates конфигурации
+        self.template_paths = {
+            name: self.config_loader.get_template_path(name, self.config)
+            for name in ("pipeline", "job")
+        }
+        search_path = []
+        for template_path in self.template_paths.values():
+            if str(template_path.parent) not in search_path:
+                search_path.append(str(template_path.parent))
+        if template_dir not in search_path:
+            search_path.append(template_dir)
+        self.template_search_path = search_path
+
+        # Окружение Jinja2 создается при первом рендеринге шаблона:
+        # форматам yaml и json jinja2 не нужен
+        self._jinja_env: Optional["Environment"] = None
+        self._templates: Dict[str, "Template"] = {}
+        self._paths_cache: Dict[Tuple[str, str], Tuple[str, Tuple[str, ...]]] = {}
+        self._artifacts_cache: Dict[str, Dict[str, Any]] = {}
+
+        output_config = self.config.get("output", {})
+        self.output_format = output_config.get("format", "jinja")
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Неизвестный формат вывода '{self.output_format}'. "
+                f"Допустимые: {list(OUTPUT_FORMATS)}"
+            )
+        extends = output_config.get("extends", False)
+        if extends and self.output_format == "jinja":
+            # Базовые задачи строятся по модели задач, шаблоны job.j2 их не поддерживают
+            logger.warning("Режим extends не поддерживается шаблонами, используется формат yaml")
+            self.output_format = "yaml"
+        # Объединение целей в задачи с parallel: matrix
+        self.matrix = output_config.get("matrix", False)
+        if self.matrix and self.stage_dependencies is not None:
+            # needs ссылаются на задачи отдельных целей
+            logger.warning("Режим matrix не совмещается с графом зависимостей (dag), отключен")
+            self.matrix = False
+        if self.matrix and self.output_format == "jinja":
+            logger.warning("Режим matrix не поддерживается шаблонами, используется формат yaml")
+            self.output_format = "yaml"
+        self.emitter = None
+        if self.output_format != "jinja":
+            self.emitter = PipelineEmitter(self.output_format, extends)
+
+    @property
+    def jinja_env(self) -> "Environment":
+        """Окружение Jinja2; jinja2 импортируется при первом обращении."""
+        if self._jinja_env is None:
+            from jinja2 import Environment, FileSystemLoader
+
+            jinja_env = Environment(
+                loader=FileSystemLoader(self.template_search_path),
+                trim_blocks=True,
+                lstrip_blocks=True,
+                # Шаблоны компилируются один раз за запуск, перечитывать их не нужно
+                auto_reload=False,
+                bytecode_cache=self._create_bytecode_cache(),
+            )
+            # Добавляем пользовательские фильтры для работы с путями
+            jinja_env.filters["dirname"] = lambda path: os.path.dirname(path)
+            jinja_env.filters["basename"] = lambda path: os.path.basename(path)
+            # Экранирование значений, как при прямой сериализации (emitter)
+            jinja_env.filters.update(template_filters())
+            self._jinja_env = jinja_env
+        return self._jinja_env
+
+    def _create_bytecode_cache(self) -> Optional["FileSystemBytecodeCache"]:
+        """Создает кэш байткода шаблонов, если он включен в конфигурации."""
+        templates_config = self.config.get("templates", {})
+        cache_dir = templates_config.get("bytecode_cache_dir")
+        if not cache_dir:
+            cache_config = self.config.get("cache", {})
+            if not cache_config.get("enabled", False):
+                return None
+            cache_dir = os.path.join(cache_config.get("dir", ".fpga_pipeline_cache"), "jinja")
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Кэш шаблонов отключен, не удалось создать {cache_dir}: {e}")
+            return None
+
+        from jinja2 import FileSystemBytecodeCache
+
+        return FileSystemBytecodeCache(cache_dir)
+
+    def get_template(self, name: str) -> "Template":
+        """Возвращает скомпилированный шаблон (pipeline или job), загружая его один раз."""
+        template = self._templates.get(name)
+        if template is None:
+            from jinja2 import FileSystemLoader
 
-        # Добавляем пользовательские фильтры для работы с путями
-        self.jinja_env.filters["dirname"] = lambda path: os.path.dirname(path)
-        self.jinja_env.filters["basename"] = lambda path: os.path.basename(path)
+            # Шаблон ищется сначала в своем каталоге: у шаблона из конфигурации может
+            # быть то же имя файла, что у встроенного (include - из общего пути поиска)
+            template_path = self.template_paths[name]
+            loader = FileSystemLoader([str(template_path.parent), *self.template_search_path])
+            template = self.jinja_env.overlay(loader=loader).get_template(template_path.name)
+            self._templates[name] = template
+        return template
 
     def get_target_stages(self) -> List[str]:
-        """Получает целевые стадии из переменной окружения."""
-        stages = self.parser.get_environment_artifacts()
+        """Получает целевые стадии: заданные явно или из переменной окружения."""
+        stages = self.requested_stages or self.parser.get_environment_artifacts()
         if not stages:
-            print("Переменная окружения FPGA_TARGET_ARTIFACT не установлена")
+            logger.error("Переменная окружения FPGA_TARGET_ARTIFACT не установлена")
             return []
+        return self.resolve_stages(stages)
 
+    def resolve_stages(self, stages: List[str]) -> List[str]:
+        """Отбрасывает неподдерживаемые стадии и упорядочивает остальные."""
         supported_stages = self.config_loader.get_supported_stages(self.config)
-        return self.parser.validate_stages(stages, supported_stages)
+        stages = self.parser.validate_stages(stages, supported_stages)
+        if self.stage_dependencies is not None:
+            stages = topological_order(stages, self.stage_dependencies)
+        return stages
 
     def generate_job_name(self, stage: str, target: str, submodule: str) -> str:
         """Генерирует имя задачи."""
         return f"{stage}_{target}_{submodule}"
 
+    def _stage_artifacts(self, stage: str) -> Dict[str, Any]:
+        """
+        Настройки артефактов стадии: job_defaults.artifacts, ключи которых
+        (paths, expire_in, when) переопределяются секцией artifacts стадии.
+        """
+        artifacts = self._artifacts_cache.get(stage)
+        if artifacts is None:
+            stage_config = self.config_loader.get_stage_config(stage, self.config)
+            artifacts = self._artifacts_cache[stage] = {
+                **self.config.get("job_defaults", {}).get("artifacts", {}),
+                **(stage_config.get("artifacts") or {}),
+            }
+        return artifacts
+
+    def _submodule_paths(self, submodule_path: str, stage: str) -> Tuple[str, Tuple[str, ...]]:
+        """Путь к Makefile и пути артефактов стадии сабмодуля (общие для ее задач)."""
+        key = (submodule_path, stage)
+        paths = self._paths_cache.get(key)
+        if paths is None:
+            default_vars = self.config.get("default_variables", {})
+
+            # Формируем путь к Makefile относительно сабмодуля
+            makefile_path = os.path.join(
+                submodule_path, default_vars.get("MAKEFILE_PATH", "Makefile")
+            )
+            submodule_dir = os.path.dirname(makefile_path)
+            artifact_paths = tuple(
+                f"{submodule_dir}/{path}".replace("{stage}", stage)
+                for path in self._stage_artifacts(stage).get("paths") or []
+            )
+            paths = self._paths_cache[key] = (makefile_path, artifact_paths)
+        return paths
+
+    def _target_artifact_paths(
+        self,
+        stage_paths: Tuple[str, ...],
+        makefile_path: str,
+        stage: str,
+        target: Target,
+        submodule: str,
+    ) -> Tuple[str, ...]:
+        """
+        Пути артефактов задачи: пути стадии и цели с подстановкой {stage},
+        {target} и {submodule}. Без путей цели и подстановок - общие пути стадии.
+        """
+        if not target.artifacts and not any("{" in path for path in stage_paths):
+            return stage_paths
+        submodule_dir = os.path.dirname(makefile_path)
+        paths = [*stage_paths, *(f"{submodule_dir}/{path}" for path in target.artifacts)]
+        return tuple(dict.fromkeys(
+            path.replace("{target}", target.name)
+            .replace("{submodule}", submodule)
+            .replace("{stage}", stage)
+            for path in paths
+        ))
+
     def prepare_job_context(
         self,
         stage: str,
-        target_config: Dict[str, Any],
+        target: Target,
         submodule: str,
         submodule_path: str,
-    ) -> Dict[str, Any]:
-        """Подготавливает контекст для генерации задачи."""
+    ) -> JobSpec:
+        """
+        Подготавливает описание задачи. Производные строки (make_args,
+        variables_cli и т.д.) вычисляются JobSpec при обращении.
+        """
         stage_config = self.config_loader.get_stage_config(stage, self.config)
-        default_vars = self.config.get("default_variables", {})
-        default_rules = self.config.get("default_rules", [])
-
-        target_name = target_config["target"]
-        target_vars = target_config["variables"]
-        target_options = target_config["options"]
-
-        # Формируем аргументы для make
-        make_args = ""
-        if target_vars:
-            for var_name, var_value in target_vars.items():
-                make_args += f" {var_name}={var_value}"
-
-        if target_options:
-            make_args += " " + " ".join(target_options)
-
-        # Формируем переменные задачи
-        job_variables = {
-            "FPGA_STAGE": stage,
-            "FPGA_TARGET": target_name,
-            "FPGA_SUBMODULE": submodule,
-            **default_vars,
-            **target_vars,
-        }
-
-        if target_options:
-            job_variables["FPGA_OPTIONS"] = " ".join(target_options)
-
-        # Формируем строки для команды echo
-        vars_string = ""
-        if target_vars:
-            vars_parts = []
-            for var_name, var_value in target_vars.items():
-                vars_parts.append(f"{var_name}={var_value}")
-            vars_string = " ".join(vars_parts)
-
-        options_string = ""
-        if target_options:
-            options_string = " ".join(target_options)
-
-        # Формируем CLI-строку для переменных
-        variables_cli = ""
-        if target_vars:
-            variables_cli = " ".join([f"--var {k}={v}" for k, v in target_vars.items()])
-
-        # Формируем CLI-строку для опций
-        options_cli = ""
-        if target_options:
-            options_cli = " ".join(target_options)
-
-        # Формируем путь к Makefile относительно сабмодуля
-        makefile_path = os.path.join(
-            submodule_path, default_vars.get("MAKEFILE_PATH", "Makefile")
+        job_defaults = self.config.get("job_defaults", {})
+        makefile_path, stage_paths = self._submodule_paths(submodule_path, stage)
+        artifact_paths = self._target_artifact_paths(
+            stage_paths, makefile_path, stage, target, submodule
+        )
+        artifacts = self._stage_artifacts(stage)
+        job_name = self.generate_job_name(stage, target.name, submodule)
+        tags = stage_config.get("tags", [f"fpga-{stage}"])
+
+        # Класс стоимости задачи задает теги раннеров и подсказки GitLab
+        cost = resource_group = interruptible = None
+        if self.cost_model is not None:
+            cost = self.cost_model.estimate(job_name, stage)
+            cost_class = self.cost_model.classify(stage, cost)
+            if cost_class is not None:
+                tags = cost_class.tags or tags
+                interruptible = cost_class.interruptible
+                if cost_class.resource_group:
+                    resource_group = cost_class.resource_group.format(
+                        stage=stage, target=target.name, submodule=submodule
+                    )
+
+        return JobSpec(
+            job_name=job_name,
+            stage=stage,
+            submodule=submodule,
+            target=target,
+            makefile_path=makefile_path,
+            make_target=stage_config.get("make_target", stage),
+            tags=tags,
+            rules=self.config.get("default_rules", []),
+            ci_variables=job_defaults.get("variables", {}),
+            script_prefix=job_defaults.get("script_prefix", []),
+            deliver_target=stage_config.get("deliver_target"),
+            artifact_paths=artifact_paths,
+            default_variables=self.config.get("default_variables", {}),
+            artifacts_expire_in=artifacts.get("expire_in"),
+            artifacts_when=artifacts.get("when"),
+            resource_group=resource_group,
+            interruptible=interruptible,
+            cost=cost,
         )
 
-        return {
-            "job_name": self.generate_job_name(stage, target_name, submodule),
-            "stage": stage,
-            "target_name": target_name,
-            "tags": stage_config.get("tags", [f"fpga-{stage}"]),
-            "make_target": stage_config.get("make_target", stage),
-            "make_args": make_args.strip(),
-            "makefile_path": makefile_path,
-            "target_vars": target_vars,
-            "target_options": " ".join(target_options) if target_options else None,
-            "vars_string": vars_string if vars_string else None,
-            "options_string": options_string if options_string else None,
-            "variables_cli": variables_cli if variables_cli else None,
-            "options_cli": options_cli if options_cli else None,
-            "rules": default_rules,
-            "job_variables": job_variables,
-        }
-
-    def render_job_with_template(self, job_context: Dict[str, Any]) -> str:
+    def render_job_with_template(self, job_context: JobSpec) -> str:
         """Рендерит задачу используя Jinja2 шаблон."""
-        template = self.jinja_env.get_template("job.j2")
-        return template.render(**job_context)
+        template = self.get_template("job")
+        # Контекст не копируется в словарь: шаблон читает поля JobSpec по требованию
+        context = template.new_context(
+            JobTemplateVars(job_context, template.globals), shared=True
+        )
+        try:
+            return self.jinja_env.concat(template.root_render_func(context))
+        except Exception:
+            self.jinja_env.handle_exception()
+
+    def iter_job_contexts(
+        self, parsed_data: Dict[str, Dict[str, List[Target]]], stages: List[str]
+    ) -> Iterator[JobSpec]:
+        """
+        Лениво формирует контексты задач (по одному сабмодулю за раз). При
+        упорядочивании по стоимости контексты сначала собираются все.
+        """
+        job_contexts = self._iter_submodule_job_contexts(parsed_data, stages)
+        if self.cost_model is not None and self.cost_model.order:
+            job_contexts = iter(self.cost_model.sort(list(job_contexts), stages))
+        return job_contexts
+
+    def submodule_source_hashes(self) -> Dict[str, str]:
+        """
+        Хэши исходников сабмодулей по имени для отпечатков задач. Вычисляются
+        при первом обращении и общие для всех профилей и дайджеста кэша запуска;
+        reset_source_hashes() сбрасывает их (режим наблюдения).
+        """
+        if self._source_hashes is None:
+            entries = list(self.parser.iter_submodules())
+            tree_hashes = git_tree_hashes(entries)
+            self._source_hashes = source_hashes(
+                {
+                    self.parser.submodule_name(entry): tree_hashes.get(entry.path)
+                    for entry in entries
+                },
+                self.config.get("incremental", {}).get("dependents") or {},
+            )
+        return self._source_hashes
 
-    def generate_jobs(
-        self, parsed_data: Dict[str, Dict[str, List[Dict[str, Any]]]], stages: List[str]
-    ) -> List[str]:
-        """Генерирует все задачи."""
-        jobs = []
+    def reset_source_hashes(self) -> None:
+        """Сбрасывает хэши исходников: следующий рендеринг вычислит их заново."""
+        self._source_hashes = None
+
+    def _iter_submodule_job_contexts(
+        self, parsed_data: Dict[str, Dict[str, List[Target]]], stages: List[str]
+    ) -> Iterator[JobSpec]:
+        """Контексты задач в порядке сабмодулей."""
+        hashes: Dict[str, str] = {}
+        if self.build_avoidance is not None:
+            with self.profiler.phase("fingerprint"):
+                hashes = self.submodule_source_hashes()
 
         for submodule_name, submodule_data in parsed_data.items():
             # Получаем путь к сабмодулю
             submodule_path = submodule_data.get("submodule_path", "")
-            for stage in stages:
-                if stage in submodule_data:
-                    targets = submodule_data[stage]
+            job_contexts = [
+                self.prepare_job_context(stage, target, submodule_name, submodule_path)
+                for stage in stages
+                if stage in submodule_data
+                for target in submodule_data[stage]
+            ]
+            # Зависимости строятся внутри сабмодуля, поэтому его задачи собираются вместе
+            if self.stage_dependencies is not None:
+                job_contexts = assign_needs(
+                    job_contexts, stages, self.stage_dependencies, self.max_needs
+                )
+            # Уже собранные задачи убираются или скачивают артефакты прошлой сборки
+            if self.build_avoidance is not None:
+                built = self.build_avoidance.apply(
+                    job_contexts, stages, hashes.get(submodule_name), self.stage_dependencies
+                )
+                self.profiler.count("jobs_avoided", len(job_contexts) - len(built) + sum(
+                    1 for job_context in built if job_context.reuse_job_id is not None
+                ))
+                job_contexts = built
+            # Цели, отличающиеся только переменными, объединяются в матрицу
+            if self.matrix:
+                job_contexts = list(collapse_matrix(job_contexts, self.generate_job_name))
+                if self.build_avoidance is not None:
+                    # В манифесте - имена задач матрицы, которые выдает GitLab
+                    for job_context in job_contexts:
+                        if job_context.matrix is not None:
+                            self.build_avoidance.rename_fingerprints(
+                                matrix_instance_names(job_context, self.generate_job_name)
+                            )
+            yield from job_contexts
+
+    def iter_jobs(
+        self, parsed_data: Dict[str, Dict[str, List[Target]]], stages: List[str]
+    ) -> Iterator[str]:
+        """Лениво рендерит задачи."""
+        for job_context in self.iter_job_contexts(parsed_data, stages):
+            yield self.render_job_with_template(job_context)
 
-                    for target_config in targets:
-                        job_context = self.prepare_job_context(
-                            stage, target_config, submodule_name, submodule_path
-                        )
-                        job_yaml = self.render_job_with_template(job_context)
-                        jobs.append(job_yaml)
+    def generate_jobs(
+        self, parsed_data: Dict[str, Dict[str, List[Target]]], stages: List[str]
+    ) -> List[str]:
+        """Генерирует все задачи."""
+        return list(self.iter_jobs(parsed_data, stages))
 
-        return jobs
+    def build_jobs(
+        self, parsed_data: Dict[str, Dict[str, List[Target]]], stages: List[str]
+    ) -> Iterator[Job]:
+        """Лениво строит структурированные задачи."""
+        for job_context in self.iter_job_contexts(parsed_data, stages):
+            yield Job.from_context(job_context)
 
     def prepare_pipeline_context(
-        self, stages: List[str], jobs: List[str]
+        self, stages: List[str], jobs: Iterable[str]
     ) -> Dict[str, Any]:
         """Подготавливает контекст для генерации пайплайна."""
         from .. import __version__
@@ -173,64 +467,555 @@ class FPGAPipelineGenerator:
         global_variables = self.config.get("default_variables", {}).copy()
         global_variables["FPGA_TARGET_ARTIFACT"] = ",".join(stages)
 
+        # Без метки времени одинаковые входные данные дают побайтно одинаковый пайплайн
+        generation_time = None
+        if self.config.get("output", {}).get("timestamp", True):
+            from datetime import datetime
+
+            generation_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
         return {
             "generator_version": __version__,
-            "generation_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "generation_time": generation_time,
             "target_artifacts": stages,
             "stages": stages,
             "global_variables": global_variables,
+            # Блок variables выводится только в самодостаточных частях (sharding)
+            "emit_variables": False,
             "jobs": jobs,
         }
 
     def render_pipeline_with_template(self, pipeline_context: Dict[str, Any]) -> str:
         """Рендерит пайплайн используя Jinja2 шаблон."""
-        template = self.jinja_env.get_template("pipeline.j2")
+        template = self.get_template("pipeline")
         return template.render(**pipeline_context)
 
-    def generate_pipeline(self) -> Optional[str]:
-        """Генерирует полный пайплайн."""
+    def select_submodules(self) -> Optional[List[SubmoduleEntry]]:
+        """
+        Отбирает сабмодули, измененные с incremental.changed_since, вместе с
+        зависимыми из incremental.dependents. None - обрабатывать все сабмодули.
+        """
+        incremental_config = self.config.get("incremental", {})
+        ref = incremental_config.get("changed_since")
+        if not ref:
+            return None
+
+        changed_paths = git_changed_paths(ref)
+        if changed_paths is None:
+            logger.warning("Не удалось определить изменения, обрабатываются все сабмодули")
+            return None
+
+        submodules = list(self.parser.iter_submodules())
+        changed = {
+            self.parser.submodule_name(entry)
+            for entry in find_changed_submodules(submodules, changed_paths)
+        }
+        selected = expand_dependents(changed, incremental_config.get("dependents") or {})
+
+        logger.info(f"Изменены с {ref}: {sorted(changed)}")
+        if selected != changed:
+            logger.info(f"С учетом зависимых: {sorted(selected)}")
+
+        return [
+            entry for entry in submodules if self.parser.submodule_name(entry) in selected
+        ]
+
+    def discover(self) -> Optional[Tuple[List[str], List[SubmoduleEntry]]]:
+        """Определяет целевые стадии и находит сабмодули."""
         # Получаем целевые стадии
         stages = self.get_target_stages()
         if not stages:
-            print("Установите переменную окружения FPGA_TARGET_ARTIFACT")
-            print("Например: export FPGA_TARGET_ARTIFACT=synth,elab")
+            logger.error("Установите переменную окружения FPGA_TARGET_ARTIFACT")
+            logger.error("Например: export FPGA_TARGET_ARTIFACT=synth,elab")
             return None
 
-        print(f"Целевые артефакты: {stages}")
+        logger.info(f"Целевые артефакты: {stages}")
+        return stages, self.find_submodules()
+
+    def find_submodules(self) -> List[SubmoduleEntry]:
+        """Находит сабмодули (с учетом инкрементального режима)."""
+        with self.profiler.phase("discovery"):
+            submodules = self.select_submodules()
+            if submodules is None:
+                submodules = list(self.parser.iter_submodules())
+        return submodules
+
+    def nothing_changed(self, submodules: List[SubmoduleEntry]) -> bool:
+        """В инкрементальном режиме с incremental.changed_since не изменился ни один сабмодуль."""
+        if submodules or not self.config.get("incremental", {}).get("changed_since"):
+            return False
+        logger.info("Сабмодули не изменились, выводится задача-заглушка")
+        return True
+
+    def render_empty_pipeline(self, stages: List[str]) -> str:
+        """
+        Пайплайн без целей. GitLab не принимает пайплайн без задач, поэтому в
+        первой стадии выводится задача-заглушка (без клонирования исходников).
+        """
+        stage = stages[0]
+        stage_config = self.config_loader.get_stage_config(stage, self.config)
+        job = {
+            "stage": stage,
+            "variables": {"GIT_STRATEGY": "none"},
+            "tags": stage_config.get("tags", [f"fpga-{stage}"]),
+            "rules": self.config.get("default_rules", []),
+            "script": ['echo "FPGA сабмодули не изменились"'],
+        }
+        name = EMPTY_PIPELINE_JOB
+        if self.emitter is not None:
+            return "".join((
+                self.emitter.header_chunk(stages),
+                self.emitter.entry_chunk(name, job),
+                self.emitter.footer_chunk(),
+            ))
+        pipeline_context = self.prepare_pipeline_context(stages, [dump_yaml({name: job})])
+        return self.render_pipeline_with_template(pipeline_context)
+
+    def collect_targets(
+        self,
+    ) -> Optional[Tuple[List[str], Dict[str, Dict[str, List[Target]]]]]:
+        """
+        Определяет целевые стадии и парсит сабмодули. Если в инкрементальном
+        режиме ничего не изменилось, данные пусты (см. render_empty_pipeline).
+        """
+        discovered = self.discover()
+        if discovered is None:
+            return None
+        stages, submodules = discovered
+        if self.nothing_changed(submodules):
+            return stages, {}
+        parsed_data = self.parse_targets(stages, submodules)
+        if parsed_data is None:
+            return None
+        return stages, parsed_data
+
+    def parse_targets(
+        self, stages: List[str], submodules: List[SubmoduleEntry]
+    ) -> Optional[Dict[str, Dict[str, List[Target]]]]:
+        """Парсит найденные сабмодули; None - данных для генерации нет."""
+        index = None
+        if self.selection.active:
+            # Сабмодули, отброшенные селекторами по имени, не разбираются вовсе
+            kept = [
+                entry for entry in submodules
+                if self.selection.keeps_submodule(self.parser.submodule_name(entry))
+            ]
+            self.profiler.count("submodules_skipped", len(submodules) - len(kept))
+            submodules = kept
+            index = TargetIndex()
+
+        cache = self.parser.cache
+        misses = cache.misses if cache is not None else 0
+        with self.profiler.phase("parse"):
+            parsed_data = self.parser.parse_all_submodules(stages, submodules, index)
+
+        if self.profiler.enabled:
+            self.profiler.count("submodules_scanned", len(submodules))
+            if cache is not None:
+                files_parsed = cache.misses - misses
+            else:
+                files_parsed = sum(1 for entry in submodules if entry.cfg_path)
+            self.profiler.count("files_parsed", files_parsed)
+            self.profiler.count("targets", sum(
+                len(targets)
+                for submodule_data in parsed_data.values()
+                for key, targets in submodule_data.items()
+                if key != "submodule_path"
+            ))
+
+        if index is not None:
+            with self.profiler.phase("select"):
+                parsed_data = self.selection.apply(parsed_data, index)
 
-        # Парсим сабмодули
-        parsed_data = self.parser.parse_all_submodules(stages)
         if not parsed_data:
-            print("Не найдено данных для генерации пайплайна")
+            logger.warning("Не найдено данных для генерации пайплайна")
+            return None
+
+        return parsed_data
+
+    def run_digest(self, stages: List[str], submodules: List[SubmoduleEntry]) -> str:
+        """Дайджест входных данных запуска для кэша пайплайнов."""
+        from .. import __version__
+
+        input_files = [str(path) for path in self.template_paths.values()]
+        if self.cost_model is not None:
+            input_files.append(self.cost_model.history.path)
+        extra: List[str] = []
+        if self.build_avoidance is not None:
+            # Результат зависит и от исходников сабмодулей, а не только от cfg.yaml
+            input_files.append(self.build_avoidance.registry.path)
+            extra = sorted(f"{name}={h}" for name, h in self.submodule_source_hashes().items())
+        return self.run_cache.digest(
+            self.config,
+            stages,
+            input_files,
+            submodules,
+            __version__,
+            extra,
+        )
+
+    def generate_pipeline(self) -> Optional[str]:
+        """
+        Генерирует полный пайплайн. При включенном кэше пайплайнов и неизменных
+        входных данных возвращает сохраненный результат без парсинга и рендеринга.
+        """
+        discovered = self.discover()
+        if discovered is None:
+            return None
+        stages, submodules = discovered
+        if self.nothing_changed(submodules):
+            return self.render_empty_pipeline(stages)
+
+        digest = None
+        if self.run_cache is not None:
+            with self.profiler.phase("run_cache"):
+                digest = self.run_digest(stages, submodules)
+                content = self.run_cache.lookup(digest)
+            if content is not None:
+                logger.info("Входные данные не изменились, используется сохраненный пайплайн")
+                self.profiler.count("run_cache_hits")
+                return content
+
+        parsed_data = self.parse_targets(stages, submodules)
+        if parsed_data is None:
             return None
 
         # Генерируем задачи
-        jobs = self.generate_jobs(parsed_data, stages)
-        if not jobs:
-            print("Не создано ни одной задачи")
+        with self.profiler.phase("contexts"):
+            job_contexts = list(self.iter_job_contexts(parsed_data, stages))
+        if not job_contexts:
+            logger.warning("Не создано ни одной задачи")
             return None
 
-        print(f"Создано задач: {len(jobs)}")
+        logger.info(f"Создано задач: {len(job_contexts)}")
+        self.profiler.count("jobs", len(job_contexts))
 
         # Генерируем пайплайн
-        pipeline_context = self.prepare_pipeline_context(stages, jobs)
-        return self.render_pipeline_with_template(pipeline_context)
+        with self.profiler.phase("render"):
+            content = "".join(self.iter_pipeline_chunks(stages, job_contexts))
+
+        if digest is not None:
+            self.run_cache.store(digest, content)
+        return content
+
+    def stream_pipeline(
+        self,
+        stages: List[str],
+        parsed_data: Dict[str, Dict[str, List[Target]]],
+        out: TextIO,
+    ) -> int:
+        """
+        Рендерит пайплайн по частям прямо в поток out, не собирая его в памяти.
+        Возвращает количество записанных задач.
+        """
+        job_count = 0
+
+        def counted_contexts() -> Iterator[JobSpec]:
+            nonlocal job_count
+            for job_context in self.iter_job_contexts(parsed_data, stages):
+                job_count += 1
+                yield job_context
+
+        for chunk in self.iter_pipeline_chunks(stages, counted_contexts()):
+            out.write(chunk)
+
+        return job_count
+
+    def iter_pipeline_chunks(
+        self,
+        stages: List[str],
+        job_contexts: Iterable[JobSpec],
+        emit_variables: bool = False,
+        rendered_jobs: Optional[Dict[Tuple, str]] = None,
+    ) -> Iterator[str]:
+        """
+        Лениво рендерит пайплайн из контекстов задач в выбранном формате.
+        rendered_jobs - общий для нескольких пайплайнов кэш отрендеренных задач.
+        """
+        if self.emitter is not None:
+            variables = None
+            if emit_variables:
+                variables = self.prepare_pipeline_context(stages, ())["global_variables"]
+            # В режиме extends вывод задачи зависит от предыдущих, его не переиспользуем
+            if rendered_jobs is not None and not self.emitter.extends:
+                return self._iter_shared_chunks(stages, job_contexts, variables, rendered_jobs)
+            jobs = (Job.from_context(job_context) for job_context in job_contexts)
+            return self.emitter.iter_chunks(stages, jobs, variables)
+
+        if rendered_jobs is not None:
+            rendered = (
+                self._render_shared(c, rendered_jobs, self.render_job_with_template)
+                for c in job_contexts
+            )
+        else:
+            rendered = (self.render_job_with_template(c) for c in job_contexts)
+        pipeline_context = self.prepare_pipeline_context(stages, rendered)
+        pipeline_context["emit_variables"] = emit_variables
+        return self.get_template("pipeline").generate(**pipeline_context)
+
+    def _render_shared(
+        self,
+        job_context: JobSpec,
+        rendered_jobs: Dict[Tuple, str],
+        render: Callable[[JobSpec], str],
+    ) -> str:
+        """Рендерит задачу один раз на все пайплайны, в которые она входит."""
+        # Задача определяется стадией, сабмодулем, целью и needs (они зависят от набора стадий)
+        key = (
+            job_context.stage,
+            job_context.submodule,
+            job_context.target,
+            job_context.needs,
+            job_context.matrix,
+        )
+        chunk = rendered_jobs.get(key)
+        if chunk is None:
+            chunk = rendered_jobs[key] = render(job_context)
+        else:
+            self.profiler.count("jobs_reused")
+        return chunk
+
+    def _render_entry(self, job_context: JobSpec) -> str:
+        """Сериализует одну задачу выбранным форматом вывода."""
+        job = Job.from_context(job_context)
+        return self.emitter.entry_chunk(job.name, job.to_dict())
+
+    def _iter_shared_chunks(
+        self,
+        stages: List[str],
+        job_contexts: Iterable[JobSpec],
+        variables: Optional[Dict[str, Any]],
+        rendered_jobs: Dict[Tuple, str],
+    ) -> Iterator[str]:
+        """Сериализует пайплайн, переиспользуя уже сериализованные задачи."""
+        yield self.emitter.header_chunk(stages, variables)
+        for job_context in job_contexts:
+            yield self._render_shared(job_context, rendered_jobs, self._render_entry)
+        yield self.emitter.footer_chunk()
+
+    def generate_profiles(
+        self, profiles: List[StageProfile]
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Генерирует пайплайны нескольких профилей стадий за один проход: сабмодули
+        находятся и разбираются один раз для объединения стадий, а задачи,
+        общие для нескольких профилей, рендерятся один раз.
+        Возвращает пайплайн каждого профиля (None - в профиле нет задач).
+        """
+        resolved: Dict[str, List[str]] = {}
+        for profile in profiles:
+            if profile.name in resolved:
+                logger.error(f"Профиль {profile.name} задан несколько раз")
+                return None
+            stages = self.resolve_stages(profile.stages)
+            if not stages:
+                logger.error(f"В профиле {profile.name} нет поддерживаемых стадий")
+                return None
+            resolved[profile.name] = stages
+            logger.info(f"Профиль {profile.name}: стадии {stages}")
+
+        submodules = self.find_submodules()
+        if self.nothing_changed(submodules):
+            return {name: self.render_empty_pipeline(stages) for name, stages in resolved.items()}
+
+        results: Dict[str, Optional[str]] = {}
+        digests: Dict[str, str] = {}
+        if self.run_cache is not None:
+            with self.profiler.phase("run_cache"):
+                for name, stages in resolved.items():
+                    digests[name] = self.run_digest(stages, submodules)
+                    content = self.run_cache.lookup(digests[name])
+                    if content is not None:
+                        logger.info(f"Профиль {name}: входные данные не изменились")
+                        self.profiler.count("run_cache_hits")
+                        results[name] = content
+
+        pending = [name for name in resolved if name not in results]
+        if not pending:
+            return results
+
+        # Каждый cfg.yaml разбирается один раз для всех оставшихся профилей
+        union: List[str] = []
+        for name in pending:
+            union.extend(stage for stage in resolved[name] if stage not in union)
+        parsed_data = self.parse_targets(union, submodules)
+        if parsed_data is None:
+            return None
+
+        rendered_jobs: Dict[Tuple, str] = {}
+        for name in pending:
+            stages = resolved[name]
+            with self.profiler.phase("contexts"):
+                job_contexts = list(self.iter_job_contexts(parsed_data, stages))
+            if not job_contexts:
+                logger.warning(f"Профиль {name}: не создано ни одной задачи")
+                results[name] = None
+                continue
+
+            logger.info(f"Профиль {name}: создано задач {len(job_contexts)}")
+            self.profiler.count("jobs", len(job_contexts))
+            with self.profiler.phase("render"):
+                content = "".join(
+                    self.iter_pipeline_chunks(stages, job_contexts, rendered_jobs=rendered_jobs)
+                )
+            if name in digests:
+                self.run_cache.store(digests[name], content)
+            results[name] = content
+
+        # Порядок результатов - порядок профилей
+        return {name: results[name] for name in resolved}
+
+    def check_configs(self) -> Tuple[List[Problem], int]:
+        """
+        Проверяет все найденные cfg.yaml без парсинга целей и рендеринга.
+        Возвращает все ошибки и число проверенных файлов.
+        """
+        with self.profiler.phase("discovery"):
+            entries = [entry for entry in self.parser.iter_submodules() if entry.cfg_path]
+
+        supported_stages = self.config_loader.get_supported_stages(self.config)
+        with self.profiler.phase("check"):
+            reports = validate_files(
+                [entry.cfg_path for entry in entries],
+                supported_stages,
+                self.parser.parse_mode,
+                self.parser.workers,
+            )
+            problems = [problem for report in reports for problem in report.problems]
+            problems.extend(find_job_collisions(
+                (
+                    (self.parser.submodule_name(entry), entry.cfg_path, report)
+                    for entry, report in zip(entries, reports)
+                ),
+                self.generate_job_name,
+                self.matrix,
+            ))
+
+        self.profiler.count("files_checked", len(entries))
+        self.profiler.count("problems", len(problems))
+        return problems, len(entries)
+
+    def get_output_file(self, output_file: Optional[str] = None) -> str:
+        """Возвращает путь к выходному файлу с учетом конфигурации."""
+        if output_file:
+            return output_file
+        output_config = self.config.get("output", {})
+        return output_config.get("default_filename", "generated_pipeline.yml")
 
     def save_pipeline(
         self, pipeline_content: str, output_file: Optional[str] = None
     ) -> bool:
         """Сохраняет пайплайн в файл."""
-        if not output_file:
-            output_config = self.config.get("output", {})
-            output_file = output_config.get(
-                "default_filename", "generated_pipeline.yml"
-            )
+        output_file = self.get_output_file(output_file)
 
         try:
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(pipeline_content)
-            print(f"Конфигурация пайплайна сохранена в {output_file}")
+            with self.profiler.phase("write"):
+                # Неизмененный файл не перезаписывается: mtime остается прежним
+                if FileUtils.has_content(output_file, pipeline_content):
+                    logger.info(f"Конфигурация пайплайна в {output_file} не изменилась")
+                    return True
+                with FileUtils.atomic_write(output_file) as f:
+                    f.write(pipeline_content)
+            if self.profiler.enabled:
+                self.profiler.count("bytes_written", os.path.getsize(output_file))
+            logger.info(f"Конфигурация пайплайна сохранена в {output_file}")
             return True
         except Exception as e:
-            print(f"Ошибка сохранения файла: {e}")
+            logger.error(f"Ошибка сохранения файла: {e}")
             return False
+
+    def save_pipeline_stream(
+        self,
+        stages: List[str],
+        parsed_data: Dict[str, Dict[str, List[Target]]],
+        output_file: Optional[str] = None,
+    ) -> bool:
+        """Потоково рендерит пайплайн в файл с атомарной заменой."""
+        output_file = self.get_output_file(output_file)
+
+        try:
+            # Контексты, рендеринг и запись чередуются, поэтому это одна фаза
+            with self.profiler.phase("render+write"):
+                with FileUtils.atomic_write(output_file) as f:
+                    job_count = self.stream_pipeline(stages, parsed_data, f)
+            if self.profiler.enabled:
+                self.profiler.count("jobs", job_count)
+                self.profiler.count("bytes_written", os.path.getsize(output_file))
+            logger.info(f"Создано задач: {job_count}")
+            logger.info(f"Конфигурация пайплайна сохранена в {output_file}")
+            return True
+        except Exception as e:
+            logger.error(f"Ошибка сохранения файла: {e}")
+            return False
+
+    def build_shards(
+        self,
+        stages: List[str],
+        parsed_data: Dict[str, Dict[str, List[Target]]],
+    ) -> List[Shard]:
+        """Разбивает задачи на части согласно секции sharding."""
+        job_contexts = list(self.iter_job_contexts(parsed_data, stages))
+        shards = split_jobs(job_contexts, stages, self.config.get("sharding", {}))
+        if self.stage_dependencies is not None:
+            for shard in shards:
+                shard.job_contexts = restrict_needs(shard.job_contexts)
+        return shards
+
+    def render_manifest(self, shards: List[Shard], shard_files: List[str]) -> str:
+        """Рендерит манифест, запускающий части как дочерние пайплайны."""
+        sharding_config = self.config.get("sharding", {})
+        manifest = build_trigger_manifest(
+            shards, shard_files, sharding_config, sharding_config.get("by") == "stage"
+        )
+        if self.output_format == "json":
+            return json.dumps(manifest, ensure_ascii=False, indent=2) + "\n"
+        return dump_yaml(manifest)
+
+    def _write_shard(self, shard: Shard, shard_file: str) -> None:
+        """Потоково записывает одну часть пайплайна."""
+        with FileUtils.atomic_write(shard_file) as f:
+            for chunk in self.iter_pipeline_chunks(
+                shard.stages, shard.job_contexts, emit_variables=True
+            ):
+                f.write(chunk)
+
+    def save_pipeline_shards(
+        self,
+        stages: List[str],
+        parsed_data: Dict[str, Dict[str, List[Target]]],
+        output_file: Optional[str] = None,
+    ) -> bool:
+        """
+        Записывает части пайплайна параллельно, а в output_file - манифест,
+        который запускает их как дочерние пайплайны.
+        """
+        output_file = self.get_output_file(output_file)
+        with self.profiler.phase("contexts"):
+            shards = self.build_shards(stages, parsed_data)
+        shard_files = [shard_file_path(output_file, shard) for shard in shards]
+
+        try:
+            with self.profiler.phase("render+write"):
+                from concurrent.futures import ThreadPoolExecutor
+
+                with ThreadPoolExecutor() as executor:
+                    # list() пробрасывает исключения из потоков
+                    list(executor.map(self._write_shard, shards, shard_files))
+
+                with FileUtils.atomic_write(output_file) as f:
+                    f.write(self.render_manifest(shards, shard_files))
+        except Exception as e:
+            logger.error(f"Ошибка сохранения файла: {e}")
+            return False
+
+        if self.profiler.enabled:
+            self.profiler.count("jobs", sum(len(shard.job_contexts) for shard in shards))
+            self.profiler.count("bytes_written", sum(
+                os.path.getsize(path) for path in [output_file, *shard_files]
+            ))
+
+        for shard, shard_file in zip(shards, shard_files):
+            logger.info(f"Часть {shard.name}: задач {len(shard.job_contexts)} -> {shard_file}")
+        logger.info(f"Создано задач: {sum(len(shard.job_contexts) for shard in shards)}")
+        logger.info(f"Манифест дочерних пайплайнов сохранен в {output_file}")
+        return True
@@ -0,0 +1,114 @@
+"""
+Модуль объединения целей в задачи с parallel: matrix.
+
+Цели сабмодуля одной стадии, которые отличаются только именем и переменными,
+выводятся одной задачей: имя цели и строка переменных make передаются
+элементами матрицы (FPGA_TARGET, FPGA_VARIABLES), а скрипт подставляет их из
+окружения. Make получает те же TARGET и VARIABLES, что и отдельные задачи.
+"""
+
+from typing import Callable, Dict, Iterator, List, Set, Tuple
+
+from .model import JobSpec
+
+# Ограничение GitLab на число задач одной матрицы
+MAX_MATRIX_SIZE = 200
+
+
+def _matrix_key(job: JobSpec) -> tuple:
+    """
+    Поля, которые должны совпадать у задач одной матрицы. Остальные поля
+    (правила, переменные CI и т.д.) одинаковы у задач стадии сабмодуля.
+    """
+    return (
+        job.stage,
+        job.make_target,
+        job.target.options,
+        job.artifact_paths,
+        tuple(job.tags),
+        job.resource_group,
+        job.interruptible,
+    )
+
+
+def _expressible(job: JobSpec) -> bool:
+    """
+    Можно ли передать цель элементом матрицы: без переменных задача не получает
+    VARIABLES вовсе, а '$' в значениях GitLab раскрыл бы как ссылку на переменную.
+    """
+    if not job.target.variables or job.needs is not None or job.reuse_job_id is not None:
+        return False
+    return "$" not in job.target.name and "$" not in (job.variables_cli or "")
+
+
+def matrix_job_name(
+    job_name: Callable[[str, str, str], str], stage: str, submodule: str, taken: Set[str]
+) -> str:
+    """
+    Имя очередной матрицы стадии: <stage>_matrix_<submodule>, затем matrix2 и т.д.
+    Имена из taken (задачи сабмодуля и уже выданные матрицы) пропускаются:
+    цель с именем matrix дала бы задачу с тем же именем. Выданное имя
+    добавляется в taken.
+    """
+    number = 1
+    while True:
+        name = job_name(stage, "matrix" if number == 1 else f"matrix{number}", submodule)
+        if name not in taken:
+            taken.add(name)
+            return name
+        number += 1
+
+
+def collapse_matrix(
+    job_contexts: List[JobSpec],
+    job_name: Callable[[str, str, str], str],
+) -> Iterator[JobSpec]:
+    """
+    Объединяет задачи одного сабмодуля в задачи с матрицей. Матрица выводится
+    на месте первой задачи группы; группы из одной задачи, больше
+    MAX_MATRIX_SIZE задач или с невыразимыми целями остаются отдельными задачами.
+    """
+    groups: Dict[tuple, List[JobSpec]] = {}
+    for job in job_contexts:
+        if _expressible(job):
+            groups.setdefault(_matrix_key(job), []).append(job)
+
+    # Имена матриц не должны совпадать с именами задач сабмодуля и друг с другом
+    taken = {job.job_name for job in job_contexts}
+    heads: Dict[int, JobSpec] = {}
+    collapsed = set()
+    for group in groups.values():
+        if not 2 <= len(group) <= MAX_MATRIX_SIZE:
+            continue
+        first = group[0]
+        entries: Tuple[Tuple[str, str], ...] = tuple(
+            (job.target.name, job.variables_cli) for job in group
+        )
+        costs = [job.cost for job in group if job.cost is not None]
+        heads[id(first)] = first._replace(
+            job_name=matrix_job_name(job_name, first.stage, first.submodule, taken),
+            matrix=entries,
+            cost=max(costs) if costs else None,
+        )
+        collapsed.update(id(job) for job in group)
+
+    for job in job_contexts:
+        if id(job) in heads:
+            yield heads[id(job)]
+        elif id(job) not in collapsed:
+            yield job
+
+
+def matrix_instance_names(
+    job: JobSpec, job_name: Callable[[str, str, str], str]
+) -> Iterator[Tuple[str, str]]:
+    """
+    Для задачи с матрицей возвращает пары (имя отдельной задачи цели, имя задачи
+    в GitLab). GitLab называет задачи матрицы '<имя>: [<значение>, ...]' со
+    значениями переменных элемента в порядке их записи (FPGA_TARGET, FPGA_VARIABLES).
+    """
+    for target_name, variables_cli in job.matrix or ():
+        yield (
+            job_name(job.stage, target_name, job.submodule),
+            f"{job.job_name}: [{target_name}, {variables_cli}]",
+        )
@@ -0,0 +1,301 @@
+"""
+Модель целей и задач GitLab CI.
+
+Target и JobSpec - неизменяемые кортежи без __dict__: на пайплайнах с десятками
+тысяч целей они заметно компактнее словарей. Карты переменных интернируются и
+разделяются между целями, а производные строки (make_args, variables_cli и т.д.)
+вычисляются только при обращении.
+"""
+
+import os
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Any, NamedTuple, Optional, Tuple
+
+# Архив, в который задача reuse скачивает артефакты прошлой сборки
+REUSE_ARCHIVE = "fpga_reuse_artifacts.zip"
+
+# Карта переменных цели: пары (имя, значение) в исходном порядке
+Variables = Tuple[Tuple[str, str], ...]
+
+# Пул интернированных карт переменных и списков опций. Пул создается на один
+# проход разбора и освобождается вместе с ним, поэтому не растет в режиме
+# --watch и при повторных вызовах api.generate
+InternPool = Dict[tuple, tuple]
+
+
+def intern_variables(variables: Dict[str, Any], pool: InternPool) -> Variables:
+    """Возвращает общую для целей пула копию карты переменных."""
+    pairs = tuple((sys.intern(str(name)), str(value)) for name, value in variables.items())
+    return pool.setdefault(pairs, pairs)
+
+
+def intern_options(options: List[Any], pool: InternPool) -> Tuple[str, ...]:
+    """Возвращает общую для целей пула копию списка опций."""
+    items = tuple(str(option) for option in options)
+    return pool.setdefault(items, items)
+
+
+class Target(NamedTuple):
+    """Цель из cfg.yaml."""
+
+    name: str
+    variables: Variables = ()
+    options: Tuple[str, ...] = ()
+    # Пути артефактов цели относительно каталога сабмодуля
+    artifacts: Tuple[str, ...] = ()
+
+
+class JobSpec(NamedTuple):
+    """
+    Описание задачи до рендеринга.
+
+    Поля со ссылками на конфигурацию (tags, rules, ci_variables и т.д.) не
+    копируются, а разделяются всеми задачами стадии.
+    """
+
+    job_name: str
+    stage: str
+    submodule: str
+    target: Target
+    makefile_path: str
+    make_target: str
+    tags: List[str]
+    rules: List[Dict[str, Any]]
+    ci_variables: Dict[str, Any]
+    script_prefix: List[str]
+    deliver_target: Optional[str]
+    artifact_paths: Tuple[str, ...]
+    default_variables: Dict[str, Any]
+    # None - задача ждет предыдущие стадии, () - стартует сразу
+    needs: Optional[Tuple[str, ...]] = None
+    # Подсказки GitLab по классу стоимости задачи (None - не выводятся)
+    resource_group: Optional[str] = None
+    interruptible: Optional[bool] = None
+    # Оценка длительности в секундах по истории (None - модель стоимости выключена)
+    cost: Optional[float] = None
+    # Срок хранения и условие загрузки артефактов (None - по умолчанию GitLab)
+    artifacts_expire_in: Optional[str] = None
+    artifacts_when: Optional[str] = None
+    # Элементы parallel: matrix - пары (имя цели, variables_cli); None - обычная задача
+    matrix: Optional[Tuple[Tuple[str, Optional[str]], ...]] = None
+    # id задачи GitLab, артефакты которой переиспользуются вместо сборки
+    reuse_job_id: Optional[int] = None
+
+    @property
+    def target_name(self) -> str:
+        """Имя цели."""
+        return self.target.name
+
+    @property
+    def target_vars(self) -> Dict[str, str]:
+        """Переменные цели в виде словаря."""
+        return dict(self.target.variables)
+
+    @property
+    def target_options(self) -> Optional[str]:
+        """Опции цели через пробел."""
+        return " ".join(self.target.options) or None
+
+    @property
+    def make_args(self) -> str:
+        """Аргументы make: переменные NAME=value и опции."""
+        parts = [f"{name}={value}" for name, value in self.target.variables]
+        parts.extend(self.target.options)
+        return " ".join(parts)
+
+    @property
+    def vars_string(self) -> Optional[str]:
+        """Переменные цели для команды echo."""
+        return " ".join(f"{name}={value}" for name, value in self.target.variables) or None
+
+    @property
+    def options_string(self) -> Optional[str]:
+        """Опции цели для команды echo."""
+        return self.target_options
+
+    @property
+    def variables_cli(self) -> Optional[str]:
+        """Переменные в формате --var NAME=value."""
+        return " ".join(
+            f"--var {name}={value}" for name, value in self.target.variables
+        ) or None
+
+    @property
+    def options_cli(self) -> Optional[str]:
+        """Опции в формате командной строки."""
+        return self.target_options
+
+    @property
+    def reuse_script(self) -> List[str]:
+        """Команды задачи reuse: скачать и распаковать артефакты прошлой сборки."""
+        return [
+            'curl --fail --location --silent --show-error --header "JOB-TOKEN: $CI_JOB_TOKEN"'
+            f' --output {REUSE_ARCHIVE}'
+            f' "$CI_API_V4_URL/projects/$CI_PROJECT_ID/jobs/{self.reuse_job_id}/artifacts"',
+            f"unzip -o -q {REUSE_ARCHIVE}",
+            f"rm -f {REUSE_ARCHIVE}",
+        ]
+
+    @property
+    def job_variables(self) -> Dict[str, Any]:
+        """Переменные задачи: служебные FPGA_*, переменные по умолчанию и цели."""
+        job_variables = {
+            "FPGA_STAGE": self.stage,
+            "FPGA_TARGET": self.target.name,
+            "FPGA_SUBMODULE": self.submodule,
+            **self.default_variables,
+            **dict(self.target.variables),
+        }
+        if self.target.options:
+            job_variables["FPGA_OPTIONS"] = " ".join(self.target.options)
+        return job_variables
+
+
+# Производные поля JobSpec, доступные в шаблоне job.j2
+_DERIVED_KEYS = (
+    "target_name",
+    "target_vars",
+    "target_options",
+    "make_args",
+    "vars_string",
+    "options_string",
+    "variables_cli",
+    "options_cli",
+    "reuse_script",
+    "job_variables",
+)
+_TEMPLATE_KEYS = frozenset(JobSpec._fields + _DERIVED_KEYS)
+
+
+class JobTemplateVars(Mapping):
+    """
+    Переменные шаблона задачи поверх JobSpec.
+
+    Значение вычисляется при обращении шаблона к имени, поэтому неиспользуемые
+    производные строки не строятся. Остальные имена берутся из globals шаблона.
+    """
+
+    __slots__ = ("_spec", "_globals")
+
+    def __init__(self, spec: JobSpec, globals_: Mapping):
+        self._spec = spec
+        self._globals = globals_
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _TEMPLATE_KEYS:
+            return getattr(self._spec, key)
+        return self._globals[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from JobSpec._fields
+        yield from _DERIVED_KEYS
+        for key in self._globals:
+            if key not in _TEMPLATE_KEYS:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+@dataclass
+class Job:
+    """Задача пайплайна в структурированном виде."""
+
+    name: str
+    stage: str
+    submodule: str
+    variables: Dict[str, str] = field(default_factory=dict)
+    tags: List[str] = field(default_factory=list)
+    script: List[str] = field(default_factory=list)
+    rules: List[Dict[str, Any]] = field(default_factory=list)
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    # None - задача ждет предыдущие стадии, [] - стартует сразу
+    needs: Optional[List[str]] = None
+    resource_group: Optional[str] = None
+    interruptible: Optional[bool] = None
+    parallel: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_context(cls, job_context: JobSpec) -> "Job":
+        """Строит задачу из результата prepare_job_context."""
+        makefile_path = job_context.makefile_path
+        submodule_dir = os.path.dirname(makefile_path)
+        makefile_name = os.path.basename(makefile_path)
+
+        make_args = ""
+        target_arg = f"TARGET='{job_context.target.name}'"
+        parallel = None
+        if job_context.matrix is not None:
+            # Цель и переменные задаются элементом матрицы через окружение
+            make_args += ' VARIABLES="$FPGA_VARIABLES"'
+            target_arg = 'TARGET="$FPGA_TARGET"'
+            parallel = {
+                "matrix": [
+                    {"FPGA_TARGET": target_name, "FPGA_VARIABLES": variables_cli}
+                    for target_name, variables_cli in job_context.matrix
+                ]
+            }
+        elif job_context.variables_cli:
+            make_args += f" VARIABLES='{job_context.variables_cli}'"
+        options_cli = job_context.options_cli
+        if options_cli:
+            make_args += f" OPTIONS='{options_cli}'"
+
+        make_command = f"make -f {makefile_name} {job_context.make_target}{make_args} {target_arg}"
+        script = [
+            *job_context.script_prefix,
+            f"echo {makefile_path} {submodule_dir}",
+            f"echo Executing: {make_command}",
+            f"cd {submodule_dir}",
+            make_command,
+        ]
+        if job_context.deliver_target:
+            script.append(f"make -f Makefile {job_context.deliver_target}{make_args}")
+        if job_context.reuse_job_id is not None:
+            script = job_context.reuse_script
+
+        artifacts: Dict[str, Any] = {}
+        if job_context.artifact_paths:
+            artifacts["paths"] = list(job_context.artifact_paths)
+            if job_context.artifacts_expire_in:
+                artifacts["expire_in"] = job_context.artifacts_expire_in
+            if job_context.artifacts_when:
+                artifacts["when"] = job_context.artifacts_when
+
+        return cls(
+            name=job_context.job_name,
+            stage=job_context.stage,
+            submodule=job_context.submodule,
+            variables={name: str(value) for name, value in job_context.ci_variables.items()},
+            tags=list(job_context.tags),
+            script=script,
+            rules=[dict(rule) for rule in job_context.rules or []],
+            artifacts=artifacts,
+            needs=None if job_context.needs is None else list(job_context.needs),
+            resource_group=job_context.resource_group,
+            interruptible=job_context.interruptible,
+            parallel=parallel,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Возвращает описание задачи в формате GitLab CI."""
+        job: Dict[str, Any] = {"stage": self.stage}
+        if self.needs is not None:
+            job["needs"] = self.needs
+        if self.variables:
+            job["variables"] = self.variables
+        job["tags"] = self.tags
+        if self.resource_group is not None:
+            job["resource_group"] = self.resource_group
+        if self.interruptible is not None:
+            job["interruptible"] = self.interruptible
+        if self.parallel is not None:
+            job["parallel"] = self.parallel
+        job["script"] = self.script
+        if self.rules:
+            job["rules"] = self.rules
+        if self.artifacts:
+            job["artifacts"] = self.artifacts
+        return job
@@ -0,0 +1,186 @@
+"""
+Модуль дискового кэша разобранных cfg.yaml файлов.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .model import Target
+
+logger = logging.getLogger(__name__)
+
+
+class FileStamp(NamedTuple):
+    """Отпечаток файла: размер, время модификации и хэш содержимого."""
+
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+def content_digest(content: bytes) -> str:
+    """Вычисляет хэш содержимого файла."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class ParseCache:
+    """
+    Кэш обогащенных целей сабмодулей (результат extract_target_info).
+
+    Запись хранится по абсолютному пути к cfg.yaml и действительна, пока совпадают
+    размер и mtime файла. Если mtime изменился (например, после git clone в CI),
+    сверяется хэш содержимого, и YAML заново не разбирается.
+    """
+
+    VERSION = 3
+    FILENAME = "parse_cache.pickle"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, self.FILENAME)
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Tuple[FileStamp, Dict[str, List[Target]]]] = {}
+        self._touched = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """Загружает кэш с диска. Поврежденный кэш отбрасывается."""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Кэш парсинга {self.path} поврежден и будет пересоздан: {e}")
+            self._dirty = True
+            return
+
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            # Формат записей изменился - начинаем с пустого кэша
+            self._dirty = True
+            return
+
+        self._entries = data.get("entries", {})
+
+    def lookup(
+        self, cfg_path: str, target_stages: List[str]
+    ) -> Optional[Dict[str, List[Target]]]:
+        """Возвращает цели для указанных стадий или None при промахе."""
+        key = os.path.abspath(cfg_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            self._touched.add(key)
+
+        result = None
+        if entry is not None:
+            result = self._validate(key, entry, target_stages)
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def _validate(
+        self,
+        key: str,
+        entry: Tuple[FileStamp, Dict[str, List[Target]]],
+        target_stages: List[str],
+    ) -> Optional[Dict[str, List[Target]]]:
+        """Проверяет актуальность записи кэша."""
+        stamp, targets = entry
+        if any(stage not in targets for stage in target_stages):
+            return None
+
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None
+
+        if st.st_size != stamp.size:
+            return None
+
+        if st.st_mtime_ns != stamp.mtime_ns:
+            try:
+                with open(key, "rb") as f:
+                    digest = content_digest(f.read())
+            except OSError:
+                return None
+            if digest != stamp.digest:
+                return None
+            # Содержимое не изменилось - запоминаем новый mtime
+            with self._lock:
+                self._entries[key] = (stamp._replace(mtime_ns=st.st_mtime_ns), targets)
+                self._dirty = True
+
+        return {stage: targets[stage] for stage in target_stages if targets[stage]}
+
+    def store(
+        self,
+        cfg_path: str,
+        stamp: FileStamp,
+        target_stages: List[str],
+        targets: Dict[str, List[Target]],
+    ) -> None:
+        """Сохраняет цели сабмодуля. Отсутствующие стадии запоминаются пустыми."""
+        key = os.path.abspath(cfg_path)
+        stage_targets = {stage: targets.get(stage, []) for stage in target_stages}
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0].digest == stamp.digest:
+                # Дополняем запись стадиями, запрошенными в этом запуске
+                stage_targets = {**entry[1], **stage_targets}
+            self._entries[key] = (stamp, stage_targets)
+            self._touched.add(key)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Атомарно записывает кэш на диск, если он изменился."""
+        with self._lock:
+            # Удаляем записи о файлах, которых больше нет
+            for key in [k for k in self._entries if k not in self._touched]:
+                if not os.path.exists(key):
+                    del self._entries[key]
+                    self._dirty = True
+
+            if not self._dirty:
+                return
+            data = {"version": self.VERSION, "entries": self._entries}
+
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"Не удалось сохранить кэш парсинга {self.path}: {e}")
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий в кэш."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_summary(self) -> str:
+        """Возвращает строку со статистикой кэша."""
+        return (
+            f"Кэш парсинга: попаданий {self.hits}, промахов {self.misses} "
+            f"({self.hit_rate:.0%}), {self.path}"
+        )
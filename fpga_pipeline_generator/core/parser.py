@@ -2,32 +2,72 @@
 Модуль для парсинга cfg.yaml файлов из сабмодулей.
 """
 
+import logging
 import os
-import yaml
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
+
+from ..utils import yaml_io
+from ..utils.discovery import SubmoduleEntry, iter_submodules
+from .constants import PARSE_MODES
+from .model import InternPool, Target, intern_options, intern_variables
+from .parse_cache import FileStamp, ParseCache, content_digest
+from .selection import TargetIndex
+
+logger = logging.getLogger(__name__)
 
 
 class ConfigParser:
     """Класс для парсинга конфигурационных файлов cfg.yaml."""
 
-    def __init__(self, fpga_dir: str = "fpga", config_filename: str = "cfg.yaml"):
+    def __init__(
+        self,
+        fpga_dir: str = "fpga",
+        config_filename: str = "cfg.yaml",
+        parse_mode: str = "serial",
+        workers: Optional[int] = None,
+        cache: Optional[ParseCache] = None,
+        max_depth: int = 1,
+        exclude: Sequence[str] = (),
+    ):
         self.fpga_dir = fpga_dir
         self.config_filename = config_filename
+        self.max_depth = max(1, max_depth)
+        self.exclude = tuple(exclude)
+        if parse_mode not in PARSE_MODES:
+            raise ValueError(
+                f"Неизвестный режим парсинга '{parse_mode}'. Допустимые: {list(PARSE_MODES)}"
+            )
+        self.parse_mode = parse_mode
+        # None или 0 - размер пула выбирает concurrent.futures
+        self.workers = workers or None
+        self.cache = cache
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Кэш живет только в родительском процессе и в воркеры не передается
+        state = self.__dict__.copy()
+        state["cache"] = None
+        return state
+
+    def iter_submodules(self) -> Iterator[SubmoduleEntry]:
+        """Лениво обходит папку fpga с учетом max_depth и exclude."""
+        if not os.path.isdir(self.fpga_dir):
+            logger.warning(f"Папка {self.fpga_dir} не найдена")
+            return iter(())
+
+        return iter_submodules(
+            self.fpga_dir, self.config_filename, self.max_depth, self.exclude
+        )
 
     def find_submodules(self) -> List[str]:
         """Находит все сабмодули в папке fpga."""
-        if not os.path.exists(self.fpga_dir):
-            print(f"Папка {self.fpga_dir} не найдена")
-            return []
-
-        submodules = []
-        for item in os.listdir(self.fpga_dir):
-            submodule_path = os.path.join(self.fpga_dir, item)
-            if os.path.isdir(submodule_path):
-                submodules.append(submodule_path)
+        return [entry.path for entry in self.iter_submodules()]
 
-        return submodules
+    @staticmethod
+    def submodule_name(entry: SubmoduleEntry) -> str:
+        """Имя сабмодуля: путь относительно папки fpga, вложенность через '_'."""
+        return entry.rel_path.replace("/", "_")
 
     def find_cfg_yaml(self, submodule_path: str) -> Optional[str]:
         """Ищет файл cfg.yaml в сабмодуле."""
@@ -38,15 +78,28 @@ class ConfigParser:
 
     def parse_cfg_yaml(self, cfg_path: str) -> Dict[str, Any]:
         """Парсит cfg.yaml файл."""
+        return self.read_cfg_yaml(cfg_path)[0]
+
+    def read_cfg_yaml(self, cfg_path: str) -> Tuple[Dict[str, Any], Optional[FileStamp]]:
+        """
+        Парсит cfg.yaml файл и возвращает данные вместе с отпечатком файла.
+        Отпечаток равен None, если файл не удалось прочитать или разобрать.
+        """
         try:
-            with open(cfg_path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f) or {}
+            with open(cfg_path, "rb") as f:
+                content = f.read()
+                st = os.fstat(f.fileno())
         except FileNotFoundError:
-            print(f"Файл {cfg_path} не найден")
-            return {}
-        except yaml.YAMLError as e:
-            print(f"Ошибка парсинга YAML {cfg_path}: {e}")
-            return {}
+            logger.warning(f"Файл {cfg_path} не найден")
+            return {}, None
+
+        try:
+            data = yaml_io.load(content.decode("utf-8")) or {}
+        except yaml_io.YAMLError as e:
+            logger.warning(f"Ошибка парсинга YAML {cfg_path}: {e}")
+            return {}, None
+
+        return data, FileStamp(st.st_size, st.st_mtime_ns, content_digest(content))
 
     def extract_target_info(
         self, target_config: Dict[str, Any]
@@ -78,6 +131,13 @@ class ConfigParser:
 
         return target_name, variables, options
 
+    def extract_target_artifacts(self, target_config: Dict[str, Any]) -> List[str]:
+        """Извлекает пути артефактов цели (ключ artifacts)."""
+        artifacts = target_config.get("artifacts") or []
+        if not isinstance(artifacts, list):
+            return []
+        return [str(path) for path in artifacts if path]
+
     def get_targets_for_stage(
         self, cfg_data: Dict[str, Any], stage: str
     ) -> List[Dict[str, Any]]:
@@ -91,60 +151,175 @@ class ConfigParser:
 
         return stage_data
 
+    def parse_submodule(
+        self, submodule_path: str, target_stages: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Парсит один сабмодуль и возвращает обогащенные цели по стадиям.
+        Возвращает None, если в сабмодуле нет cfg.yaml.
+        """
+        cfg_path = self.find_cfg_yaml(submodule_path)
+        if not cfg_path:
+            return None
+        return self.parse_found_cfg(cfg_path, target_stages)
+
+    def parse_found_cfg(
+        self,
+        cfg_path: Optional[str],
+        target_stages: List[str],
+        pool: Optional[InternPool] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Парсит найденный cfg.yaml с учетом кэша."""
+        if cfg_path is None:
+            return None
+
+        if self.cache is not None:
+            cached = self.cache.lookup(cfg_path, target_stages)
+            if cached is not None:
+                return cached
+
+        submodule_targets, stamp = self.parse_cfg_targets(cfg_path, target_stages, pool)
+        if self.cache is not None and stamp is not None:
+            self.cache.store(cfg_path, stamp, target_stages, submodule_targets)
+        return submodule_targets
+
+    def parse_cfg_targets(
+        self,
+        cfg_path: str,
+        target_stages: List[str],
+        pool: Optional[InternPool] = None,
+    ) -> Tuple[Dict[str, Any], Optional[FileStamp]]:
+        """
+        Парсит cfg.yaml и обогащает цели указанных стадий. pool - пул
+        интернирования прохода разбора (None - свой пул для файла).
+        """
+        cfg_data, stamp = self.read_cfg_yaml(cfg_path)
+        if not cfg_data:
+            return {}, stamp
+        if pool is None:
+            pool = {}
+
+        submodule_targets = {}
+
+        for stage in target_stages:
+            targets = self.get_targets_for_stage(cfg_data, stage)
+            if targets:
+                # Цели хранятся компактно: карты переменных общие для одинаковых целей
+                enriched_targets = []
+                for target_config in targets:
+                    target_name, variables, options = self.extract_target_info(
+                        target_config
+                    )
+
+                    enriched_targets.append(
+                        Target(
+                            str(target_name),
+                            intern_variables(variables, pool),
+                            intern_options(options or [], pool),
+                            intern_options(self.extract_target_artifacts(target_config), pool),
+                        )
+                    )
+
+                submodule_targets[stage] = enriched_targets
+
+        return submodule_targets, stamp
+
+    def _map_submodules(
+        self, submodules: List[SubmoduleEntry], target_stages: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Парсит все найденные сабмодули с сохранением порядка."""
+        cfg_paths = [entry.cfg_path for entry in submodules]
+        # Пул интернирования живет только в этом проходе разбора
+        pool: InternPool = {}
+
+        if self.parse_mode == "serial" or len(submodules) < 2:
+            return [self.parse_found_cfg(path, target_stages, pool) for path in cfg_paths]
+
+        # concurrent.futures (и logging за ним) заметно замедляет импорт,
+        # поэтому пулы загружаются только в параллельных режимах
+        if self.parse_mode == "thread":
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                return list(
+                    executor.map(
+                        self.parse_found_cfg, cfg_paths, repeat(target_stages), repeat(pool)
+                    )
+                )
+
+        # Процессы: кэш обслуживается здесь, в воркеры уходят только промахи
+        results: List[Optional[Dict[str, Any]]] = []
+        pending = []
+        for index, cfg_path in enumerate(cfg_paths):
+            cached = None
+            if cfg_path and self.cache is not None:
+                cached = self.cache.lookup(cfg_path, target_stages)
+            if cfg_path and cached is None:
+                pending.append((index, cfg_path))
+            results.append(cached)
+
+        if not pending:
+            return results
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = self.workers or os.cpu_count() or 1
+        chunksize = max(1, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = executor.map(
+                self.parse_cfg_targets,
+                [cfg_path for _, cfg_path in pending],
+                repeat(target_stages),
+                chunksize=chunksize,
+            )
+            for (index, cfg_path), (submodule_targets, stamp) in zip(pending, parsed):
+                if self.cache is not None and stamp is not None:
+                    self.cache.store(cfg_path, stamp, target_stages, submodule_targets)
+                results[index] = submodule_targets
+
+        return results
+
     def parse_all_submodules(
-        self, target_stages: List[str]
-    ) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        self,
+        target_stages: List[str],
+        submodules: Optional[List[SubmoduleEntry]] = None,
+        index: Optional[TargetIndex] = None,
+    ) -> Dict[str, Dict[str, List[Target]]]:
         """
         Парсит все сабмодули и возвращает структуру:
         {
             'submodule_name': {
-                'stage_name': [target_configs...],
+                'stage_name': [Target...],
                 'submodule_path': 'path/to/submodule'
             }
         }
+
+        Порядок сабмодулей в результате не зависит от режима парсинга.
+        submodules - заранее отобранные сабмодули (по умолчанию ищутся все).
+        index - индекс целей для селекторов --only/--skip, заполняется по ходу разбора.
         """
         result = {}
-        submodules = self.find_submodules()
-
-        for submodule_path in submodules:
-            submodule_name = os.path.basename(submodule_path)
-            cfg_path = self.find_cfg_yaml(submodule_path)
+        if submodules is None:
+            submodules = list(self.iter_submodules())
+        parsed = self._map_submodules(submodules, target_stages)
 
-            if not cfg_path:
-                print(f"cfg.yaml не найден в сабмодуле {submodule_name}")
-                continue
+        for entry, submodule_targets in zip(submodules, parsed):
+            submodule_name = self.submodule_name(entry)
 
-            cfg_data = self.parse_cfg_yaml(cfg_path)
-            if not cfg_data:
+            if submodule_targets is None:
+                logger.warning(f"cfg.yaml не найден в сабмодуле {submodule_name}")
                 continue
 
-            submodule_targets = {}
-
-            for stage in target_stages:
-                targets = self.get_targets_for_stage(cfg_data, stage)
-                if targets:
-                    # Обогащаем каждую цель дополнительной информацией
-                    enriched_targets = []
-                    for target_config in targets:
-                        target_name, variables, options = self.extract_target_info(
-                            target_config
-                        )
-
-                        enriched_target = {
-                            "target": target_name,
-                            "variables": variables,
-                            "options": options,
-                            "original_config": target_config,
-                        }
-                        enriched_targets.append(enriched_target)
-
-                    submodule_targets[stage] = enriched_targets
-
             if submodule_targets:
                 # Добавляем путь к сабмодулю
-                submodule_targets["submodule_path"] = submodule_path
+                submodule_targets["submodule_path"] = entry.path
                 result[submodule_name] = submodule_targets
-                print(f"Обработан сабмодуль: {submodule_name}")
+                if index is not None:
+                    index.add(submodule_name, submodule_targets)
+                logger.info(f"Обработан сабмодуль: {submodule_name}")
+
+        if self.cache is not None:
+            self.cache.save()
 
         return result
 
@@ -167,7 +342,7 @@ class ConfigParser:
             if stage in supported_stages:
                 valid_stages.append(stage)
             else:
-                print(
+                logger.warning(
                     f"Предупреждение: стадия '{stage}' не поддерживается. Поддерживаемые: {supported_stages}"
                 )
 
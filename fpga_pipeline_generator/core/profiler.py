@@ -0,0 +1,136 @@
+"""
+Модуль профилирования генерации: время фаз, счетчики и экспорт трассы.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Any
+
+from .constants import PROFILE_FORMATS
+
+
+class NullProfiler:
+    """Профилировщик-заглушка: используется, когда --profile не задан."""
+
+    enabled = False
+    _null_phase = nullcontext()
+
+    def phase(self, name: str) -> nullcontext:
+        """Ничего не замеряет."""
+        return self._null_phase
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Ничего не считает."""
+
+
+class Profiler:
+    """Замеряет фазы генерации и накапливает счетчики."""
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.counters: Dict[str, int] = {}
+        self._events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Замеряет время (и пиковую память) блока кода."""
+        if self.trace_memory and hasattr(tracemalloc, "reset_peak"):
+            # Python 3.9+: пик считается отдельно для каждой фазы
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            event = {
+                "name": name,
+                "start": start - self._origin,
+                "duration": time.perf_counter() - start,
+                "tid": threading.get_ident(),
+            }
+            if self.trace_memory:
+                event["peak_kib"] = tracemalloc.get_traced_memory()[1] // 1024
+            self._events.append(event)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Увеличивает счетчик."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> Dict[str, Any]:
+        """Сводка: суммарное время фаз в порядке первого запуска и счетчики."""
+        phases: Dict[str, Dict[str, Any]] = {}
+        for event in self._events:
+            phase = phases.setdefault(event["name"], {"seconds": 0.0, "calls": 0})
+            phase["seconds"] = round(phase["seconds"] + event["duration"], 6)
+            phase["calls"] += 1
+            if "peak_kib" in event:
+                phase["peak_kib"] = max(phase.get("peak_kib", 0), event["peak_kib"])
+        # Фазы завершаются изнутри наружу, а выводятся в порядке начала
+        ordered = sorted(phases, key=lambda name: min(
+            e["start"] for e in self._events if e["name"] == name
+        ))
+        return {
+            "total_seconds": round(time.perf_counter() - self._origin, 6),
+            "phases": {name: phases[name] for name in ordered},
+            "counters": dict(self.counters),
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Трасса в формате Chrome trace-event."""
+        pid = os.getpid()
+        trace_events = [
+            {
+                "name": event["name"],
+                "cat": "phase",
+                "ph": "X",
+                "ts": round(event["start"] * 1e6, 3),
+                "dur": round(event["duration"] * 1e6, 3),
+                "pid": pid,
+                "tid": event["tid"],
+                "args": {"peak_kib": event["peak_kib"]} if "peak_kib" in event else {},
+            }
+            for event in self._events
+        ]
+        end = max((e["start"] + e["duration"] for e in self._events), default=0.0)
+        trace_events.append(
+            {
+                "name": "counters",
+                "ph": "C",
+                "ts": round(end * 1e6, 3),
+                "pid": pid,
+                "args": dict(self.counters),
+            }
+        )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def render(self, profile_format: str = "json") -> str:
+        """Сериализует отчет в выбранном формате."""
+        if profile_format == "chrome":
+            return json.dumps(self.chrome_trace(), ensure_ascii=False)
+        return json.dumps(self.summary(), ensure_ascii=False, indent=2)
+
+    def format_summary(self) -> str:
+        """Краткий текстовый отчет."""
+        summary = self.summary()
+        lines = [f"Профиль генерации ({summary['total_seconds'] * 1000:.1f} мс):"]
+        for name, phase in summary["phases"].items():
+            memory = f", пик {phase['peak_kib']} КиБ" if "peak_kib" in phase else ""
+            lines.append(f"  {name:<12} {phase['seconds'] * 1000:10.1f} мс{memory}")
+        for name, value in summary["counters"].items():
+            lines.append(f"  {name}: {value}")
+        return "\n".join(lines)
+
+
+def profile_file_path(output_file: str, profile_format: str = "json") -> str:
+    """Путь к отчету профилирования рядом с выходным файлом."""
+    root, _ = os.path.splitext(output_file)
+    suffix = ".trace.json" if profile_format == "chrome" else ".profile.json"
+    return root + suffix
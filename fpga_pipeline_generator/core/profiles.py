@@ -0,0 +1,62 @@
+"""
+Модуль именованных профилей стадий.
+
+Профиль - набор стадий с собственным выходным файлом. Несколько профилей
+генерируются за один запуск: дерево сабмодулей обходится и разбирается один
+раз для объединения их стадий.
+"""
+
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class StageProfile(NamedTuple):
+    """Профиль: имя, стадии и выходной файл (None - рядом с основным)."""
+
+    name: str
+    stages: List[str]
+    output: Optional[str] = None
+
+
+def split_stages(value: Any) -> List[str]:
+    """Список стадий из строки через запятую или списка."""
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(stage).strip() for stage in value or [] if str(stage).strip()]
+
+
+def parse_profile_arg(value: str) -> StageProfile:
+    """Разбирает аргумент --profile-stages вида name=elab,synth."""
+    name, sep, stages = value.partition("=")
+    name = name.strip()
+    if not sep or not name or not split_stages(stages):
+        raise ValueError(
+            f"Неверный профиль '{value}': ожидается имя=стадия[,стадия...]"
+        )
+    return StageProfile(name, split_stages(stages))
+
+
+def load_profiles(profiles_config: Dict[str, Any]) -> List[StageProfile]:
+    """
+    Профили из секции profiles конфигурации. Значение - стадии (строка через
+    запятую или список) или словарь с ключами stages и output.
+    """
+    profiles = []
+    for name, spec in (profiles_config or {}).items():
+        output = None
+        if isinstance(spec, dict):
+            output = spec.get("output")
+            spec = spec.get("stages")
+        stages = split_stages(spec)
+        if not stages:
+            raise ValueError(f"В профиле '{name}' не заданы стадии")
+        profiles.append(StageProfile(str(name), stages, output))
+    return profiles
+
+
+def profile_output_path(output_file: str, profile: StageProfile) -> str:
+    """Выходной файл профиля: заданный явно или <имя>.<профиль><расширение>."""
+    if profile.output:
+        return profile.output
+    root, ext = os.path.splitext(output_file)
+    return f"{root}.{profile.name}{ext}"
@@ -0,0 +1,133 @@
+"""
+Модуль кэша готовых пайплайнов.
+
+Пайплайн хранится по дайджесту всех входных данных запуска: итоговой
+конфигурации, списка стадий, исходников шаблонов и других входных файлов
+(например, истории длительностей задач), версии генератора и отпечатков
+найденных cfg.yaml. Если дайджест совпал, парсинг и рендеринг не нужны -
+результат будет тем же.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..utils.discovery import SubmoduleEntry
+from ..utils.file_utils import FileUtils
+from .constants import FINGERPRINT_MODES
+
+logger = logging.getLogger(__name__)
+
+
+def cfg_fingerprint(cfg_path: str, mode: str = "content") -> str:
+    """Отпечаток cfg.yaml; пустая строка, если файл недоступен."""
+    try:
+        if mode == "mtime":
+            st = os.stat(cfg_path)
+            return f"{st.st_size}:{st.st_mtime_ns}"
+        with open(cfg_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+class RunCache:
+    """
+    Кэш пайплайнов по дайджесту входных данных запуска.
+
+    Каждый пайплайн хранится отдельным файлом <dir>/runs/<дайджест>.out;
+    хранятся max_entries последних использованных, остальные удаляются.
+    """
+
+    VERSION = 1
+    SUBDIR = "runs"
+
+    def __init__(self, cache_dir: str, fingerprint: str = "content", max_entries: int = 16):
+        if fingerprint not in FINGERPRINT_MODES:
+            raise ValueError(
+                f"Неизвестный способ отпечатка '{fingerprint}'. "
+                f"Допустимые: {list(FINGERPRINT_MODES)}"
+            )
+        self.cache_dir = os.path.join(cache_dir, self.SUBDIR)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+
+    def digest(
+        self,
+        config: Dict[str, Any],
+        stages: List[str],
+        input_files: Iterable[str],
+        submodules: Iterable[SubmoduleEntry],
+        version: str,
+        extra: Iterable[str] = (),
+    ) -> str:
+        """
+        Дайджест входных данных запуска; input_files - шаблоны и другие входные
+        файлы, extra - прочие строки, от которых зависит результат.
+        """
+        h = hashlib.sha256()
+
+        def feed(*parts: Any) -> None:
+            for part in parts:
+                h.update(str(part).encode("utf-8"))
+                h.update(b"\0")
+
+        feed(self.VERSION, version, self.fingerprint, ",".join(stages))
+        feed(json.dumps(config, sort_keys=True, ensure_ascii=False, default=str))
+        feed(*extra)
+
+        for input_file in input_files:
+            feed(input_file)
+            try:
+                with open(input_file, "rb") as f:
+                    h.update(f.read())
+            except OSError:
+                feed("missing")
+
+        for entry in submodules:
+            feed(entry.path, entry.rel_path, entry.cfg_path)
+            if entry.cfg_path:
+                feed(cfg_fingerprint(entry.cfg_path, self.fingerprint))
+
+        return h.hexdigest()
+
+    def _entry_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f"{digest}.out")
+
+    def lookup(self, digest: str) -> Optional[str]:
+        """Возвращает сохраненный пайплайн или None."""
+        path = self._entry_path(digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = f.read()
+            # По mtime выбираются записи для удаления - обновляем его при попадании
+            os.utime(path)
+        except OSError:
+            return None
+        return content
+
+    def store(self, digest: str, content: str) -> None:
+        """Сохраняет пайплайн и удаляет самые старые записи."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with FileUtils.atomic_write(self._entry_path(digest)) as f:
+                f.write(content)
+            self._prune()
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить пайплайн в кэш {self.cache_dir}: {e}")
+
+    def _prune(self) -> None:
+        """Оставляет max_entries последних использованных записей."""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".out"):
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries:]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
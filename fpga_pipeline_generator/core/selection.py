@@ -0,0 +1,191 @@
+"""
+Модуль отбора целей: селекторы --only/--skip и индекс целей.
+
+Селектор - одно или несколько условий через запятую, которые должны
+выполняться одновременно:
+  submodule:GLOB - имя сабмодуля
+  target:GLOB    - имя цели
+  KEY=GLOB       - значение переменной цели
+  GLOB           - имя сабмодуля или имя цели
+Шаблоны - в стиле fnmatch (*, ?, [...]), с учетом регистра.
+"""
+
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Ссылка на цель: сабмодуль, стадия и позиция цели в списке стадии
+TargetRef = Tuple[str, str, int]
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+class Clause(NamedTuple):
+    """Условие селектора."""
+
+    kind: str  # submodule, target, variable или name (сабмодуль или цель)
+    pattern: str
+    key: Optional[str] = None
+
+
+def parse_selector(text: str) -> Tuple[Clause, ...]:
+    """Разбирает селектор вида 'submodule:ip_*,BOARD=vcu118'."""
+    clauses = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        kind, sep, pattern = part.partition(":")
+        if sep and kind in ("submodule", "target"):
+            clauses.append(Clause(kind, pattern))
+        elif "=" in part:
+            key, _, pattern = part.partition("=")
+            clauses.append(Clause("variable", pattern, key.strip()))
+        else:
+            clauses.append(Clause("name", part))
+    if not clauses or any(not clause.pattern for clause in clauses):
+        raise ValueError(f"Неверный селектор целей '{text}'")
+    return tuple(clauses)
+
+
+def _matching_keys(mapping: Dict[str, Any], pattern: str) -> List[str]:
+    """Ключи, подходящие под шаблон; без символов шаблона - прямой поиск."""
+    if not _GLOB_CHARS.intersection(pattern):
+        return [pattern] if pattern in mapping else []
+    return [key for key in mapping if fnmatchcase(key, pattern)]
+
+
+class TargetIndex:
+    """
+    Индекс целей по имени сабмодуля, имени цели и переменным.
+
+    Селектор разрешается поиском по индексу: шаблон сравнивается только с
+    различными именами и значениями, а не со всеми целями.
+    """
+
+    def __init__(self):
+        self.submodules: Dict[str, List[TargetRef]] = {}
+        self.targets: Dict[str, List[TargetRef]] = {}
+        self.variables: Dict[str, Dict[str, List[TargetRef]]] = {}
+
+    @classmethod
+    def from_parsed(cls, parsed_data: Dict[str, Dict[str, Any]]) -> "TargetIndex":
+        """Строит индекс по уже разобранным сабмодулям."""
+        index = cls()
+        for submodule_name, submodule_targets in parsed_data.items():
+            index.add(submodule_name, submodule_targets)
+        return index
+
+    def add(self, submodule_name: str, submodule_targets: Dict[str, Any]) -> None:
+        """Добавляет цели сабмодуля ({стадия: [Target...]})."""
+        refs = self.submodules.setdefault(submodule_name, [])
+        for stage, targets in submodule_targets.items():
+            if stage == "submodule_path":
+                continue
+            for position, target in enumerate(targets):
+                ref = (submodule_name, stage, position)
+                refs.append(ref)
+                self.targets.setdefault(target.name, []).append(ref)
+                for name, value in target.variables:
+                    self.variables.setdefault(name, {}).setdefault(value, []).append(ref)
+
+    def all_refs(self) -> Set[TargetRef]:
+        """Все цели индекса."""
+        return {ref for refs in self.submodules.values() for ref in refs}
+
+    def lookup(self, clause: Clause) -> Set[TargetRef]:
+        """Цели, удовлетворяющие условию."""
+        found: Set[TargetRef] = set()
+        if clause.kind in ("submodule", "name"):
+            for name in _matching_keys(self.submodules, clause.pattern):
+                found.update(self.submodules[name])
+        if clause.kind in ("target", "name"):
+            for name in _matching_keys(self.targets, clause.pattern):
+                found.update(self.targets[name])
+        if clause.kind == "variable":
+            for key in _matching_keys(self.variables, clause.key):
+                values = self.variables[key]
+                for value in _matching_keys(values, clause.pattern):
+                    found.update(values[value])
+        return found
+
+    def resolve(self, selector: Tuple[Clause, ...]) -> Set[TargetRef]:
+        """Цели, удовлетворяющие всем условиям селектора."""
+        # Сначала самые избирательные условия: пересечение сразу становится маленьким
+        found = sorted((self.lookup(clause) for clause in selector), key=len)
+        return set.intersection(*found)
+
+
+class Selection:
+    """Отбор целей по селекторам only (оставить) и skip (исключить)."""
+
+    def __init__(self, only: Iterable[str] = (), skip: Iterable[str] = ()):
+        self.only = [parse_selector(text) for text in only or ()]
+        self.skip = [parse_selector(text) for text in skip or ()]
+
+    @property
+    def active(self) -> bool:
+        """Заданы ли селекторы."""
+        return bool(self.only or self.skip)
+
+    @staticmethod
+    def _submodule_match(selector: Tuple[Clause, ...], name: str) -> Optional[bool]:
+        """
+        Подходит ли сабмодуль под условия submodule: селектора; None - без
+        условий на сабмодуль это не определить до разбора cfg.yaml.
+        """
+        clauses = [clause for clause in selector if clause.kind == "submodule"]
+        if not clauses:
+            return None
+        return all(fnmatchcase(name, clause.pattern) for clause in clauses)
+
+    def keeps_submodule(self, name: str) -> bool:
+        """
+        Может ли сабмодуль дать хоть одну отобранную цель. Сабмодули, для которых
+        ответ известен по имени, отбрасываются до разбора cfg.yaml.
+        """
+        for selector in self.skip:
+            if all(clause.kind == "submodule" for clause in selector) and self._submodule_match(
+                selector, name
+            ):
+                return False
+        if not self.only:
+            return True
+        return any(self._submodule_match(selector, name) is not False for selector in self.only)
+
+    def select(self, index: TargetIndex) -> Set[TargetRef]:
+        """Отобранные цели индекса."""
+        if self.only:
+            selected: Set[TargetRef] = set()
+            for selector in self.only:
+                selected |= index.resolve(selector)
+        else:
+            selected = index.all_refs()
+        for selector in self.skip:
+            selected -= index.resolve(selector)
+        return selected
+
+    def apply(
+        self, parsed_data: Dict[str, Dict[str, Any]], index: Optional[TargetIndex] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Оставляет в разобранных данных только отобранные цели (порядок сохраняется)."""
+        if index is None:
+            index = TargetIndex.from_parsed(parsed_data)
+        selected = self.select(index)
+
+        result: Dict[str, Dict[str, Any]] = {}
+        for submodule_name, submodule_targets in parsed_data.items():
+            kept: Dict[str, Any] = {}
+            for stage, targets in submodule_targets.items():
+                if stage == "submodule_path":
+                    continue
+                stage_targets = [
+                    target
+                    for position, target in enumerate(targets)
+                    if (submodule_name, stage, position) in selected
+                ]
+                if stage_targets:
+                    kept[stage] = stage_targets
+            if kept:
+                kept["submodule_path"] = submodule_targets["submodule_path"]
+                result[submodule_name] = kept
+        return result
@@ -0,0 +1,140 @@
+"""
+Модуль разбиения пайплайна на несколько дочерних пайплайнов.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Any
+
+from .constants import SHARD_MODES
+from .model import JobSpec
+
+
+@dataclass
+class Shard:
+    """Часть пайплайна, которая записывается в отдельный файл."""
+
+    name: str
+    stages: List[str]
+    job_contexts: List[JobSpec] = field(default_factory=list)
+
+
+def _ordered_stages(job_contexts: List[JobSpec], stages: List[str]) -> List[str]:
+    """Возвращает стадии, в которых есть задачи, в исходном порядке."""
+    used = {job_context.stage for job_context in job_contexts}
+    return [stage for stage in stages if stage in used]
+
+
+def split_by_stage(job_contexts: List[JobSpec], stages: List[str]) -> List[Shard]:
+    """Одна часть на стадию."""
+    shards = []
+    for stage in stages:
+        contexts = [c for c in job_contexts if c.stage == stage]
+        if contexts:
+            shards.append(Shard(stage, [stage], contexts))
+    return shards
+
+
+def split_by_submodule(
+    job_contexts: List[JobSpec], stages: List[str], shard_count: int
+) -> List[Shard]:
+    """
+    Делит сабмодули на shard_count частей с примерно равным числом задач.
+    Задачи одного сабмодуля всегда попадают в одну часть.
+    """
+    groups: Dict[str, List[JobSpec]] = {}
+    for job_context in job_contexts:
+        groups.setdefault(job_context.submodule, []).append(job_context)
+
+    shard_count = max(1, min(shard_count, len(groups)))
+    target_size = len(job_contexts) / shard_count
+
+    buckets: List[List[JobSpec]] = [[]]
+    for contexts in groups.values():
+        # Переходим к следующей части, когда текущая набрала свою долю задач
+        if buckets[-1] and len(buckets) < shard_count:
+            filled = sum(len(bucket) for bucket in buckets)
+            if filled >= target_size * len(buckets):
+                buckets.append([])
+        buckets[-1].extend(contexts)
+
+    return [
+        Shard(f"{index:02d}", _ordered_stages(bucket, stages), bucket)
+        for index, bucket in enumerate(buckets, 1)
+    ]
+
+
+def split_by_count(
+    job_contexts: List[JobSpec], stages: List[str], max_jobs: int
+) -> List[Shard]:
+    """Делит задачи на части не больше max_jobs задач."""
+    max_jobs = max(1, max_jobs)
+    shards = []
+    for start in range(0, len(job_contexts), max_jobs):
+        bucket = job_contexts[start:start + max_jobs]
+        shards.append(Shard(f"{len(shards) + 1:02d}", _ordered_stages(bucket, stages), bucket))
+    return shards
+
+
+def split_jobs(
+    job_contexts: List[JobSpec], stages: List[str], sharding_config: Dict[str, Any]
+) -> List[Shard]:
+    """Разбивает задачи согласно секции sharding конфигурации."""
+    mode = sharding_config.get("by", "count")
+    if mode not in SHARD_MODES:
+        raise ValueError(f"Неизвестный способ разбиения '{mode}'. Допустимые: {list(SHARD_MODES)}")
+
+    if mode == "stage":
+        return split_by_stage(job_contexts, stages)
+    if mode == "submodule":
+        return split_by_submodule(job_contexts, stages, sharding_config.get("shards", 4))
+    return split_by_count(job_contexts, stages, sharding_config.get("max_jobs", 500))
+
+
+def shard_file_path(output_file: str, shard: Shard) -> str:
+    """Путь к файлу части рядом с основным выходным файлом."""
+    root, ext = os.path.splitext(output_file)
+    return f"{root}.shard-{shard.name}{ext or '.yml'}"
+
+
+def build_trigger_manifest(
+    shards: List[Shard], shard_files: List[str], sharding_config: Dict[str, Any], by_stage: bool
+) -> Dict[str, Any]:
+    """
+    Строит пайплайн-манифест, который запускает части как дочерние пайплайны.
+
+    Манифест сам является дочерним пайплайном, поэтому файлы частей сначала
+    забираются из задачи-генератора родительского пайплайна через
+    needs:pipeline ($PARENT_PIPELINE_ID), а затем подключаются через
+    trigger:include:artifact.
+    """
+    fetch_job = sharding_config.get("fetch_job", "fetch-pipeline-shards")
+    fetch_stage = "fetch-shards"
+    # При разбиении по стадиям части запускаются последовательно, стадия за стадией
+    trigger_stages = [f"shard-{shard.name}" for shard in shards] if by_stage else ["shards"]
+
+    fetch = {
+        "stage": fetch_stage,
+        "variables": {"GIT_STRATEGY": "none"},
+        "needs": [
+            {
+                "pipeline": "$PARENT_PIPELINE_ID",
+                "job": sharding_config.get("generator_job", "generate-dynamic-targets"),
+            }
+        ],
+        "script": [f"ls -l {' '.join(shard_files)}"],
+        "artifacts": {"paths": list(shard_files)},
+    }
+    if sharding_config.get("fetch_tags"):
+        fetch["tags"] = list(sharding_config["fetch_tags"])
+
+    manifest: Dict[str, Any] = {"stages": [fetch_stage, *trigger_stages], fetch_job: fetch}
+    for index, (shard, shard_file) in enumerate(zip(shards, shard_files)):
+        manifest[f"shard-{shard.name}"] = {
+            "stage": trigger_stages[index] if by_stage else trigger_stages[0],
+            "trigger": {
+                "include": [{"artifact": shard_file, "job": fetch_job}],
+                "strategy": "depend",
+            },
+        }
+    return manifest
@@ -0,0 +1,356 @@
+"""
+Модуль проверки cfg.yaml (--check).
+
+Файл не преобразуется в Python объекты: обходится дерево узлов YAML, поэтому
+у каждой ошибки есть номер строки. Проверяются ключи стадий, структура целей
+по схеме TARGET_SCHEMA, формат variables/vars/options/artifacts, повторяющиеся
+ключи и цели, а по всему дереву - совпадения имен задач.
+"""
+
+import os
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..utils import yaml_io
+from .matrix import matrix_job_name
+
+# Схема цели: ключ -> (допустимые виды узла, обязательный ли ключ)
+TARGET_SCHEMA = {
+    "target": (("str", "int"), True),
+    "variables": (("map", "seq"), False),
+    "vars": (("seq",), False),
+    "options": (("seq",), False),
+    "artifacts": (("seq",), False),
+}
+
+# Виды узлов YAML по тегу скаляра; остальные теги считаются строками
+_SCALAR_KINDS = {
+    "tag:yaml.org,2002:str": "str",
+    "tag:yaml.org,2002:int": "int",
+    "tag:yaml.org,2002:float": "float",
+    "tag:yaml.org,2002:bool": "bool",
+    "tag:yaml.org,2002:null": "null",
+}
+_VALUE_KINDS = frozenset(("str", "int", "float", "bool"))
+_KIND_NAMES = {
+    "map": "словарь",
+    "seq": "список",
+    "str": "строка",
+    "int": "число",
+    "float": "число",
+    "bool": "логическое значение",
+    "null": "пустое значение",
+}
+
+# Число файлов, начиная с которого проверка идет в нескольких процессах
+PROCESS_THRESHOLD = 1000
+
+
+def _compile_schema(
+    schema: Dict[str, Tuple[Tuple[str, ...], bool]]
+) -> Tuple[Dict[str, frozenset], Tuple[str, ...]]:
+    """Переводит схему в таблицу допустимых видов узлов и список обязательных ключей."""
+    allowed = {key: frozenset(kinds) for key, (kinds, _) in schema.items()}
+    required = tuple(key for key, (_, is_required) in schema.items() if is_required)
+    return allowed, required
+
+
+# Схема компилируется один раз при импорте модуля
+_TARGET_KEYS, _REQUIRED_KEYS = _compile_schema(TARGET_SCHEMA)
+
+
+class Problem(NamedTuple):
+    """Ошибка в cfg.yaml; line = 0 - ошибка относится к файлу целиком."""
+
+    path: str
+    line: int
+    message: str
+
+    def __str__(self) -> str:
+        if self.line:
+            return f"{self.path}:{self.line}: {self.message}"
+        return f"{self.path}: {self.message}"
+
+
+class TargetRecord(NamedTuple):
+    """Цель, найденная при проверке (для поиска совпадений имен задач)."""
+
+    stage: str
+    name: str
+    line: int
+    # Есть ли у цели переменные (только такие цели объединяются в матрицу)
+    has_variables: bool = False
+
+
+class FileReport(NamedTuple):
+    """Результат проверки одного cfg.yaml."""
+
+    problems: List[Problem]
+    targets: List[TargetRecord]
+
+
+def _kind(node: Any) -> str:
+    """Вид узла: map, seq или вид скаляра."""
+    if node.id == "mapping":
+        return "map"
+    if node.id == "sequence":
+        return "seq"
+    return _SCALAR_KINDS.get(node.tag, "str")
+
+
+def _line(node: Any) -> int:
+    return node.start_mark.line + 1
+
+
+class _FileChecker:
+    """Проверка одного файла; ошибки накапливаются, а не прерывают проверку."""
+
+    def __init__(self, cfg_path: str, supported_stages: List[str]):
+        self.cfg_path = cfg_path
+        self.supported_stages = supported_stages
+        self.problems: List[Problem] = []
+        self.targets: List[TargetRecord] = []
+
+    def report(self, node: Any, message: str) -> None:
+        self.problems.append(Problem(self.cfg_path, _line(node) if node else 0, message))
+
+    def items(self, node: Any) -> Iterable[Tuple[str, Any, Any]]:
+        """Пары словаря; повторяющиеся и нескалярные ключи - ошибка."""
+        seen: Dict[str, int] = {}
+        for key_node, value_node in node.value:
+            if key_node.id != "scalar":
+                self.report(key_node, "ключ должен быть строкой")
+                continue
+            key = key_node.value
+            if key in seen:
+                # PyYAML молча берет последнее значение
+                self.report(key_node, f"повторяющийся ключ '{key}' (первый - в строке {seen[key]})")
+                continue
+            seen[key] = _line(key_node)
+            yield key, key_node, value_node
+
+    def check(self, root: Any) -> None:
+        """Проверяет корень cfg.yaml: словарь стадия -> список целей."""
+        if root is None:
+            return
+        if _kind(root) != "map":
+            self.report(root, "cfg.yaml должен быть словарем стадий")
+            return
+
+        for stage, key_node, stage_node in self.items(root):
+            supported = stage in self.supported_stages
+            if not supported:
+                self.report(
+                    key_node,
+                    f"неизвестная стадия '{stage}', поддерживаемые: {self.supported_stages}",
+                )
+            kind = _kind(stage_node)
+            if kind == "null":
+                continue
+            if kind != "seq":
+                self.report(
+                    stage_node,
+                    f"стадия '{stage}' должна быть списком целей, а не {_KIND_NAMES[kind]}",
+                )
+                continue
+
+            seen: Dict[str, int] = {}
+            for target_node in stage_node.value:
+                record = self.check_target(stage, target_node)
+                if record is None:
+                    continue
+                if record.name in seen:
+                    self.report(
+                        target_node,
+                        f"цель '{record.name}' уже есть в стадии '{stage}' "
+                        f"(строка {seen[record.name]})",
+                    )
+                    continue
+                seen[record.name] = record.line
+                if supported:
+                    self.targets.append(record)
+
+    def check_target(self, stage: str, node: Any) -> Optional[TargetRecord]:
+        """Проверяет цель по схеме; возвращает ее описание или None."""
+        if _kind(node) != "map":
+            self.report(node, f"цель в стадии '{stage}' должна быть словарем с ключом target")
+            return None
+
+        fields: Dict[str, Any] = {}
+        for key, key_node, value_node in self.items(node):
+            allowed = _TARGET_KEYS.get(key)
+            if allowed is None:
+                self.report(
+                    key_node, f"неизвестный ключ цели '{key}', допустимые: {list(TARGET_SCHEMA)}"
+                )
+                continue
+            kind = _kind(value_node)
+            if kind not in allowed:
+                expected = " или ".join(_KIND_NAMES[k] for k in TARGET_SCHEMA[key][0])
+                self.report(
+                    value_node, f"'{key}' должен быть {expected}, а не {_KIND_NAMES[kind]}"
+                )
+                continue
+            fields[key] = value_node
+
+        for key in _REQUIRED_KEYS:
+            if key not in fields:
+                self.report(node, f"у цели в стадии '{stage}' нет ключа '{key}'")
+        if "variables" in fields and "vars" in fields:
+            self.report(fields["vars"], "заданы и variables, и vars: vars будет проигнорирован")
+
+        variables = fields.get("variables")
+        if variables is not None and _kind(variables) == "map":
+            for name, _, value_node in self.items(variables):
+                if _kind(value_node) not in _VALUE_KINDS:
+                    self.report(
+                        value_node,
+                        f"значение переменной '{name}' должно быть скаляром, "
+                        f"а не {_KIND_NAMES[_kind(value_node)]}",
+                    )
+        elif variables is not None:
+            self.check_assignments("variables", variables)
+        if "vars" in fields:
+            self.check_assignments("vars", fields["vars"])
+
+        for option_node in getattr(fields.get("options"), "value", ()):
+            if _kind(option_node) not in _VALUE_KINDS:
+                self.report(option_node, "элемент options должен быть строкой")
+
+        for path_node in getattr(fields.get("artifacts"), "value", ()):
+            self.check_artifact_path(path_node)
+
+        if "target" not in fields:
+            return None
+        has_variables = any(
+            getattr(fields.get(key), "value", None) for key in ("variables", "vars")
+        )
+        return TargetRecord(stage, str(fields["target"].value), _line(node), has_variables)
+
+    def check_artifact_path(self, node: Any) -> None:
+        """
+        Путь артефакта - точный путь или шаблон без '**' внутри каталога
+        сабмодуля: рекурсивный обход больших каталогов Vivado занимает минуты.
+        """
+        if _kind(node) != "str" or not node.value:
+            self.report(node, "элемент artifacts должен быть строкой с путем")
+            return
+        path = node.value
+        if "**" in path:
+            self.report(node, f"рекурсивный шаблон '**' в пути артефакта '{path}'")
+        if path.startswith("/") or ".." in path.split("/"):
+            self.report(node, f"путь артефакта '{path}' должен быть внутри сабмодуля")
+
+    def check_assignments(self, key: str, node: Any) -> None:
+        """Элементы списка переменных должны иметь вид ИМЯ=значение."""
+        for item in node.value:
+            name, sep, _ = item.value.partition("=") if _kind(item) == "str" else ("", "", "")
+            if not sep or not name.strip():
+                self.report(item, f"элемент {key} должен быть строкой ИМЯ=значение")
+
+
+def validate_cfg(cfg_path: str, supported_stages: List[str]) -> FileReport:
+    """Проверяет один cfg.yaml и возвращает все найденные ошибки."""
+    checker = _FileChecker(cfg_path, supported_stages)
+    try:
+        with open(cfg_path, "rb") as f:
+            content = f.read()
+        root = yaml_io.compose(content.decode("utf-8"))
+    except OSError as e:
+        checker.report(None, f"не удалось прочитать файл: {e}")
+    except UnicodeDecodeError:
+        checker.report(None, "файл не в кодировке UTF-8")
+    except yaml_io.YAMLError as e:
+        mark = getattr(e, "problem_mark", None)
+        problem = getattr(e, "problem", None) or str(e)
+        checker.problems.append(
+            Problem(cfg_path, mark.line + 1 if mark else 0, f"ошибка синтаксиса YAML: {problem}")
+        )
+    else:
+        checker.check(root)
+    return FileReport(checker.problems, checker.targets)
+
+
+def validate_files(
+    cfg_paths: List[str],
+    supported_stages: List[str],
+    parallel: str = "serial",
+    workers: Optional[int] = None,
+) -> List[FileReport]:
+    """
+    Проверяет файлы в выбранном режиме (serial, thread или process) с
+    сохранением порядка. В режиме serial большие деревья (от PROCESS_THRESHOLD
+    файлов) все равно проверяются в нескольких процессах.
+    """
+    if parallel == "serial" and len(cfg_paths) >= PROCESS_THRESHOLD:
+        parallel = "process"
+    if parallel == "serial" or len(cfg_paths) < 2:
+        return [validate_cfg(path, supported_stages) for path in cfg_paths]
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    if parallel == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(validate_cfg, cfg_paths, repeat(supported_stages)))
+
+    chunksize = max(1, len(cfg_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(validate_cfg, cfg_paths, repeat(supported_stages), chunksize=chunksize)
+        )
+
+
+def _matrix_records(
+    records: List[TargetRecord], submodule: str, job_name: Callable[[str, str, str], str]
+) -> List[Tuple[str, int, bool]]:
+    """
+    Имена задач с матрицей, которые получит сабмодуль в режиме matrix. Считается,
+    что цели стадии с переменными образуют одну матрицу (если их хотя бы две).
+    """
+    by_stage: Dict[str, List[TargetRecord]] = {}
+    for record in records:
+        if record.has_variables:
+            by_stage.setdefault(record.stage, []).append(record)
+    taken = {job_name(record.stage, record.name, submodule) for record in records}
+    return [
+        (matrix_job_name(job_name, stage, submodule, taken), group[0].line, True)
+        for stage, group in by_stage.items()
+        if len(group) >= 2
+    ]
+
+
+def find_job_collisions(
+    reports: Iterable[Tuple[str, str, FileReport]],
+    job_name: Callable[[str, str, str], str],
+    matrix: bool = False,
+) -> List[Problem]:
+    """
+    Ищет задачи с одинаковыми именами в разных местах дерева.
+    reports - тройки (сабмодуль, путь к cfg.yaml, результат проверки);
+    matrix - учитывать имена задач с матрицей (output.matrix).
+    """
+    problems = []
+    seen: Dict[str, Tuple[str, int, bool]] = {}
+    for submodule, cfg_path, report in reports:
+        names = [
+            (job_name(record.stage, record.name, submodule), record.line, False)
+            for record in report.targets
+        ]
+        if matrix:
+            names.extend(_matrix_records(report.targets, submodule, job_name))
+        for name, line, is_matrix in names:
+            first = seen.get(name)
+            if first is None:
+                seen[name] = (cfg_path, line, is_matrix)
+                continue
+            what = "имя матрицы" if is_matrix else "имя задачи"
+            other = "матрицей" if first[2] else "задачей"
+            problems.append(
+                Problem(
+                    cfg_path,
+                    line,
+                    f"{what} '{name}' совпадает с {other} из {first[0]}:{first[1]}",
+                )
+            )
+    return problems
@@ -0,0 +1,295 @@
+"""
+Модуль режима наблюдения: пересборка пайплайна при изменении cfg.yaml.
+
+Разобранные сабмодули и скомпилированные шаблоны остаются в памяти, а при
+изменении заново разбираются только затронутые cfg.yaml.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import socketserver
+import sys
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from ..utils.discovery import SubmoduleEntry
+from ..utils.file_utils import FileUtils
+from .constants import WATCH_BACKENDS
+
+logger = logging.getLogger(__name__)
+
+# Отпечаток cfg.yaml: размер, mtime и inode (атомарная замена меняет inode)
+CfgStamp = Tuple[int, int, int]
+
+
+class PollingWatcher:
+    """Ожидание изменений опросом: просто пауза между проверками."""
+
+    name = "poll"
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+
+    def watch(self, directories: List[str]) -> None:
+        """Опросу не нужно регистрировать каталоги."""
+
+    def wait(self) -> None:
+        """Ждет до следующей проверки."""
+        time.sleep(self.interval)
+
+    def close(self) -> None:
+        """Освобождать нечего."""
+
+
+class InotifyWatcher:
+    """
+    Ожидание изменений через inotify (вызывается через ctypes, без зависимостей).
+
+    Наблюдаются каталоги, а не файлы: редакторы и git заменяют cfg.yaml через
+    переименование. Событие только будит цикл - что изменилось, определяется
+    сравнением отпечатков, поэтому переполнение очереди событий не опасно.
+    """
+
+    name = "inotify"
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    MASK = (
+        IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+        | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    )
+    # Пауза, за которую собираются события одной записи файла
+    DEBOUNCE = 0.05
+
+    def __init__(self, interval: float = 1.0):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify доступен только в Linux")
+        self.interval = interval
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watched: Dict[str, int] = {}
+
+    def watch(self, directories: List[str]) -> None:
+        """Добавляет наблюдение за каталогами, которые еще не наблюдаются."""
+        for directory in directories:
+            if directory in self._watched:
+                continue
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), self.MASK
+            )
+            # Каталог мог исчезнуть - это заметит следующее сравнение отпечатков
+            if wd >= 0:
+                self._watched[directory] = wd
+
+    def _drain(self) -> None:
+        """Вычитывает накопившиеся события."""
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self) -> None:
+        """Ждет события (не дольше interval) и собирает последующие."""
+        ready, _, _ = select.select([self._fd], [], [], self.interval)
+        if ready:
+            time.sleep(self.DEBOUNCE)
+            self._drain()
+
+    def close(self) -> None:
+        """Закрывает дескриптор inotify."""
+        os.close(self._fd)
+
+
+def create_watcher(backend: str = "auto", interval: float = 1.0):
+    """Создает наблюдателя; при auto inotify используется, если доступен."""
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(
+            f"Неизвестный способ наблюдения '{backend}'. Допустимые: {list(WATCH_BACKENDS)}"
+        )
+
+    if backend != "poll":
+        try:
+            return InotifyWatcher(interval)
+        except (OSError, AttributeError) as e:
+            if backend == "inotify":
+                raise
+            logger.warning(f"inotify недоступен ({e}), используется опрос")
+    return PollingWatcher(interval)
+
+
+def cfg_stamp(cfg_path: Optional[str]) -> Optional[CfgStamp]:
+    """Отпечаток cfg.yaml; None, если файла нет."""
+    if cfg_path is None:
+        return None
+    try:
+        st = os.stat(cfg_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+
+class _PipelineRequestHandler(socketserver.BaseRequestHandler):
+    """Отдает текущий пайплайн и закрывает соединение."""
+
+    def handle(self) -> None:
+        self.request.sendall(self.server.daemon_state.content.encode("utf-8"))
+
+
+class _PipelineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class PipelineDaemon:
+    """Держит состояние генерации в памяти и обновляет пайплайн при изменениях."""
+
+    def __init__(
+        self,
+        generator,
+        stages: List[str],
+        output_file: Optional[str] = None,
+        socket_path: Optional[str] = None,
+        watcher=None,
+    ):
+        self.generator = generator
+        self.parser = generator.parser
+        self.stages = stages
+        self.output_file = output_file
+        self.socket_path = socket_path
+        self.watcher = watcher or PollingWatcher()
+        self.content = ""
+        self._stamps: Dict[str, Optional[CfgStamp]] = {}
+        self._names: Dict[str, str] = {}
+        self._parsed: Dict[str, Dict[str, Any]] = {}
+        self._server: Optional[_PipelineServer] = None
+
+    def _watch_directories(self, entries: List[SubmoduleEntry]) -> List[str]:
+        """Каталоги для наблюдения: папка fpga, сабмодули и промежуточные каталоги."""
+        root = os.path.abspath(self.parser.fpga_dir)
+        directories = {root}
+        for entry in entries:
+            path = os.path.abspath(entry.path)
+            while path.startswith(root + os.sep):
+                directories.add(path)
+                path = os.path.dirname(path)
+        return sorted(directories)
+
+    def refresh(self) -> List[str]:
+        """
+        Пересканирует папку fpga и заново разбирает измененные сабмодули.
+        Возвращает имена добавленных, измененных и удаленных сабмодулей.
+        """
+        entries = list(self.parser.iter_submodules())
+        stamps = {entry.path: cfg_stamp(entry.cfg_path) for entry in entries}
+        changed = [
+            entry for entry in entries
+            if entry.path not in self._stamps or stamps[entry.path] != self._stamps[entry.path]
+        ]
+        removed = [path for path in self._stamps if path not in stamps]
+        if not changed and not removed:
+            return []
+
+        self.watcher.watch(self._watch_directories(entries))
+        reparsed = self.parser.parse_all_submodules(self.stages, changed) if changed else {}
+        changed_paths = {entry.path for entry in changed}
+
+        # Порядок сабмодулей тот же, что при обычном запуске
+        parsed: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            name = self.parser.submodule_name(entry)
+            data = reparsed.get(name) if entry.path in changed_paths else self._parsed.get(name)
+            if data:
+                parsed[name] = data
+
+        removed_names = [self._names[path] for path in removed]
+        self._names = {entry.path: self.parser.submodule_name(entry) for entry in entries}
+        self._stamps = stamps
+        self._parsed = parsed
+        return [self._names[entry.path] for entry in changed] + removed_names
+
+    def render(self) -> Tuple[str, int]:
+        """Рендерит пайплайн из текущего состояния."""
+        parsed = self._parsed
+        if self.generator.selection.active:
+            parsed = self.generator.selection.apply(parsed)
+        job_contexts = list(self.generator.iter_job_contexts(parsed, self.stages))
+        content = "".join(self.generator.iter_pipeline_chunks(self.stages, job_contexts))
+        return content, len(job_contexts)
+
+    def publish(self, content: str) -> bool:
+        """Обновляет пайплайн для сокета и файла. False - содержимое не изменилось."""
+        if content == self.content:
+            return False
+        self.content = content
+        if self.output_file:
+            with FileUtils.atomic_write(self.output_file) as f:
+                f.write(content)
+        elif not self.socket_path:
+            sys.stdout.write(content)
+        return True
+
+    def start_server(self) -> None:
+        """Запускает раздачу пайплайна через Unix-сокет в отдельном потоке."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = _PipelineServer(self.socket_path, _PipelineRequestHandler)
+        self._server.daemon_state = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Пайплайн раздается через сокет {self.socket_path}")
+
+    def update(self) -> bool:
+        """Одна итерация: пересканирование, рендеринг и публикация."""
+        start = time.perf_counter()
+        changed = self.refresh()
+        if not changed:
+            return False
+
+        # Хэши исходников для отпечатков задач вычисляются заново
+        self.generator.reset_source_hashes()
+        content, job_count = self.render()
+        published = self.publish(content)
+        elapsed = (time.perf_counter() - start) * 1000
+        status = "обновлен" if published else "не изменился"
+        logger.info(
+            f"Пайплайн {status}: задач {job_count}, "
+            f"изменено сабмодулей {len(changed)} ({elapsed:.1f} мс)"
+        )
+        return published
+
+    def run(self) -> None:
+        """Основной цикл; завершается по Ctrl+C."""
+        self.update()
+        if self.socket_path:
+            self.start_server()
+        target = self.output_file or self.socket_path or "stdout"
+        logger.info(f"Наблюдение за {self.parser.fpga_dir} ({self.watcher.name}), вывод: {target}")
+
+        try:
+            while True:
+                self.watcher.wait()
+                self.update()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Останавливает сервер и наблюдателя."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._server = None
+        self.watcher.close()
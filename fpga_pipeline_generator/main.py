@@ -4,13 +4,35 @@
 """
 
 import sys
+import signal
 import argparse
-from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from .core.generator import FPGAPipelineGenerator
+# Генератор (jinja2, PyYAML) импортируется только после разбора аргументов,
+# поэтому --help и --version не загружают тяжелые зависимости
+from .core.constants import (
+    BUILD_AVOIDANCE_MODES,
+    FINGERPRINT_MODES,
+    OUTPUT_FORMATS,
+    PARSE_MODES,
+    PROFILE_FORMATS,
+    SHARD_MODES,
+    WATCH_BACKENDS,
+)
 from . import __version__
 
+from .core.profiles import (
+    StageProfile,
+    load_profiles,
+    parse_profile_arg,
+    profile_output_path,
+    split_stages,
+)
+
+if TYPE_CHECKING:
+    from .core.generator import FPGAPipelineGenerator
+    from .core.profiler import Profiler
+
 
 def create_parser() -> argparse.ArgumentParser:
     """Создает парсер аргументов командной строки."""
@@ -54,13 +76,241 @@ def create_parser() -> argparse.ArgumentParser:
         help='Список стадий через запятую (переопределяет FPGA_TARGET_ARTIFACT)'
     )
     
+    parser.add_argument(
+        '--profile-stages',
+        action='append',
+        metavar='NAME=STAGES',
+        help='Сгенерировать пайплайн для именованного набора стадий в <имя>.NAME<расширение> '
+             '(можно указать несколько раз; заменяет секцию profiles конфигурации)'
+    )
+    
+    parser.add_argument(
+        '--config-profiles',
+        action='store_true',
+        help='Сгенерировать пайплайны всех профилей из секции profiles конфигурации'
+    )
+    
     parser.add_argument(
         '--fpga-dir',
         type=str,
-        default='fpga',
         help='Директория с FPGA сабмодулями (по умолчанию: fpga)'
     )
     
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        help='Глубина поиска cfg.yaml в папке fpga (по умолчанию: 1)'
+    )
+    
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        metavar='GLOB',
+        help='Исключить каталоги по шаблону в стиле .gitignore (можно указать несколько раз)'
+    )
+    
+    parser.add_argument(
+        '--only',
+        action='append',
+        metavar='SELECTOR',
+        help='Генерировать задачи только для подходящих целей: submodule:GLOB, target:GLOB, '
+             'VAR=GLOB или GLOB (сабмодуль или цель); условия через запятую должны '
+             'выполняться одновременно (можно указать несколько раз)'
+    )
+    
+    parser.add_argument(
+        '--skip',
+        action='append',
+        metavar='SELECTOR',
+        help='Не генерировать задачи для подходящих целей (синтаксис как у --only)'
+    )
+    
+    parser.add_argument(
+        '--changed-since',
+        metavar='REF',
+        help='Генерировать задачи только для сабмодулей, измененных с указанного git ref'
+    )
+    
+    parser.add_argument(
+        '--parallel',
+        choices=PARSE_MODES,
+        help='Режим парсинга cfg.yaml: serial, thread (I/O) или process (CPU) '
+             '(по умолчанию: file_search.parallel из конфигурации)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Размер пула для параллельного парсинга (по умолчанию: число CPU)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        help='Включить дисковый кэш парсинга cfg.yaml в указанном каталоге'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Отключить кэш парсинга и кэш пайплайнов, даже если они включены в конфигурации'
+    )
+    
+    parser.add_argument(
+        '--reuse-output',
+        action='store_true',
+        help='Кэш пайплайнов: при неизменных конфигурации, стадиях, шаблонах и cfg.yaml '
+             'использовать сохраненный результат без парсинга и рендеринга'
+    )
+    
+    parser.add_argument(
+        '--fingerprint',
+        choices=FINGERPRINT_MODES,
+        help='Отпечаток cfg.yaml для кэша пайплайнов: content (хэш содержимого) '
+             'или mtime (размер и время изменения) (по умолчанию: content)'
+    )
+    
+    parser.add_argument(
+        '--no-timestamp',
+        action='store_true',
+        help='Не передавать время генерации в шаблон (воспроизводимый вывод)'
+    )
+    
+    parser.add_argument(
+        '--format',
+        choices=OUTPUT_FORMATS,
+        help='Формат вывода: jinja (шаблоны), yaml или json (прямая сериализация) '
+             '(по умолчанию: output.format из конфигурации)'
+    )
+    
+    parser.add_argument(
+        '--dag',
+        action='store_true',
+        help='Задавать needs между задачами одной цели вместо ожидания всей предыдущей стадии'
+    )
+    
+    parser.add_argument(
+        '--extends',
+        action='store_true',
+        help='Выносить общие части задач в скрытые базовые задачи (extends), '
+             'включает формат yaml, если выбран jinja'
+    )
+    
+    parser.add_argument(
+        '--matrix',
+        action='store_true',
+        help='Объединять цели сабмодуля одной стадии, отличающиеся только переменными, '
+             'в задачу с parallel: matrix; включает формат yaml, если выбран jinja'
+    )
+    
+    parser.add_argument(
+        '--job-history',
+        metavar='FILE',
+        help='Включить модель стоимости задач по истории длительностей из FILE: '
+             'задачи стадии идут от самой долгой, классы стоимости задают теги '
+             'раннеров, resource_group и interruptible'
+    )
+    
+    parser.add_argument(
+        '--import-history',
+        action='append',
+        metavar='EXPORT',
+        help='Добавить в историю длительностей задачи из JSON выгрузки GitLab '
+             '(ответ API jobs) и завершиться (можно указать несколько раз)'
+    )
+    
+    parser.add_argument(
+        '--build-avoidance',
+        choices=BUILD_AVOIDANCE_MODES,
+        help='Задачи с уже собранным отпечатком (исходники сабмодуля, цель, переменные): '
+             'omit - не выводить, reuse - скачивать артефакты прошлой сборки, off - собирать все'
+    )
+    
+    parser.add_argument(
+        '--record-builds',
+        action='append',
+        metavar='EXPORT',
+        help='Записать в реестр сборок успешные задачи из JSON выгрузки GitLab по '
+             'манифесту отпечатков <имя>.fingerprints.json и завершиться '
+             '(можно указать несколько раз)'
+    )
+    
+    parser.add_argument(
+        '--shard-by',
+        choices=SHARD_MODES,
+        help='Разбить пайплайн на дочерние пайплайны: по сабмодулям, стадиям или числу задач'
+    )
+    
+    parser.add_argument(
+        '--shards',
+        type=int,
+        help='Число частей при --shard-by submodule (по умолчанию: 4)'
+    )
+    
+    parser.add_argument(
+        '--max-jobs-per-shard',
+        type=int,
+        help='Максимум задач в части при --shard-by count (по умолчанию: 500)'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Потоковый рендеринг прямо в выходной файл (или stdout при --dry-run)'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Не завершаться: пересобирать пайплайн при изменении cfg.yaml, '
+             'заново разбирая только измененные сабмодули'
+    )
+    
+    parser.add_argument(
+        '--watch-backend',
+        choices=WATCH_BACKENDS,
+        help='Способ наблюдения: inotify, опрос mtime или auto (по умолчанию: auto)'
+    )
+    
+    parser.add_argument(
+        '--watch-interval',
+        type=float,
+        help='Интервал опроса в секундах в режиме --watch (по умолчанию: 1.0)'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        metavar='SOCKET',
+        help='В режиме --watch раздавать текущий пайплайн через Unix-сокет'
+    )
+    
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Только проверить все cfg.yaml (стадии, схема целей, совпадения имен задач) '
+             'без рендеринга; при ошибках код возврата 1'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Замерить фазы генерации и сохранить отчет рядом с выходным файлом'
+    )
+    
+    parser.add_argument(
+        '--profile-format',
+        choices=PROFILE_FORMATS,
+        default='json',
+        help='Формат отчета: json (сводка, <имя>.profile.json) или chrome '
+             '(trace-event, <имя>.trace.json) (по умолчанию: json)'
+    )
+    
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='Добавить в отчет пиковую память фаз (tracemalloc, замедляет генерацию)'
+    )
+    
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -82,20 +332,336 @@ def create_parser() -> argparse.ArgumentParser:
     return parser
 
 
-def setup_environment(args) -> None:
-    """Настраивает переменные окружения на основе аргументов."""
-    import os
+def build_overrides(args) -> Dict[str, Any]:
+    """Собирает переопределения конфигурации из аргументов командной строки."""
+    overrides: Dict[str, Any] = {}
+    file_search: Dict[str, Any] = {}
+    cache: Dict[str, Any] = {}
+    output: Dict[str, Any] = {}
+    sharding: Dict[str, Any] = {}
+    watch: Dict[str, Any] = {}
+    selection: Dict[str, Any] = {}
+    cost_model: Dict[str, Any] = {}
     
-    if args.stages:
-        os.environ['FPGA_TARGET_ARTIFACT'] = args.stages
-        if args.verbose:
-            print(f"Установлена FPGA_TARGET_ARTIFACT={args.stages}")
+    if args.fpga_dir:
+        file_search['fpga_dir'] = args.fpga_dir
+    if args.max_depth is not None:
+        file_search['max_depth'] = args.max_depth
+    if args.exclude:
+        file_search['exclude'] = args.exclude
+    if args.parallel:
+        file_search['parallel'] = args.parallel
+    if args.workers is not None:
+        file_search['workers'] = args.workers
+    
+    if args.cache_dir:
+        cache['enabled'] = True
+        cache['dir'] = args.cache_dir
+    if args.reuse_output:
+        cache['outputs'] = True
+    if args.fingerprint:
+        cache['fingerprint'] = args.fingerprint
+    if args.no_cache:
+        cache['enabled'] = False
+        cache['outputs'] = False
+    
+    if args.only:
+        selection['only'] = args.only
+    if args.skip:
+        selection['skip'] = args.skip
+    if args.dag:
+        overrides['dag'] = {'enabled': True}
+    if args.changed_since:
+        overrides['incremental'] = {'changed_since': args.changed_since}
+    if args.format:
+        output['format'] = args.format
+    if args.extends:
+        output['extends'] = True
+    if args.matrix:
+        output['matrix'] = True
+    if args.no_timestamp:
+        output['timestamp'] = False
+    
+    if args.job_history:
+        cost_model['enabled'] = True
+        cost_model['history'] = args.job_history
+    
+    if args.build_avoidance:
+        overrides['build_avoidance'] = {'mode': args.build_avoidance}
+    
+    if args.shard_by:
+        sharding['enabled'] = True
+        sharding['by'] = args.shard_by
+    if args.shards is not None:
+        sharding['shards'] = args.shards
+    if args.max_jobs_per_shard is not None:
+        sharding['max_jobs'] = args.max_jobs_per_shard
+    
+    if args.watch_backend:
+        watch['backend'] = args.watch_backend
+    if args.watch_interval is not None:
+        watch['interval'] = args.watch_interval
+    if args.serve:
+        watch['socket'] = args.serve
+    
+    if file_search:
+        overrides['file_search'] = file_search
+    if cache:
+        overrides['cache'] = cache
+    if output:
+        overrides['output'] = output
+    if sharding:
+        overrides['sharding'] = sharding
+    if watch:
+        overrides['watch'] = watch
+    if selection:
+        overrides['selection'] = selection
+    if cost_model:
+        overrides['cost_model'] = cost_model
+    return overrides
+
+
+def write_empty_pipeline(generator: "FPGAPipelineGenerator", stages: List[str], args) -> int:
+    """Выводит или сохраняет пайплайн с задачей-заглушкой (ничего не изменилось)."""
+    content = generator.render_empty_pipeline(stages)
+    if args.dry_run:
+        print("\nСгенерированный пайплайн:")
+        print("-" * 50)
+        print(content)
+        return 0
+    return 0 if generator.save_pipeline(content, args.output) else 1
+
+
+def run_streaming(generator: "FPGAPipelineGenerator", args) -> int:
+    """Генерирует пайплайн в потоковом режиме."""
+    collected = generator.collect_targets()
+    if collected is None:
+        print("Не удалось сгенерировать пайплайн")
+        return 1
+    stages, parsed_data = collected
+    if not parsed_data:
+        return write_empty_pipeline(generator, stages, args)
+    
+    if args.dry_run:
+        print("\nСгенерированный пайплайн:")
+        print("-" * 50)
+        job_count = generator.stream_pipeline(stages, parsed_data, sys.stdout)
+        print()
+        print(f"Создано задач: {job_count}")
+        return 0
+    
+    return 0 if generator.save_pipeline_stream(stages, parsed_data, args.output) else 1
+
+
+def run_sharded(generator: "FPGAPipelineGenerator", args) -> int:
+    """Генерирует пайплайн, разбитый на дочерние пайплайны."""
+    from .core.sharding import shard_file_path
+    
+    collected = generator.collect_targets()
+    if collected is None:
+        print("Не удалось сгенерировать пайплайн")
+        return 1
+    stages, parsed_data = collected
+    if not parsed_data:
+        # Делить нечего: вместо манифеста пишется пайплайн с задачей-заглушкой
+        return write_empty_pipeline(generator, stages, args)
+    
+    if not args.dry_run:
+        return 0 if generator.save_pipeline_shards(stages, parsed_data, args.output) else 1
+    
+    output_file = generator.get_output_file(args.output)
+    shards = generator.build_shards(stages, parsed_data)
+    shard_files = [shard_file_path(output_file, shard) for shard in shards]
+    print("\nМанифест дочерних пайплайнов:")
+    print("-" * 50)
+    print(generator.render_manifest(shards, shard_files))
+    for shard, shard_file in zip(shards, shard_files):
+        print(f"\n{shard_file} (задач: {len(shard.job_contexts)}):")
+        print("-" * 50)
+        for chunk in generator.iter_pipeline_chunks(
+            shard.stages, shard.job_contexts, emit_variables=True
+        ):
+            sys.stdout.write(chunk)
+    return 0
+
+
+def select_profiles(generator: "FPGAPipelineGenerator", args) -> List[StageProfile]:
+    """
+    Профили стадий для генерации: из --profile-stages или, с --config-profiles,
+    из секции profiles конфигурации. Без них генерируется обычный пайплайн.
+    """
+    if args.profile_stages:
+        return [parse_profile_arg(value) for value in args.profile_stages]
+    config_profiles = generator.config.get("profiles", {})
+    if args.config_profiles:
+        return load_profiles(config_profiles)
+    if config_profiles and not args.stages:
+        print(
+            "Предупреждение: секция profiles конфигурации не используется без "
+            "--config-profiles, генерируется обычный пайплайн"
+        )
+    return []
+
+
+def run_profiles(
+    generator: "FPGAPipelineGenerator", profiles: List[StageProfile], args
+) -> int:
+    """Генерирует пайплайны нескольких профилей стадий за один проход."""
+    if generator.config.get("sharding", {}).get("enabled", False):
+        print("Разбиение на части для профилей не поддерживается")
+        return 1
+    if args.stream or generator.config.get("output", {}).get("streaming", False):
+        print("Потоковый рендеринг для профилей не поддерживается")
+        return 1
+    
+    results = generator.generate_profiles(profiles)
+    if results is None:
+        print("Не удалось сгенерировать пайплайны профилей")
+        return 1
+    
+    output_file = generator.get_output_file(args.output)
+    exit_code = 0
+    for profile in profiles:
+        content = results[profile.name]
+        if content is None:
+            exit_code = 1
+            continue
+        profile_file = profile_output_path(output_file, profile)
+        if args.dry_run:
+            print(f"\nПрофиль {profile.name} ({profile_file}):")
+            print("-" * 50)
+            print(content)
+        elif not generator.save_pipeline(content, profile_file):
+            exit_code = 1
+    return exit_code
+
+
+def run_import_history(generator: "FPGAPipelineGenerator", exports: List[str]) -> int:
+    """Пополняет историю длительностей задач выгрузками GitLab."""
+    from .core.cost_model import JobHistory, read_gitlab_export
+    
+    cost_config = generator.config.get("cost_model", {})
+    history = JobHistory(
+        cost_config.get("history", ".fpga_job_history.json"), cost_config.get("window", 10)
+    ).load()
+    added = 0
+    for export in exports:
+        try:
+            added += history.import_gitlab(read_gitlab_export(export))
+        except (OSError, ValueError) as e:
+            print(f"Не удалось импортировать {export}: {e}")
+            return 1
+    history.save()
+    print(f"Добавлено запусков: {added}, задач в истории: {len(history.jobs)} ({history.path})")
+    return 0
+
+
+def run_record_builds(generator: "FPGAPipelineGenerator", exports: List[str], args) -> int:
+    """Записывает в реестр сборок успешные задачи из выгрузок GitLab."""
+    import json
+    from .core.build_avoidance import BuildRegistry, manifest_path
+    from .core.cost_model import read_gitlab_export
+    
+    manifest_file = manifest_path(generator.get_output_file(args.output))
+    avoidance_config = generator.config.get("build_avoidance", {})
+    registry = BuildRegistry(
+        avoidance_config.get("registry", ".fpga_build_registry.json"),
+        avoidance_config.get("max_entries", 10000),
+    ).load()
+    recorded = 0
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for export in exports:
+            recorded += registry.record_export(manifest, read_gitlab_export(export))
+    except (OSError, ValueError) as e:
+        print(f"Не удалось записать сборки: {e}")
+        return 1
+    registry.save()
+    print(f"Записано сборок: {recorded}, всего в реестре: {len(registry.entries)} ({registry.path})")
+    return 0
+
+
+def run_check(generator: "FPGAPipelineGenerator") -> int:
+    """Проверяет cfg.yaml и выводит все найденные ошибки."""
+    problems, files_checked = generator.check_configs()
+    for problem in problems:
+        print(problem)
+    
+    if generator.profiler.enabled:
+        print(generator.profiler.format_summary())
+    
+    print(f"\nПроверено файлов: {files_checked}, ошибок: {len(problems)}")
+    return 1 if problems else 0
+
+
+def run_watch(generator: "FPGAPipelineGenerator", args) -> int:
+    """Запускает режим наблюдения до Ctrl+C."""
+    from .core.watcher import PipelineDaemon, create_watcher
+    
+    stages = generator.get_target_stages()
+    if not stages:
+        print("Установите переменную окружения FPGA_TARGET_ARTIFACT")
+        return 1
+    print(f"Целевые артефакты: {stages}")
+    
+    if generator.config.get("sharding", {}).get("enabled", False):
+        print("Разбиение на части в режиме --watch не поддерживается, пайплайн пишется одним файлом")
+    
+    watch_config = generator.config.get("watch", {})
+    daemon = PipelineDaemon(
+        generator,
+        stages,
+        output_file=None if args.dry_run else generator.get_output_file(args.output),
+        socket_path=watch_config.get("socket"),
+        watcher=create_watcher(
+            watch_config.get("backend", "auto"), watch_config.get("interval", 1.0)
+        ),
+    )
+    # SIGTERM (systemd, docker stop) завершает цикл так же, как Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("\nНаблюдение остановлено")
+    return 0
+
+
+def save_profile(profiler: "Profiler", generator: "FPGAPipelineGenerator", args) -> None:
+    """Выводит сводку профиля и сохраняет отчет рядом с выходным файлом."""
+    from .core.profiler import profile_file_path
+    
+    print(profiler.format_summary())
+    if args.dry_run:
+        return
+    
+    profile_file = profile_file_path(generator.get_output_file(args.output), args.profile_format)
+    with open(profile_file, 'w', encoding='utf-8') as f:
+        f.write(profiler.render(args.profile_format))
+    print(f"Отчет профилирования сохранен в {profile_file}")
+
+
+def setup_logging(verbose: bool) -> None:
+    """
+    Сообщения генератора (модуль logging) выводятся в stdout без префиксов,
+    вперемешку с выводом CLI; --verbose включает отладочные сообщения.
+    """
+    import logging
+    
+    logger = logging.getLogger(__package__)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+    logger.propagate = False
 
 
 def main() -> int:
     """Основная функция."""
     parser = create_parser()
     args = parser.parse_args()
+    setup_logging(args.verbose)
     
     print("FPGA Pipeline Generator")
     print("=" * 50)
@@ -105,28 +671,72 @@ def main() -> int:
         print(f"Аргументы: {vars(args)}")
     
     try:
-        # Настраиваем окружение
-        setup_environment(args)
+        from .core.generator import FPGAPipelineGenerator
+        from .core.profiler import Profiler
         
-        # Создаем генератор
-        generator = FPGAPipelineGenerator(args.config)
+        profiler = Profiler(trace_memory=args.profile_memory) if args.profile else None
         
-        # Генерируем пайплайн
-        pipeline_content = generator.generate_pipeline()
+        # Создаем генератор; явно заданные стадии передаются без изменения окружения
+        stages = split_stages(args.stages) if args.stages else None
+        generator = FPGAPipelineGenerator(args.config, build_overrides(args), profiler, stages)
         
-        if not pipeline_content:
-            print("Не удалось сгенерировать пайплайн")
-            return 1
+        if args.import_history:
+            return run_import_history(generator, args.import_history)
         
-        # Выводим или сохраняем результат
-        if args.dry_run:
-            print("\nСгенерированный пайплайн:")
-            print("-" * 50)
-            print(pipeline_content)
+        if args.record_builds:
+            return run_record_builds(generator, args.record_builds, args)
+        
+        if args.check:
+            return run_check(generator)
+        
+        if args.watch:
+            return run_watch(generator, args)
+        
+        profiles = select_profiles(generator, args)
+        if args.config_profiles and not profiles:
+            print("Секция profiles конфигурации пуста")
+            return 1
+        if profiles:
+            exit_code = run_profiles(generator, profiles, args)
+            if exit_code:
+                return exit_code
+        elif generator.config.get("sharding", {}).get("enabled", False):
+            exit_code = run_sharded(generator, args)
+            if exit_code:
+                return exit_code
+        elif args.stream or generator.config.get("output", {}).get("streaming", False):
+            exit_code = run_streaming(generator, args)
+            if exit_code:
+                return exit_code
         else:
-            success = generator.save_pipeline(pipeline_content, args.output)
-            if not success:
+            # Генерируем пайплайн
+            pipeline_content = generator.generate_pipeline()
+            
+            if not pipeline_content:
+                print("Не удалось сгенерировать пайплайн")
                 return 1
+            
+            # Выводим или сохраняем результат
+            if args.dry_run:
+                print("\nСгенерированный пайплайн:")
+                print("-" * 50)
+                print(pipeline_content)
+            else:
+                success = generator.save_pipeline(pipeline_content, args.output)
+                if not success:
+                    return 1
+        
+        # Манифест отпечатков нужен, чтобы после пайплайна записать сборки (--record-builds)
+        avoidance = generator.build_avoidance
+        if avoidance is not None and avoidance.fingerprints and not args.dry_run:
+            manifest_file = avoidance.save_manifest(generator.get_output_file(args.output))
+            print(f"Манифест отпечатков сохранен в {manifest_file}")
+        
+        if args.verbose and generator.parser.cache is not None:
+            print(generator.parser.cache.stats_summary())
+        
+        if profiler is not None:
+            save_profile(profiler, generator, args)
         
         print("\nГенерация завершена успешно!")
         return 0
@@ -0,0 +1,138 @@
+"""
+Поиск сабмодулей и файлов на основе os.scandir.
+
+Тип записей берется из DirEntry (d_type), поэтому на каждый каталог приходится
+один вызов scandir вместо пары stat на каждую запись. Как и os.walk, обход не
+заходит в символические ссылки на каталоги (иначе ссылка на родителя зацикливает
+его); исключение - сами сабмодули в корне поиска.
+"""
+
+import fnmatch
+import os
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+
+class SubmoduleEntry(NamedTuple):
+    """Найденный сабмодуль."""
+
+    path: str
+    rel_path: str
+    cfg_path: Optional[str]
+
+
+def is_excluded(rel_path: str, patterns: Sequence[str]) -> bool:
+    """
+    Проверяет путь на соответствие исключениям в стиле .gitignore.
+
+    Шаблон без '/' сравнивается с именем каталога на любой глубине,
+    шаблон с '/' - с путем относительно корня поиска ('/' в начале допускается).
+    """
+    if not patterns:
+        return False
+
+    name = rel_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch.fnmatchcase(rel_path, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatchcase(name, pattern):
+            return True
+    return False
+
+
+def _list_directory(directory: str) -> List[os.DirEntry]:
+    """Возвращает отсортированные записи каталога."""
+    try:
+        with os.scandir(directory) as it:
+            return sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return []
+
+
+def iter_submodules(
+    root: str,
+    config_filename: str = "cfg.yaml",
+    max_depth: int = 1,
+    exclude: Sequence[str] = (),
+) -> Iterator[SubmoduleEntry]:
+    """
+    Лениво обходит root и возвращает каталоги сабмодулей.
+
+    Каталог с config_filename считается сабмодулем, и вглубь него поиск не идет.
+    Каталог без config_filename на глубине max_depth (или без сабмодулей внутри)
+    возвращается с cfg_path=None, чтобы вызывающий код мог сообщить о пропуске.
+    """
+    for entry in _list_directory(root):
+        # Сабмодуль в корне может быть ссылкой (как при прежнем os.path.isdir);
+        # глубже ссылки не обходятся, поэтому цикл не возникает
+        if entry.is_dir() and not is_excluded(entry.name, exclude):
+            yield from _walk_submodule(
+                entry.path, entry.name, 1, config_filename, max_depth, exclude
+            )
+
+
+def _walk_submodule(
+    path: str,
+    rel_path: str,
+    depth: int,
+    config_filename: str,
+    max_depth: int,
+    exclude: Sequence[str],
+) -> Iterator[SubmoduleEntry]:
+    """Рекурсивно обрабатывает один каталог."""
+    cfg_path = os.path.join(path, config_filename)
+
+    if depth >= max_depth:
+        # Глубже не спускаемся - достаточно одного stat
+        yield SubmoduleEntry(path, rel_path, cfg_path if os.path.isfile(cfg_path) else None)
+        return
+
+    entries = _list_directory(path)
+    if any(entry.name == config_filename and entry.is_file() for entry in entries):
+        yield SubmoduleEntry(path, rel_path, cfg_path)
+        return
+
+    found = False
+    for entry in entries:
+        if not entry.is_dir() or entry.is_symlink():
+            continue
+        child_rel = f"{rel_path}/{entry.name}"
+        if is_excluded(child_rel, exclude):
+            continue
+        for submodule in _walk_submodule(
+            entry.path, child_rel, depth + 1, config_filename, max_depth, exclude
+        ):
+            if submodule.cfg_path is not None:
+                found = True
+                yield submodule
+
+    if not found:
+        yield SubmoduleEntry(path, rel_path, None)
+
+
+def walk_files(
+    directory: str,
+    exclude: Sequence[str] = (),
+    max_depth: Optional[int] = None,
+) -> Iterator[str]:
+    """Лениво обходит файлы каталога, не заходя в исключенные каталоги."""
+    stack = [(directory, "", 0)]
+    while stack:
+        path, rel_path, depth = stack.pop()
+        dirs = []
+        for entry in _list_directory(path):
+            entry_rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+            if entry.is_dir():
+                # Ссылка на каталог - не файл, но и не обходится (как в os.walk)
+                if (
+                    not entry.is_symlink()
+                    and (max_depth is None or depth + 1 < max_depth)
+                    and not is_excluded(entry_rel, exclude)
+                ):
+                    dirs.append((entry.path, entry_rel, depth + 1))
+            elif not is_excluded(entry_rel, exclude):
+                yield entry.path
+        # Обратный порядок, чтобы каталоги обходились по алфавиту
+        stack.extend(reversed(dirs))
+
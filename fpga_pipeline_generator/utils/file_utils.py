@@ -2,10 +2,23 @@
 Утилиты для работы с файлами.
 """
 
+import logging
 import os
-import yaml
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, TextIO
+
+from . import yaml_io
+from .discovery import walk_files
+
+logger = logging.getLogger(__name__)
+
+# umask процесса читается один раз при импорте: узнать его можно, только
+# установив новый, а смена umask при каждой записи гонялась бы с записью
+# частей пайплайна из нескольких потоков
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 class FileUtils:
@@ -18,44 +31,41 @@ class FileUtils:
             os.makedirs(directory, exist_ok=True)
             return True
         except Exception as e:
-            print(f"Ошибка создания директории {directory}: {e}")
+            logger.error(f"Ошибка создания директории {directory}: {e}")
             return False
     
     @staticmethod
     def validate_yaml_file(file_path: str) -> bool:
-        """Проверяет корректность YAML файла."""
+        """Проверяет синтаксис YAML файла без построения Python объектов."""
         if not os.path.exists(file_path):
             return False
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                yaml.safe_load(f)
-            return True
-        except yaml.YAMLError:
-            return False
+        return yaml_io.validate_file(file_path)
     
     @staticmethod
-    def find_files_by_pattern(directory: str, pattern: str) -> List[str]:
-        """Находит файлы по шаблону в директории."""
+    def find_files_by_pattern(
+        directory: str, pattern: str, exclude: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Находит файлы по шаблону в директории.
+        Каталоги из exclude (шаблоны в стиле .gitignore) не обходятся.
+        """
         if not os.path.exists(directory):
             return []
         
-        found_files = []
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if pattern in file:
-                    found_files.append(os.path.join(root, file))
-        
-        return found_files
+        return [
+            file_path
+            for file_path in walk_files(directory, exclude or ())
+            if pattern in os.path.basename(file_path)
+        ]
     
     @staticmethod
     def read_yaml_safe(file_path: str) -> Dict[str, Any]:
         """Безопасно читает YAML файл."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
+            return yaml_io.load_file(file_path) or {}
         except Exception as e:
-            print(f"Ошибка чтения файла {file_path}: {e}")
+            logger.error(f"Ошибка чтения файла {file_path}: {e}")
             return {}
     
     @staticmethod
@@ -64,12 +74,47 @@ class FileUtils:
         try:
             FileUtils.ensure_directory_exists(os.path.dirname(file_path))
             with open(file_path, 'w', encoding='utf-8') as f:
-                yaml.dump(data, f, default_flow_style=False, allow_unicode=True)
+                yaml_io.dump(data, f)
             return True
         except Exception as e:
-            print(f"Ошибка записи файла {file_path}: {e}")
+            logger.error(f"Ошибка записи файла {file_path}: {e}")
             return False
     
+    @staticmethod
+    def has_content(file_path: str, content: str) -> bool:
+        """Проверяет, что файл уже содержит content (сначала сравнивается размер)."""
+        data = content.encode("utf-8")
+        try:
+            if os.path.getsize(file_path) != len(data):
+                return False
+            with open(file_path, "rb") as f:
+                return f.read() == data
+        except OSError:
+            return False
+    
+    @staticmethod
+    @contextmanager
+    def atomic_write(file_path: str, buffer_size: int = 1 << 20) -> Iterator[TextIO]:
+        """
+        Открывает буферизованный поток записи во временный файл рядом с file_path.
+        При успешном выходе из блока файл атомарно переименовывается в file_path,
+        при исключении временный файл удаляется.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp"
+        )
+        try:
+            with open(fd, 'w', encoding='utf-8', buffering=buffer_size) as f:
+                yield f
+            # mkstemp создает файл с правами 0600 - возвращаем обычные права
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
     @staticmethod
     def get_relative_path(file_path: str, base_path: str = ".") -> str:
         """Получает относительный путь файла."""
@@ -96,5 +141,5 @@ class FileUtils:
             shutil.copy2(file_path, backup_path)
             return backup_path
         except Exception as e:
-            print(f"Ошибка создания резервной копии: {e}")
+            logger.error(f"Ошибка создания резервной копии: {e}")
             return None
\ No newline at end of file
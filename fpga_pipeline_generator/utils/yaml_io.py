@@ -0,0 +1,104 @@
+"""
+Общий слой чтения и записи YAML.
+
+Использует CSafeLoader/CSafeDumper из libyaml, если PyYAML собран с ним,
+и чистую Python-реализацию в противном случае.
+
+PyYAML импортируется при первом обращении: запуск с прогретым кэшем парсинга
+и встроенной конфигурацией по умолчанию обходится без него.
+"""
+
+import os
+from functools import lru_cache
+from typing import Any, IO, NamedTuple, Optional, Union
+
+
+class _Backend(NamedTuple):
+    """Выбранная реализация PyYAML."""
+    yaml: Any
+    loader: type
+    dumper: type
+    name: str
+    libyaml: bool
+
+
+@lru_cache(maxsize=None)
+def _backend() -> _Backend:
+    """Импортирует PyYAML и выбирает загрузчик и дампер."""
+    import yaml
+
+    libyaml = getattr(yaml, "__with_libyaml__", False)
+    # FPGA_PIPELINE_YAML_BACKEND=python принудительно включает чистый Python
+    force_python = os.getenv("FPGA_PIPELINE_YAML_BACKEND", "").lower() == "python"
+    if libyaml and not force_python:
+        return _Backend(yaml, yaml.CSafeLoader, yaml.CSafeDumper, "libyaml", libyaml)
+    return _Backend(yaml, yaml.SafeLoader, yaml.SafeDumper, "python", libyaml)
+
+
+# Атрибуты модуля, вычисляемые при первом обращении (PEP 562)
+_LAZY_ATTRIBUTES = {
+    "YAMLError": lambda backend: backend.yaml.YAMLError,
+    "SafeLoader": lambda backend: backend.loader,
+    "SafeDumper": lambda backend: backend.dumper,
+    "BACKEND": lambda backend: backend.name,
+    "LIBYAML_AVAILABLE": lambda backend: backend.libyaml,
+}
+
+
+def __getattr__(name: str) -> Any:
+    getter = _LAZY_ATTRIBUTES.get(name)
+    if getter is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getter(_backend())
+    globals()[name] = value
+    return value
+
+
+def load(stream: Union[str, bytes, IO[Any]], loader: Optional[type] = None) -> Any:
+    """Безопасно разбирает YAML из строки или потока."""
+    backend = _backend()
+    return backend.yaml.load(stream, Loader=loader or backend.loader)
+
+
+def load_file(file_path: str, loader: Optional[type] = None) -> Any:
+    """Безопасно разбирает YAML файл."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return load(f, loader)
+
+
+def dump(data: Any, stream: Optional[IO[str]] = None, **kwargs: Any) -> Optional[str]:
+    """Сериализует данные в YAML безопасным дампером."""
+    kwargs.setdefault("default_flow_style", False)
+    kwargs.setdefault("allow_unicode", True)
+    backend = _backend()
+    return backend.yaml.dump(data, stream, Dumper=backend.dumper, **kwargs)
+
+
+def compose(stream: Union[str, bytes, IO[Any]], loader: Optional[type] = None) -> Any:
+    """
+    Строит дерево узлов YAML без создания Python объектов. У каждого узла
+    есть start_mark с номером строки, что нужно для сообщений об ошибках.
+    """
+    backend = _backend()
+    return backend.yaml.compose(stream, Loader=loader or backend.loader)
+
+
+def scan(stream: Union[str, bytes, IO[Any]], loader: Optional[type] = None) -> None:
+    """
+    Проверяет синтаксис YAML, не создавая Python объектов.
+    Проходит только по событиям парсера, поэтому ошибки конструирования
+    (например, неизвестные теги) не обнаруживаются.
+    """
+    backend = _backend()
+    for _ in backend.yaml.parse(stream, Loader=loader or backend.loader):
+        pass
+
+
+def validate_file(file_path: str) -> bool:
+    """Быстро проверяет синтаксис YAML файла."""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            scan(f)
+        return True
+    except (OSError, UnicodeDecodeError, _backend().yaml.YAMLError):
+        return False
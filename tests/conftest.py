@@ -0,0 +1,29 @@
+"""
+Общие фикстуры тестов.
+"""
+
+import subprocess
+
+import pytest
+
+from benchmarks.fixtures import build_tree
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Синтетическое дерево fpga/ из 6 сабмодулей; тест выполняется в его корне."""
+    build_tree(str(tmp_path), submodules=6, targets_per_stage=3)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def git_workspace(workspace):
+    """Дерево из workspace, закоммиченное в git."""
+    def git(*args):
+        subprocess.run(["git", *args], cwd=workspace, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("add", "fpga")
+    git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "init")
+    return workspace
@@ -0,0 +1,60 @@
+"""
+Тесты программного интерфейса generate().
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fpga_pipeline_generator import generate
+from fpga_pipeline_generator.core.generator import FPGAPipelineGenerator
+from fpga_pipeline_generator.core.parse_cache import ParseCache
+
+OVERRIDES = {"output": {"timestamp": False}}
+STAGE_SETS = [["synth"], ["synth", "bitstream"], ["elab", "synth", "bitstream"], ["bitstream"]]
+
+
+def test_generate_matches_generator(workspace):
+    result = generate(["synth", "bitstream"], overrides=OVERRIDES)
+
+    generator = FPGAPipelineGenerator(None, OVERRIDES, stages=["synth", "bitstream"])
+    assert result.content == generator.generate_pipeline()
+    assert result.stages == ["synth", "bitstream"]
+    assert len(result.jobs) == 6 * 2 * 3
+    assert all(job.name in result.content for job in result.jobs)
+
+
+def test_generate_concurrent_with_shared_cache(workspace):
+    expected = {tuple(stages): generate(stages, overrides=OVERRIDES) for stages in STAGE_SETS}
+    environ = dict(os.environ)
+    cache = ParseCache(str(workspace / "cache"))
+
+    def run(stages):
+        return tuple(stages), generate(stages, overrides=OVERRIDES, parse_cache=cache)
+
+    # Запись файлов из потоков не должна менять umask процесса
+    umask = os.umask(0o027)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(run, STAGE_SETS * 8))
+    finally:
+        assert os.umask(umask) == 0o027
+
+    for stages, result in results:
+        assert result.content == expected[stages].content
+        assert [job.name for job in result.jobs] == [job.name for job in expected[stages].jobs]
+    assert cache.hits > 0
+    assert dict(os.environ) == environ
+    assert "FPGA_TARGET_ARTIFACT" not in os.environ
+
+
+def test_generate_without_supported_stages(workspace):
+    with pytest.raises(ValueError):
+        generate(["unknown"])
+
+
+def test_generate_without_targets(workspace):
+    result = generate(["synth"], fpga_dir=str(workspace / "missing"))
+    assert result.jobs == []
+    assert result.content is None
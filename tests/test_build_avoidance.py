@@ -0,0 +1,80 @@
+"""
+Тесты пропуска собранных целей (build_avoidance).
+"""
+
+import shutil
+
+import pytest
+
+from fpga_pipeline_generator.core import generator as generator_module
+from fpga_pipeline_generator.core.generator import FPGAPipelineGenerator
+from fpga_pipeline_generator.core.profiles import StageProfile
+from fpga_pipeline_generator.utils import yaml_io
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git недоступен")
+
+STAGES = ["synth", "bitstream"]
+
+
+def make_generator(**output):
+    overrides = {
+        "output": {"timestamp": False, **output},
+        "build_avoidance": {"mode": "reuse", "registry": "registry.json"},
+    }
+    return FPGAPipelineGenerator(None, overrides, stages=STAGES)
+
+
+def test_matrix_manifest_uses_gitlab_job_names(git_workspace):
+    generator = make_generator(matrix=True)
+    pipeline = yaml_io.load(generator.generate_pipeline())
+    fingerprints = generator.build_avoidance.fingerprints
+
+    # Имена, которые GitLab дает задачам матрицы, и имена отдельных задач
+    gitlab_names = set()
+    for name, job in pipeline.items():
+        if name == "stages":
+            continue
+        matrix = job.get("parallel", {}).get("matrix")
+        if matrix is None:
+            gitlab_names.add(name)
+        for entry in matrix or ():
+            gitlab_names.add(f"{name}: [{entry['FPGA_TARGET']}, {entry['FPGA_VARIABLES']}]")
+    assert any(": [" in name for name in gitlab_names)
+    assert set(fingerprints) == gitlab_names
+
+    # Сборки, записанные по выгрузке GitLab, переиспользуются при следующем запуске
+    records = [
+        {"name": name, "status": "success", "id": number}
+        for number, name in enumerate(sorted(gitlab_names), 1)
+    ]
+    assert generator.build_avoidance.registry.record_export(fingerprints, records) == len(records)
+    generator.build_avoidance.registry.save()
+
+    rerun = yaml_io.load(make_generator(matrix=True).generate_pipeline())
+    jobs = [job for name, job in rerun.items() if name != "stages"]
+    assert len(jobs) == len(gitlab_names)
+    assert all(job["variables"]["GIT_STRATEGY"] == "none" for job in jobs)
+
+
+def test_source_hashes_computed_once_per_run(git_workspace, monkeypatch):
+    calls = []
+    git_tree_hashes = generator_module.git_tree_hashes
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return git_tree_hashes(*args, **kwargs)
+
+    monkeypatch.setattr(generator_module, "git_tree_hashes", counting)
+    generator = FPGAPipelineGenerator(
+        None,
+        {
+            "output": {"timestamp": False},
+            "build_avoidance": {"mode": "omit", "registry": "registry.json"},
+            "cache": {"enabled": True, "dir": "cache", "outputs": True},
+        },
+    )
+    profiles = [StageProfile("mr", ["synth"]), StageProfile("release", STAGES)]
+    results = generator.generate_profiles(profiles)
+
+    assert all(results.values())
+    assert len(calls) == 1
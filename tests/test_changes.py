@@ -0,0 +1,62 @@
+"""
+Тесты инкрементальной генерации (--changed-since).
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+from fpga_pipeline_generator.core.generator import EMPTY_PIPELINE_JOB, FPGAPipelineGenerator
+from fpga_pipeline_generator.utils import yaml_io
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git недоступен")
+
+OVERRIDES = {"output": {"timestamp": False}, "incremental": {"changed_since": "HEAD"}}
+
+
+@pytest.mark.parametrize("output_format", ["jinja", "yaml", "json"])
+def test_no_changes_gives_placeholder_job(git_workspace, output_format):
+    overrides = {**OVERRIDES, "output": {"timestamp": False, "format": output_format}}
+    generator = FPGAPipelineGenerator(None, overrides, stages=["synth", "bitstream"])
+    content = generator.generate_pipeline()
+
+    pipeline = yaml_io.load(content)
+    assert pipeline["stages"] == ["synth", "bitstream"]
+    assert list(pipeline) == ["stages", EMPTY_PIPELINE_JOB]
+    assert pipeline[EMPTY_PIPELINE_JOB]["stage"] == "synth"
+
+
+def test_untracked_submodule_is_changed(git_workspace):
+    submodule = sorted(path for path in (git_workspace / "fpga").iterdir() if path.is_dir())[0]
+    shutil.copytree(submodule, git_workspace / "fpga" / "untracked")
+
+    generator = FPGAPipelineGenerator(None, OVERRIDES, stages=["synth"])
+    names = [generator.parser.submodule_name(entry) for entry in generator.find_submodules()]
+    assert names == ["untracked"]
+
+
+def test_commits_only_on_ref_are_not_changes(git_workspace):
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=git_workspace, check=True, capture_output=True,
+        )
+
+    first, second = sorted(path for path in (git_workspace / "fpga").iterdir() if path.is_dir())[:2]
+    git("branch", "target")
+    git("checkout", "-q", "-b", "feature")
+    (second / "feature.txt").write_text("feature\n", encoding="utf-8")
+    git("add", "fpga")
+    git("commit", "-qm", "feature")
+    # Коммит, который есть только в целевой ветке
+    git("checkout", "-q", "target")
+    (first / "target.txt").write_text("target\n", encoding="utf-8")
+    git("add", "fpga")
+    git("commit", "-qm", "target")
+    git("checkout", "-q", "feature")
+
+    overrides = {**OVERRIDES, "incremental": {"changed_since": "target"}}
+    generator = FPGAPipelineGenerator(None, overrides, stages=["synth"])
+    names = [generator.parser.submodule_name(entry) for entry in generator.find_submodules()]
+    assert names == [second.name]
@@ -0,0 +1,37 @@
+"""
+Тесты обхода каталогов: символические ссылки на каталоги не обходятся.
+"""
+
+import os
+
+import pytest
+
+from fpga_pipeline_generator.utils.discovery import iter_submodules, walk_files
+from fpga_pipeline_generator.utils.file_utils import FileUtils
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "symlink"), reason="нет symlink")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """fpga/family/ip/cfg.yaml со ссылкой-циклом family/loop -> .. и ссылкой-сабмодулем."""
+    ip_dir = tmp_path / "fpga" / "family" / "ip"
+    ip_dir.mkdir(parents=True)
+    (ip_dir / "cfg.yaml").write_text("synth: []\n", encoding="utf-8")
+    os.symlink("..", tmp_path / "fpga" / "family" / "loop")
+    os.symlink(ip_dir, tmp_path / "fpga" / "linked")
+    return tmp_path / "fpga"
+
+
+def test_walk_files_skips_directory_symlinks(tree):
+    files = list(walk_files(str(tree)))
+    assert sorted(os.path.relpath(path, tree) for path in files) == ["family/ip/cfg.yaml"]
+    assert FileUtils.find_files_by_pattern(str(tree), "cfg.yaml") == files
+
+
+def test_iter_submodules_skips_nested_symlinks(tree):
+    entries = list(iter_submodules(str(tree), max_depth=5))
+    assert [(entry.rel_path, entry.cfg_path is not None) for entry in entries] == [
+        ("family/ip", True),
+        ("linked", True),
+    ]
@@ -0,0 +1,66 @@
+"""
+Тесты режима extends: после раскрытия extends каждая задача совпадает с
+задачей обычного вывода.
+"""
+
+from typing import Any, Dict
+
+import pytest
+
+from fpga_pipeline_generator.core.generator import FPGAPipelineGenerator
+from fpga_pipeline_generator.utils import yaml_io
+
+STAGES = ["elab", "synth", "bitstream"]
+
+
+def render(extends: bool, **overrides: Any) -> Dict[str, Any]:
+    """Генерирует пайплайн в формате yaml и разбирает его."""
+    overrides = {
+        "output": {"format": "yaml", "extends": extends, "timestamp": False},
+        **overrides,
+    }
+    content = FPGAPipelineGenerator(None, overrides, stages=STAGES).generate_pipeline()
+    return yaml_io.load(content)
+
+
+def merge(base: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+    """Слияние extends по правилам GitLab: словари сливаются, остальное заменяется."""
+    result = dict(base)
+    for key, value in job.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def expand(pipeline: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Раскрывает extends задачи (в том числе вложенные) в порядке перечисления."""
+    job = dict(pipeline[name])
+    parents = job.pop("extends", [])
+    if isinstance(parents, str):
+        parents = [parents]
+    result: Dict[str, Any] = {}
+    for parent in parents:
+        result = merge(result, expand(pipeline, parent))
+    return merge(result, job)
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [{}, {"dag": {"enabled": True}}],
+    ids=["stages", "dag"],
+)
+def test_extends_matches_plain_output(workspace, overrides):
+    plain = render(False, **overrides)
+    extended = render(True, **overrides)
+
+    hidden = [name for name in extended if name.startswith(".")]
+    jobs = [name for name in extended if name != "stages" and not name.startswith(".")]
+    assert hidden
+    assert all("extends" in extended[name] for name in jobs)
+
+    assert extended["stages"] == plain["stages"]
+    assert jobs == [name for name in plain if name != "stages"]
+    for name in jobs:
+        assert expand(extended, name) == plain[name], name
@@ -0,0 +1,41 @@
+"""
+Тесты времени запуска: бюджет импорта точки входа (python -X importtime) и
+отсутствие тяжелых зависимостей при импорте, --help и --version.
+"""
+
+import pytest
+
+from benchmarks.startup import (
+    DEFAULT_BUDGET_MS,
+    ENTRY_MODULE,
+    HEAVY_MODULES,
+    heavy_imports,
+    run_importtime,
+)
+from fpga_pipeline_generator.config import compile_defaults
+
+# Минимум из нескольких запусков сглаживает шум загруженной машины
+REPEAT = 5
+
+
+def test_entry_import_within_budget():
+    best_ms = float("inf")
+    for _ in range(REPEAT):
+        modules = run_importtime(["-c", f"import {ENTRY_MODULE}"])
+        assert ENTRY_MODULE in modules
+        loaded = [name for name in HEAVY_MODULES if name in modules]
+        assert not loaded, f"импорт {ENTRY_MODULE} загружает {loaded}"
+        best_ms = min(best_ms, modules[ENTRY_MODULE] / 1000)
+    assert best_ms <= DEFAULT_BUDGET_MS, (
+        f"импорт {ENTRY_MODULE}: {best_ms:.1f} мс, бюджет {DEFAULT_BUDGET_MS:.1f} мс"
+    )
+
+
+@pytest.mark.parametrize("cli_args", [["--help"], ["--version"]], ids=["help", "version"])
+def test_cli_info_skips_heavy_modules(cli_args):
+    assert heavy_imports(cli_args) == []
+
+
+def test_compiled_defaults_are_current():
+    with open(compile_defaults.TARGET_FILE, "r", encoding="utf-8") as f:
+        assert f.read() == compile_defaults.render_defaults()
@@ -0,0 +1,69 @@
+"""
+Тесты шаблонов job.j2/pipeline.j2: значения экранируются так же, как в emitter,
+а шаблон из конфигурации используется, даже если его имя совпадает со встроенным.
+"""
+
+import pytest
+
+from fpga_pipeline_generator.core.generator import FPGAPipelineGenerator
+from fpga_pipeline_generator.utils import yaml_io
+
+HOSTILE = 'a "quoted" \\path\\ #not-comment: {x}\nsecond line\x7f\x85\u2028'
+
+CFG = {
+    "synth": [
+        {
+            "target": "hostile",
+            "variables": {"PLAIN": "value", "HOSTILE": HOSTILE},
+            "options": [f"--flag={HOSTILE}"],
+        }
+    ]
+}
+
+
+def generate(output_format: str) -> str:
+    overrides = {
+        "output": {"format": output_format, "timestamp": False},
+        "job_defaults": {
+            "variables": {"HOSTILE": HOSTILE, "*key: x": "1"},
+            "script_prefix": ["echo *start: 1", HOSTILE],
+        },
+    }
+    generator = FPGAPipelineGenerator(None, overrides, stages=["synth"])
+    return generator.generate_pipeline()
+
+
+@pytest.fixture
+def hostile_submodule(workspace):
+    submodule = workspace / "fpga" / "zz_hostile"
+    submodule.mkdir()
+    (submodule / "cfg.yaml").write_text(yaml_io.dump(CFG), encoding="utf-8")
+    return workspace
+
+
+def test_template_escapes_like_emitter(hostile_submodule):
+    pipeline = yaml_io.load(generate("jinja"))
+    assert pipeline == yaml_io.load(generate("yaml"))
+
+    job = next(job for name, job in pipeline.items() if "hostile" in name)
+    assert job["variables"]["HOSTILE"] == HOSTILE
+    assert job["variables"]["*key: x"] == "1"
+    assert job["script"][:2] == ["echo *start: 1", HOSTILE]
+    assert f"OPTIONS='--flag={HOSTILE}'" in job["script"][-1]
+
+
+def test_custom_template_with_bundled_name(workspace, tmp_path_factory):
+    custom_dir = tmp_path_factory.mktemp("custom")
+    (custom_dir / "job.j2").write_text(
+        "{{ job_name | yaml_key }}:\n  stage: {{ stage }}\n  script: [\"custom\"]\n",
+        encoding="utf-8",
+    )
+    overrides = {
+        "output": {"timestamp": False},
+        "templates": {"job": str(custom_dir / "job.j2")},
+    }
+    generator = FPGAPipelineGenerator(None, overrides, stages=["synth"])
+    pipeline = yaml_io.load(generator.generate_pipeline())
+
+    jobs = [job for name, job in pipeline.items() if name != "stages"]
+    assert jobs and all(job["script"] == ["custom"] for job in jobs)
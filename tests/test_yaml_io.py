@@ -0,0 +1,97 @@
+"""
+Тесты слоя YAML: реализации libyaml и чистого Python дают одинаковый результат,
+а dump_yaml пишет значения, которые читаются обратно без изменений.
+"""
+
+import glob
+import math
+import os
+
+import pytest
+
+from fpga_pipeline_generator.core.emitter import dump_yaml
+from fpga_pipeline_generator.core.generator import FPGAPipelineGenerator
+from fpga_pipeline_generator.utils import yaml_io
+
+DEFAULT_CONFIG = os.path.join(
+    os.path.dirname(yaml_io.__file__), os.pardir, "config", "default.yaml"
+)
+
+needs_libyaml = pytest.mark.skipif(
+    not yaml_io.LIBYAML_AVAILABLE, reason="PyYAML собран без libyaml"
+)
+
+
+@pytest.fixture
+def use_backend(monkeypatch):
+    """Переключает реализацию PyYAML через FPGA_PIPELINE_YAML_BACKEND."""
+
+    def switch(name: str) -> None:
+        monkeypatch.setenv("FPGA_PIPELINE_YAML_BACKEND", name)
+        yaml_io._backend.cache_clear()
+        assert yaml_io._backend().name == name
+
+    yield switch
+    monkeypatch.delenv("FPGA_PIPELINE_YAML_BACKEND", raising=False)
+    yaml_io._backend.cache_clear()
+
+
+def load_and_dump(paths, pipeline):
+    """Разбирает файлы и пайплайн и сериализует результат обратно."""
+    loaded = [yaml_io.load_file(path) for path in paths] + [yaml_io.load(pipeline)]
+    return loaded, [yaml_io.dump(data) for data in loaded]
+
+
+def generate(output_format: str) -> str:
+    overrides = {"output": {"format": output_format, "timestamp": False}}
+    generator = FPGAPipelineGenerator(None, overrides, stages=["synth", "bitstream"])
+    return generator.generate_pipeline()
+
+
+@needs_libyaml
+def test_backends_load_and_dump_identically(workspace, use_backend):
+    paths = [DEFAULT_CONFIG, *sorted(glob.glob("fpga/*/cfg.yaml"))]
+
+    use_backend("python")
+    pipeline = generate("jinja")
+    python_result = load_and_dump(paths, pipeline)
+
+    use_backend("libyaml")
+    assert load_and_dump(paths, pipeline) == python_result
+
+
+@needs_libyaml
+@pytest.mark.parametrize("output_format", ["jinja", "yaml"])
+def test_backends_generate_identical_pipelines(workspace, use_backend, output_format):
+    use_backend("python")
+    python_pipeline = generate(output_format)
+    use_backend("libyaml")
+    assert generate(output_format) == python_pipeline
+
+
+ROUND_TRIP_VALUES = [
+    "a\x7fb",
+    "a\x85b",
+    "a\u2028b\u2029c",
+    "".join(chr(code) for code in range(0x20)),
+    "".join(chr(code) for code in range(0x7f, 0xa0)),
+    "a\ufffeb\uffff",
+    'кавычки " и \\ обратная черта',
+    "символы: #, *, &, {}",
+    float("inf"),
+    float("-inf"),
+    1.5,
+    "yes",
+    "",
+]
+
+
+@pytest.mark.parametrize("value", ROUND_TRIP_VALUES, ids=repr)
+def test_dump_yaml_round_trip(value):
+    data = {"key": value, "list": [value], value if isinstance(value, str) else "k": 1}
+    assert yaml_io.load(dump_yaml(data)) == data
+
+
+def test_dump_yaml_nan():
+    loaded = yaml_io.load(dump_yaml({"key": float("nan")}))
+    assert math.isnan(loaded["key"])